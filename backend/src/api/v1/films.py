@@ -3,83 +3,218 @@ import logging
 from http import HTTPStatus
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-
-from api.v1.params import PageParams, QueryPageParams
-from api.v1.schemas import ExtendedImdbFilm, ImdbFilm, ManyResponse
-from core.constants import KEY_FILTER_GENRE, KEY_SORT
-from services.films import FilmByIdService, PopularFilmsService, SearchFilmsService, SimilarFilmsService
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+
+from api.v1.params import CursorPageParams, FieldsParam, PageParams, QueryCursorPageParams, SuggestParams, genre_filter
+from api.v1.schemas import ExtendedImdbFilm, Film, GenreFacet, ImdbFilm, ManyResponse
+from core.constants import EXPORT_BATCH_SIZE, KEY_BATCH_ID, KEY_FACETS, KEY_SORT, MAX_BATCH_SIZE, NDJSON_MEDIA_TYPE
+from core.database_service import BaseDatabaseService
+from db.elastic import get_es_database_service
+from models import dto_models
+from models.dto_models import ExtendedFilm
+from models.service_result import ServiceListResult
+from services.export import ndjson_stream
+from services.films import (
+    FilmByIdService,
+    FilmSuggestService,
+    PopularFilmsService,
+    SearchFilmsService,
+    SimilarFilmsService,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+film_fields = FieldsParam(ImdbFilm, dto_models.ImdbFilm)
+film_details_fields = FieldsParam(ExtendedImdbFilm, ExtendedFilm)
+
 
 class Sorting(enum.Enum):
     imdb_asc = "+imdb_rating"
     imdb_desc = "-imdb_rating"
 
 
+def films_response(answer: ServiceListResult, fields: tuple[str, ...] | None = None) -> ManyResponse[ImdbFilm]:
+    if fields:
+        # проекция: только запрошенные поля, без валидации отсутствующих
+        film_list = [ImdbFilm.construct(**film.dict(include=set(fields))) for film in answer.result]
+        return ManyResponse[ImdbFilm].construct(
+            total=answer.total,
+            result=film_list,
+            next_cursor=answer.next_cursor,
+            total_relation=answer.total_relation,
+            facets=facets_response(answer),
+        )
+
+    film_list = [ImdbFilm(uuid=film.uuid, title=film.title, imdb_rating=film.imdb_rating) for film in answer.result]
+    return ManyResponse[ImdbFilm](
+        total=answer.total,
+        result=film_list,
+        next_cursor=answer.next_cursor,
+        total_relation=answer.total_relation,
+        facets=facets_response(answer),
+    )
+
+
+def facets_response(answer: ServiceListResult) -> list[GenreFacet] | None:
+    if answer.facets is None:
+        return None
+    return [GenreFacet(uuid=facet.uuid, count=facet.count) for facet in answer.facets]
+
+
+def film_details_response(film: ExtendedFilm) -> ExtendedImdbFilm:
+    return ExtendedImdbFilm(
+        uuid=film.uuid,
+        title=film.title,
+        imdb_rating=film.imdb_rating,
+        description=film.description,
+        genres=film.genres,
+        actors=film.actors,
+        writers=film.writers,
+        directors=film.directors,
+    )
+
+
 @router.get("/", response_model=ManyResponse[ImdbFilm], summary="get many films sorted by :sort")
 async def films_popular(
     sort_by: Sorting = Query(Sorting.imdb_desc, alias=KEY_SORT),
-    genre_id: UUID | None = Query(None, alias=KEY_FILTER_GENRE),
-    params: PageParams = Depends(),
+    genre_id: UUID | None = Depends(genre_filter),
+    params: CursorPageParams = Depends(),
+    fields: tuple[str, ...] | None = Depends(film_fields),
+    facets: bool = Query(False, alias=KEY_FACETS, title="return amount of films by genre"),
     service: PopularFilmsService = Depends(PopularFilmsService.get_service),
-) -> ManyResponse[ImdbFilm]:
+) -> Response:
     """Получить популярные фильмы (в текущей версии - с наибольшим рейтингом).
 
     - **sort**: поле для сортировки с префиксом + либо -
     - **filter[genre]**: UUID идентификатор жанра, из которого получить фильмы
     - **page[number]**: номер страницы
     - **page[size]**: количество фильмов на странице
+    - **page[cursor]**: курсор следующей страницы (next_cursor из ответа), * - первая страница
+    - **fields**: поля фильма в ответе через запятую, например title,imdb_rating
+    - **facets**: true - добавить в ответ число фильмов по жанрам (без учета filter[genre])
     """
 
     params.check_pagination()
 
-    answer = await service.get(
+    response = await service.get_response(
+        lambda answer: films_response(answer, fields),
         sort_by=sort_by.value,
         genre_id=genre_id,
         page_number=params.page_number,
         page_size=params.page_size,
+        cursor=params.cursor,
+        fields=fields,
+        facets=facets,
     )
-    if not answer:
+    if not response:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="films not found")
-
-    film_list = [ImdbFilm(uuid=film.uuid, title=film.title, imdb_rating=film.imdb_rating) for film in answer.result]
-    return ManyResponse[ImdbFilm](total=answer.total, result=film_list)
+    return response
 
 
 @router.get(
     "/search/", response_model=ManyResponse[ImdbFilm], summary="get many films like :query_string and Genre=:genre_id"
 )
 async def film_search(
-    genre_id: UUID | None = Query(None, alias=KEY_FILTER_GENRE),
-    params: QueryPageParams = Depends(),
+    genre_id: UUID | None = Depends(genre_filter),
+    params: QueryCursorPageParams = Depends(),
+    fields: tuple[str, ...] | None = Depends(film_fields),
+    facets: bool = Query(False, alias=KEY_FACETS, title="return amount of films by genre"),
     service: SearchFilmsService = Depends(SearchFilmsService.get_service),
-) -> ManyResponse[ImdbFilm]:
+) -> Response:
     """Найти фильмы.
 
     - **query**: поисковый запрос
     - **filter[genre]**: UUID идентификатор жанра, в котором выполнить поиск
     - **page[number]**: номер страницы
     - **page[size]**: количество фильмов на странице
+    - **page[cursor]**: курсор следующей страницы (next_cursor из ответа), * - первая страница
+    - **fields**: поля фильма в ответе через запятую, например title,imdb_rating
+    - **facets**: true - добавить в ответ число найденных фильмов по жанрам (без учета filter[genre])
     """
 
     params.check_pagination()
 
-    answer = await service.get(
+    response = await service.get_response(
+        lambda answer: films_response(answer, fields),
         search_for=params.query,
         genre_id=genre_id,
         page_number=params.page_number,
         page_size=params.page_size,
+        cursor=params.cursor,
+        fields=fields,
+        facets=facets,
     )
 
-    if not answer:
+    if not response:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"films like '{params.query}' not found")
+    return response
 
-    film_list = [ImdbFilm(uuid=film.uuid, title=film.title, imdb_rating=film.imdb_rating) for film in answer.result]
-    return ManyResponse[ImdbFilm](total=answer.total, result=film_list)
+
+@router.get("/suggest", response_model=ManyResponse[Film], summary="get films with title starting with :query_string")
+async def film_suggest(
+    params: SuggestParams = Depends(),
+    service: FilmSuggestService = Depends(FilmSuggestService.get_service),
+) -> Response:
+    """Подсказки при наборе названия фильма: id и названия, самые подходящие и популярные первыми.
+
+    Дешевле поиска: поле search_as_you_type без нечеткого поиска, горячие запросы - из памяти процесса.
+
+    - **query**: начало названия, последнее слово может быть неполным
+    - **page[size]**: количество подсказок
+    """
+
+    response = await service.get_response(
+        lambda answer: ManyResponse[Film](total=answer.total, result=[Film(**dto.dict()) for dto in answer.result]),
+        prefix=params.query,
+        size=params.size,
+    )
+    if not response:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"films starting with '{params.query}' not found")
+    return response
+
+
+@router.get("/export", response_class=StreamingResponse, summary="export all films as NDJSON")
+async def films_export(
+    genre_id: UUID | None = Depends(genre_filter),
+    database: BaseDatabaseService = Depends(get_es_database_service),
+) -> StreamingResponse:
+    """Выгрузить все фильмы одним потоком: по фильму (как в /films/{film_id}) на строку, формат NDJSON.
+
+    Обход индекса через point in time, без ограничения глубины пагинации и без кэша.
+    Если база отказала во время выгрузки, последняя строка - {"error": ...}, выгрузка неполная.
+
+    - **filter[genre]**: UUID идентификатор жанра, фильмы которого выгрузить
+    """
+
+    stream = await ndjson_stream(database.films_export(genre_id, EXPORT_BATCH_SIZE), film_details_response)
+    return StreamingResponse(stream, media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get("/batch", response_model=ManyResponse[ExtendedImdbFilm], summary="get many films with id in :id list")
+async def films_batch(
+    film_ids: list[UUID] = Query(..., alias=KEY_BATCH_ID),
+    service: FilmByIdService = Depends(FilmByIdService.get_service),
+) -> ManyResponse[ExtendedImdbFilm]:
+    """Получить полную информацию о нескольких фильмах за один запрос.
+
+    - **id**: UUID идентификаторы фильмов (параметр повторяется для каждого фильма)
+    """
+
+    if len(film_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail=f"Too many films requested, max is {MAX_BATCH_SIZE}"
+        )
+
+    answers = await service.get_many(film_ids)
+    if not answers:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="films not found")
+
+    film_list = [film_details_response(answer.result) for answer in answers]
+    return ManyResponse[ExtendedImdbFilm](total=len(film_list), result=film_list)
 
 
 @router.get("/{film_id}/similar", response_model=ManyResponse[ImdbFilm], summary="get many films similar :film_id")
@@ -87,8 +222,8 @@ async def film_similar(
     film_id: UUID,
     params: PageParams = Depends(),
     service: SimilarFilmsService = Depends(SimilarFilmsService.get_service),
-) -> ManyResponse[ImdbFilm]:
-    """Получить похожие фильмы (в текущей версии - фильмы того же жанра).
+) -> Response:
+    """Получить похожие фильмы (общие жанры и персоны, рейтинг; пока ETL не посчитал список - фильмы того же жанра).
 
     - **film_id**: UUID идентификатор фильма
     - **page[number]**: номер страницы
@@ -97,41 +232,34 @@ async def film_similar(
 
     params.check_pagination()
 
-    answer = await service.get(
+    response = await service.get_response(
+        films_response,
         film_id=film_id,
         page_number=params.page_number,
         page_size=params.page_size,
     )
 
-    if not answer:
+    if not response:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"films similar {film_id} not found")
-
-    film_list = [ImdbFilm(uuid=film.uuid, title=film.title, imdb_rating=film.imdb_rating) for film in answer.result]
-    return ManyResponse[ImdbFilm](total=answer.total, result=film_list)
+    return response
 
 
 @router.get("/{film_id}", response_model=ExtendedImdbFilm, summary="get one film with id=:film_id")
 async def film_details(
-    film_id: UUID, service: FilmByIdService = Depends(FilmByIdService.get_service)
-) -> ExtendedImdbFilm:
+    film_id: UUID,
+    fields: tuple[str, ...] | None = Depends(film_details_fields),
+    service: FilmByIdService = Depends(FilmByIdService.get_service),
+) -> ExtendedImdbFilm | Response:
     """Получить полную информацию о фильме.
 
     - **film_id**: UUID идентификатор фильма
+    - **fields**: поля фильма в ответе через запятую, например title,genres
     """
 
-    answer = await service.get(film_id=film_id)
+    answer = await service.get(film_id=film_id, fields=fields)
     if not answer:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"film {film_id} not found")
 
-    film = answer.result
-
-    return ExtendedImdbFilm(
-        uuid=film.uuid,
-        title=film.title,
-        imdb_rating=film.imdb_rating,
-        description=film.description,
-        genres=film.genres,
-        actors=film.actors,
-        writers=film.writers,
-        directors=film.directors,
-    )
+    if fields:
+        return Response(content=orjson.dumps(answer.result.dict(include=set(fields))), media_type="application/json")
+    return film_details_response(answer.result)
@@ -1,15 +1,21 @@
 from http import HTTPStatus
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 
 from api.v1.params import PageParams
 from api.v1.schemas import Genre, ManyResponse
+from models.service_result import ServiceListResult
 from services.genres import GenreByIdService, GenresAllService
 
 router = APIRouter()
 
 
+def genres_response(answer: ServiceListResult) -> ManyResponse[Genre]:
+    lst_genres = [Genre(**dto.dict()) for dto in answer.result]
+    return ManyResponse[Genre](total=answer.total, result=lst_genres, total_relation=answer.total_relation)
+
+
 @router.get("/{genre_id}", response_model=Genre, summary="get one genre by id=:genre_id")
 async def genre_by_id(genre_id: UUID, service: GenreByIdService = Depends(GenreByIdService.get_service)) -> Genre:
     """Поиск жанра по id"""
@@ -27,7 +33,7 @@ async def genre_by_id(genre_id: UUID, service: GenreByIdService = Depends(GenreB
 async def all_genres(
     params: PageParams = Depends(),
     service: GenresAllService = Depends(GenresAllService.get_service),
-) -> ManyResponse[Genre]:
+) -> Response:
     """
     Список жанров
     - **page[number]**: номер страницы
@@ -36,11 +42,9 @@ async def all_genres(
 
     params.check_pagination()
 
-    answer = await service.get(page_num=params.page_number, page_size=params.page_size)
+    response = await service.get_response(genres_response, page_num=params.page_number, page_size=params.page_size)
 
-    if not answer:
+    if not response:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="genres not found")
 
-    lst_genres = [Genre(**dto.dict()) for dto in answer.result]
-    result = ManyResponse[Genre](total=answer.total, result=lst_genres)
-    return result
+    return response
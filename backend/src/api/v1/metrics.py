@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.metrics import render_metrics
+
+router = APIRouter()
+
+# charset добавляет PlainTextResponse
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+@router.get("", response_class=PlainTextResponse, summary="metrics in Prometheus text format")
+async def metrics() -> PlainTextResponse:
+    """Метрики для Prometheus: задержки HTTP, ES и Redis, счетчики кэша, задержка event loop"""
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,10 +1,63 @@
 from dataclasses import dataclass
 from http import HTTPStatus
+from uuid import UUID
 
 from fastapi import HTTPException, Query
+from pydantic import BaseModel
 
-from core.constants import DEFAULT_PAGE_SIZE, KEY_PAGE_NUM, KEY_PAGE_SIZE, KEY_QUERY, MAX_PAGE_SIZE
-from core.utils import validate_pagination
+from core.constants import (
+    CURSOR_START,
+    DEFAULT_PAGE_SIZE,
+    KEY_FIELDS,
+    KEY_FILTER_GENRE,
+    KEY_PAGE_CURSOR,
+    KEY_PAGE_NUM,
+    KEY_PAGE_SIZE,
+    KEY_QUERY,
+    MAX_PAGE_SIZE,
+    SUGGEST_DEFAULT_SIZE,
+    SUGGEST_MAX_LENGTH,
+    SUGGEST_MAX_SIZE,
+)
+from core.utils import decode_cursor, validate_pagination
+from models.projection import PROJECTION_ID_FIELD
+from services.genre_catalog import get_genre_catalog
+
+
+def genre_filter(genre_id: UUID | None = Query(None, alias=KEY_FILTER_GENRE)) -> UUID | None:
+    """Фильтр по жанру. Несуществующий жанр отсекается по полному каталогу жанров в памяти, без запроса в базу"""
+    if genre_id is None or (catalog := get_genre_catalog()) is None:
+        return genre_id
+    if catalog.get(genre_id) is None and catalog.complete:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"genre id:{genre_id} not found")
+    return genre_id
+
+
+class FieldsParam:
+    """
+    Проекция: поля ответа через запятую. Допустимы поля, которые есть и в модели ответа API,
+    и в модели из базы. Результат - отсортированный кортеж (часть ключа кэша), id есть всегда
+    """
+
+    def __init__(self, response_model: type[BaseModel], dto_model: type[BaseModel]):
+        self.allowed = set(response_model.__fields__) & set(dto_model.__fields__)
+
+    def __call__(
+        self, fields: str | None = Query(None, alias=KEY_FIELDS, title="comma separated fields of response")
+    ) -> tuple[str, ...] | None:
+        if fields is None:
+            return None
+
+        selected = {name.strip() for name in fields.split(",") if name.strip()}
+        if not selected:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=f"Empty {KEY_FIELDS}")
+        if unknown := selected - self.allowed:
+            allowed = ", ".join(sorted(self.allowed))
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail=f"Unknown {KEY_FIELDS}: {', '.join(sorted(unknown))}, allowed: {allowed}",
+            )
+        return tuple(sorted(selected | {PROJECTION_ID_FIELD}))
 
 
 @dataclass
@@ -22,3 +75,37 @@ class PageParams:
 @dataclass
 class QueryPageParams(PageParams):
     query: str = Query(default="", alias=KEY_QUERY, title="string for search")
+
+
+@dataclass
+class CursorPageParams(PageParams):
+    """Пагинация номером страницы или курсором (без ограничения глубины)"""
+
+    cursor: str | None = Query(
+        default=None, alias=KEY_PAGE_CURSOR, title=f"cursor for next page, '{CURSOR_START}' for first page"
+    )
+
+    def check_pagination(self):
+        if self.cursor is None:
+            super().check_pagination()
+            return
+
+        try:
+            decode_cursor(self.cursor)
+        except ValueError:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=f"Invalid {KEY_PAGE_CURSOR}")
+
+
+@dataclass
+class QueryCursorPageParams(CursorPageParams):
+    query: str = Query(default="", alias=KEY_QUERY, title="string for search")
+
+
+@dataclass
+class SuggestParams:
+    """Подсказки при наборе: начало названия или имени и размер списка"""
+
+    query: str = Query(alias=KEY_QUERY, title="beginning of title or name", min_length=1, max_length=SUGGEST_MAX_LENGTH)
+    size: int = Query(
+        default=SUGGEST_DEFAULT_SIZE, alias=KEY_PAGE_SIZE, title="count of suggestions", ge=1, le=SUGGEST_MAX_SIZE
+    )
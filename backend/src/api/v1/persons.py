@@ -1,22 +1,40 @@
 from http import HTTPStatus
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-
-from api.v1.params import PageParams, QueryPageParams
-from api.v1.schemas import ExtendedPerson, ImdbFilm, ManyResponse
-from services.persons import FilmsByPersonService, PersonByIdService, PersonSearchService
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from api.v1.params import CursorPageParams, QueryPageParams, SuggestParams
+from api.v1.schemas import ExtendedPerson, ImdbFilm, ManyResponse, Person
+from core.constants import EXPORT_BATCH_SIZE, NDJSON_MEDIA_TYPE
+from core.database_service import BaseDatabaseService
+from db.elastic import get_es_database_service
+from models.service_result import ServiceListResult
+from services.export import ndjson_stream
+from services.persons import FilmsByPersonService, PersonByIdService, PersonSearchService, PersonSuggestService
 
 router = APIRouter()
 
 
+def persons_response(answer: ServiceListResult) -> ManyResponse[ExtendedPerson]:
+    lst_person = [ExtendedPerson(**dto.dict()) for dto in answer.result]
+    return ManyResponse[ExtendedPerson](total=answer.total, result=lst_person, total_relation=answer.total_relation)
+
+
+def films_response(answer: ServiceListResult) -> ManyResponse[ImdbFilm]:
+    lst_film = [ImdbFilm(**dto.dict()) for dto in answer.result]
+    return ManyResponse[ImdbFilm](
+        total=answer.total, result=lst_film, next_cursor=answer.next_cursor, total_relation=answer.total_relation
+    )
+
+
 @router.get(
     "/search", response_model=ManyResponse[ExtendedPerson], summary="get many persons with full name like :query_string"
 )
 async def person_search(
     params: QueryPageParams = Depends(),
     service: PersonSearchService = Depends(PersonSearchService.get_service),
-) -> ManyResponse[ExtendedPerson]:
+) -> Response:
     """
     Поиск персон по имени
     - query - поисковая строка
@@ -26,13 +44,50 @@ async def person_search(
 
     params.check_pagination()
 
-    answer = await service.get(page_num=params.page_number, page_size=params.page_size, query=params.query)
+    response = await service.get_response(
+        persons_response, page_num=params.page_number, page_size=params.page_size, query=params.query
+    )
 
-    if not answer:
+    if not response:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"persons for '{params.query}' not found")
 
-    lst_person = [ExtendedPerson(**dto.dict()) for dto in answer.result]
-    return ManyResponse[ExtendedPerson](total=answer.total, result=lst_person)
+    return response
+
+
+@router.get(
+    "/suggest", response_model=ManyResponse[Person], summary="get persons with name starting with :query_string"
+)
+async def person_suggest(
+    params: SuggestParams = Depends(),
+    service: PersonSuggestService = Depends(PersonSuggestService.get_service),
+) -> Response:
+    """
+    Подсказки при наборе имени персоны: id и полные имена
+    - **query**: начало имени, последнее слово может быть неполным
+    - **page[size]**: количество подсказок
+    """
+
+    response = await service.get_response(
+        lambda answer: ManyResponse[Person](total=answer.total, result=[Person(**dto.dict()) for dto in answer.result]),
+        prefix=params.query,
+        size=params.size,
+    )
+    if not response:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail=f"persons starting with '{params.query}' not found"
+        )
+    return response
+
+
+@router.get("/export", response_class=StreamingResponse, summary="export all persons as NDJSON")
+async def persons_export(database: BaseDatabaseService = Depends(get_es_database_service)) -> StreamingResponse:
+    """Выгрузить всех персон одним потоком: по персоне на строку, формат NDJSON.
+
+    Если база отказала во время выгрузки, последняя строка - {"error": ...}, выгрузка неполная.
+    """
+
+    stream = await ndjson_stream(database.persons_export(EXPORT_BATCH_SIZE), lambda dto: ExtendedPerson(**dto.dict()))
+    return StreamingResponse(stream, media_type=NDJSON_MEDIA_TYPE)
 
 
 @router.get("/{person_id}", response_model=ExtendedPerson, summary="get one person by id=:person_id")
@@ -54,22 +109,27 @@ async def person_by_id(
 )
 async def films_by_person(
     person_id: UUID,
-    params: PageParams = Depends(),
+    params: CursorPageParams = Depends(),
     service: FilmsByPersonService = Depends(FilmsByPersonService.get_service),
-) -> ManyResponse[ImdbFilm]:
+) -> Response:
 
     """
     Поиск фильмов по id персоны
     - **page[number]**: номер страницы
     - **page[size]**: количество записей на странице
+    - **page[cursor]**: курсор следующей страницы (next_cursor из ответа), * - первая страница
     """
     params.check_pagination()
 
-    answer = await service.get(page_num=params.page_number, page_size=params.page_size, person_id=person_id)
+    response = await service.get_response(
+        films_response,
+        page_num=params.page_number,
+        page_size=params.page_size,
+        person_id=person_id,
+        cursor=params.cursor,
+    )
 
-    if not answer:
+    if not response:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"films for person id:{person_id} not found")
 
-    lst_film = [ImdbFilm(**dto.dict()) for dto in answer.result]
-
-    return ManyResponse[ImdbFilm](total=answer.total, result=lst_film)
+    return response
@@ -0,0 +1,42 @@
+import asyncio
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from core.auth_bearer import root_bearer
+from core.config import settings
+from core.constants import PROFILER_MAX_SECONDS
+from core.exceptions import ProfilerBusyError
+from core.profiler import StackSampler
+
+router = APIRouter()
+
+
+@router.get(
+    "/sample",
+    response_class=PlainTextResponse,
+    summary="sample worker stacks for :seconds, collapsed stacks format",
+    dependencies=[Depends(root_bearer)],
+)
+async def profiler_sample(
+    seconds: float = Query(5, gt=0, le=PROFILER_MAX_SECONDS, title="sampling duration")
+) -> PlainTextResponse:
+    """Профиль воркера, который обработал этот запрос, за seconds секунд (все запросы воркера за это время).
+
+    Формат - collapsed stacks для flamegraph.pl, speedscope, inferno. Только для роли ROOT.
+    Профиль одного запроса - заголовок X-Profile в самом запросе. Он тоже семплирует весь event loop,
+    поэтому включает запросы воркера, выполнявшиеся одновременно (их число - в заголовке X-Profile-Concurrent).
+    """
+
+    sampler = StackSampler(settings.PROFILER_INTERVAL)
+    try:
+        sampler.start()
+    except ProfilerBusyError as err:
+        raise HTTPException(status_code=HTTPStatus.CONFLICT, detail=str(err))
+
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profile = sampler.stop()
+    return PlainTextResponse(profile, headers={"X-Profile-Samples": str(sampler.samples)})
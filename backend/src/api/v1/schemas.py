@@ -4,14 +4,25 @@ from uuid import UUID
 from pydantic import Field
 from pydantic.generics import GenericModel
 
+from core.constants import TOTAL_RELATION_EQ
 from core.core_model import CoreModel
 
 ModelT = TypeVar("ModelT")
 
 
+class GenreFacet(CoreModel):
+    """Amount of films in genre"""
+
+    uuid: UUID = Field(title="genre id")
+    count: int = Field(title="amount of films")
+
+
 class ManyResponse(GenericModel, Generic[ModelT]):
     total: int = Field(..., title="Amount rows in source")
     result: list[ModelT]
+    next_cursor: str | None = Field(None, title="Cursor for next page")
+    total_relation: str = Field(TOTAL_RELATION_EQ, title="eq - total is exact, gte - total is a lower bound")
+    facets: list[GenreFacet] | None = Field(None, title="Amount of films by genre (if requested)")
 
     @classmethod
     def __concrete_name__(cls: type[Any], params: tuple[type[Any], ...]) -> str:
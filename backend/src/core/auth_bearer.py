@@ -1,11 +1,15 @@
+import hashlib
 import logging
+import time
 from http import HTTPStatus
 
 import jwt
-from fastapi import HTTPException, Request
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from core.config import settings
+from core.constants import JWT_CACHE_SIZE, ROOT_ROLE
+from core.memory_cache import MemoryCache
 from models.token import AccessTokenPayload
 
 logger = logging.getLogger(__name__)
@@ -13,6 +17,9 @@ logger = logging.getLogger(__name__)
 JWT_SECRET = settings.JWT_SECRET_KEY
 JWT_ALGORITHM = "HS256"
 
+# проверенные токены: ключ - хэш токена, запись живет до exp токена
+verified_tokens = MemoryCache(JWT_CACHE_SIZE, expire=0)
+
 
 class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
@@ -26,12 +33,36 @@ class JWTBearer(HTTPBearer):
             raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail="Invalid authentication scheme.")
 
         try:
-            decoded_token = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+            return decode_access_token(credentials.credentials)
         except jwt.PyJWTError:
             raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail="Invalid token or expired token.")
 
-        logger.debug(f'jwt-token payload: {decoded_token}')
-        return AccessTokenPayload(**decoded_token)
+
+def decode_access_token(token: str) -> AccessTokenPayload:
+    """
+    Проверить подпись и срок действия токена. Ошибки - jwt.PyJWTError.
+    Повторный запрос с тем же токеном не проверяет подпись и не разбирает payload заново
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    if (token_payload := verified_tokens.get(key)) is not None:
+        return token_payload
+
+    decoded_token = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    logger.debug(f"jwt-token payload: {decoded_token}")
+    token_payload = AccessTokenPayload(**decoded_token)
+    verified_tokens.put(key, token_payload, expire=token_payload.exp - time.time())
+    return token_payload
 
 
 jwt_bearer = JWTBearer()
+
+
+def is_root(token_payload: AccessTokenPayload) -> bool:
+    return ROOT_ROLE in token_payload.roles
+
+
+async def root_bearer(token_payload: AccessTokenPayload = Depends(jwt_bearer)) -> AccessTokenPayload:
+    """Только для администраторов (роль ROOT)"""
+    if not is_root(token_payload):
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail="Admin role required.")
+    return token_payload
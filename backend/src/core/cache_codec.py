@@ -0,0 +1,61 @@
+"""
+Сжатие значений в кэш-сервисе.
+
+Сжатое значение начинается с байта-заголовка формата. JSON не может начинаться
+с байтов 0x01 / 0x02, поэтому несжатые значения (в том числе записанные до сжатия
+и маркер "не найдено") хранятся как есть и читаются без изменений.
+lz4 - необязательная зависимость: если пакет не установлен, вместо него используется zlib
+"""
+import enum
+import logging
+import zlib
+
+try:
+    import lz4.frame
+except ImportError:  # pragma: no cover
+    lz4 = None
+
+logger = logging.getLogger(__name__)
+
+ZLIB_HEADER = b"\x01"
+LZ4_HEADER = b"\x02"
+# zlib быстрее всего на уровне 1, а выигрыш в размере на JSON при больших уровнях небольшой
+ZLIB_LEVEL = 1
+
+
+class CacheCodec(str, enum.Enum):
+    NONE = "none"
+    ZLIB = "zlib"
+    LZ4 = "lz4"
+
+
+class CacheDecodeError(Exception):
+    """Значение в кэше не удалось распаковать"""
+
+
+def encode(value: str | bytes, codec: CacheCodec, min_size: int) -> str | bytes:
+    """Сжать значение, если оно не меньше min_size байт и сжатие уменьшает размер"""
+    if codec == CacheCodec.NONE or len(value) < min_size:
+        return value
+    data = value.encode() if isinstance(value, str) else value
+    if codec == CacheCodec.LZ4 and lz4 is not None:
+        packed = LZ4_HEADER + lz4.frame.compress(data)
+    else:
+        packed = ZLIB_HEADER + zlib.compress(data, ZLIB_LEVEL)
+    return packed if len(packed) < len(data) else value
+
+
+def decode(value: str | bytes | None) -> str | bytes | None:
+    if not isinstance(value, bytes):
+        return value
+    header = value[:1]
+    try:
+        if header == ZLIB_HEADER:
+            return zlib.decompress(value[1:])
+        if header == LZ4_HEADER:
+            if lz4 is None:
+                raise CacheDecodeError("lz4 is not installed")
+            return lz4.frame.decompress(value[1:])
+    except (zlib.error, RuntimeError) as err:
+        raise CacheDecodeError(str(err)) from err
+    return value
@@ -1,6 +1,10 @@
 import logging
 from abc import abstractmethod
 
+from core.cache_codec import CacheCodec, CacheDecodeError, decode, encode
+from core.config import settings
+from core.memory_cache import get_cache_stats
+from core.metrics import REDIS_ERRORS, REDIS_LATENCY, timed
 from core.singletone import Singleton
 from redis.asyncio import Redis, RedisError
 
@@ -8,14 +12,46 @@ logger = logging.getLogger(__name__)
 
 
 class BaseCacheService(metaclass=Singleton):
-    """Абстрактный класс для службы кэша"""
+    """
+    Абстрактный класс для службы кэша.
+    service - имя сервиса (BaseService.NAME), ошибки кэша считаются в его CacheStats
+    """
 
     @abstractmethod
-    async def get(self, key: str) -> str | None:
+    async def get(self, key: str, service: str | None = None) -> str | bytes | None:
         pass
 
     @abstractmethod
-    async def put(self, key: str, value: str, expire: int = 0) -> None:
+    async def put(
+        self,
+        key: str,
+        value: str | bytes,
+        expire: int = 0,
+        codec: CacheCodec = CacheCodec.NONE,
+        service: str | None = None,
+    ) -> None:
+        pass
+
+    @abstractmethod
+    async def get_many(self, keys: list[str], service: str | None = None) -> list[str | bytes | None]:
+        pass
+
+    @abstractmethod
+    async def put_many(
+        self,
+        items: dict[str, str | bytes],
+        expire: int = 0,
+        codec: CacheCodec = CacheCodec.NONE,
+        service: str | None = None,
+    ) -> None:
+        pass
+
+    @abstractmethod
+    async def lock(self, key: str, expire: float, service: str | None = None) -> bool:
+        """True if lock acquired"""
+
+    @abstractmethod
+    async def unlock(self, key: str, service: str | None = None) -> None:
         pass
 
     @abstractmethod
@@ -24,26 +60,100 @@ class BaseCacheService(metaclass=Singleton):
 
 
 class RedisCacheService(BaseCacheService):
+    """Значения сжимаются кодеком codec из put (см. core.cache_codec), при чтении распаковываются по заголовку"""
+
     redis: Redis
 
     def __init__(self, redis: Redis):
         self.redis = redis
+        self.compress_min_size = settings.CACHE_COMPRESS_MIN_SIZE
         logger.debug("create redis_cache")
 
-    async def get(self, key: str) -> str | None:
+    @staticmethod
+    def decode(key: str, data: str | bytes | None) -> str | bytes | None:
+        try:
+            return decode(data)
+        except CacheDecodeError as err:
+            # нераспаковываемое значение - как промах кэша, запрос пойдет в базу
+            logger.error(f"Error decode cache value, key: {key}: {err}")
+            return None
+
+    @staticmethod
+    def count_error(method: str, service: str | None) -> None:
+        REDIS_ERRORS.inc(method)
+        if service is not None:
+            get_cache_stats(service).cache_errors += 1
+
+    @timed(REDIS_LATENCY)
+    async def get(self, key: str, service: str | None = None) -> str | bytes | None:
         try:
             data = await self.redis.get(key)
         except RedisError as err:
+            self.count_error("get", service)
             logger.error(f"Error get from cache: {err}")
             data = None
-        return data
+        return self.decode(key, data)
 
-    async def put(self, key: str, value: str, expire: int = 0) -> None:
+    @timed(REDIS_LATENCY)
+    async def put(
+        self,
+        key: str,
+        value: str | bytes,
+        expire: int = 0,
+        codec: CacheCodec = CacheCodec.NONE,
+        service: str | None = None,
+    ) -> None:
         try:
-            await self.redis.set(key, value, ex=expire)
+            await self.redis.set(key, encode(value, codec, self.compress_min_size), ex=expire)
         except RedisError as err:
+            self.count_error("put", service)
             logger.error(f"Error put to cache: {err}")
 
+    @timed(REDIS_LATENCY)
+    async def get_many(self, keys: list[str], service: str | None = None) -> list[str | bytes | None]:
+        try:
+            data = await self.redis.mget(keys)
+        except RedisError as err:
+            self.count_error("get_many", service)
+            logger.error(f"Error get many from cache: {err}")
+            data = [None] * len(keys)
+        return [self.decode(key, value) for key, value in zip(keys, data)]
+
+    @timed(REDIS_LATENCY)
+    async def put_many(
+        self,
+        items: dict[str, str | bytes],
+        expire: int = 0,
+        codec: CacheCodec = CacheCodec.NONE,
+        service: str | None = None,
+    ) -> None:
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, encode(value, codec, self.compress_min_size), ex=expire)
+                await pipe.execute()
+        except RedisError as err:
+            self.count_error("put_many", service)
+            logger.error(f"Error put many to cache: {err}")
+
+    @timed(REDIS_LATENCY)
+    async def lock(self, key: str, expire: float, service: str | None = None) -> bool:
+        try:
+            return bool(await self.redis.set(f"lock:{key}", 1, px=int(expire * 1000), nx=True))
+        except RedisError as err:
+            self.count_error("lock", service)
+            logger.error(f"Error lock in cache: {err}")
+            # без кэша блокировка не нужна, идем в базу
+            return True
+
+    @timed(REDIS_LATENCY)
+    async def unlock(self, key: str, service: str | None = None) -> None:
+        try:
+            await self.redis.delete(f"lock:{key}")
+        except RedisError as err:
+            self.count_error("unlock", service)
+            logger.error(f"Error unlock in cache: {err}")
+
     async def ping(self):
         try:
             await self.redis.ping()
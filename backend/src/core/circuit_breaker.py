@@ -0,0 +1,130 @@
+import enum
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from core.exceptions import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, enum.Enum):
+    CLOSED = "closed"  # запросы идут в базу
+    OPEN = "open"  # запросы сразу отклоняются
+    HALF_OPEN = "half_open"  # пропускаем несколько пробных запросов
+
+
+@dataclass
+class CircuitStats:
+    """Счетчики переходов состояния и отклоненных запросов для одного предохранителя"""
+
+    state: CircuitState = CircuitState.CLOSED
+    opened: int = 0
+    half_opened: int = 0
+    closed: int = 0
+    rejected: int = 0  # запросы, отклоненные без обращения к базе
+
+
+# статистика предохранителей по имени (индексу ES)
+circuit_stats: dict[str, CircuitStats] = {}
+
+
+def get_circuit_stats(name: str) -> CircuitStats:
+    return circuit_stats.setdefault(name, CircuitStats())
+
+
+class CircuitBreaker:
+    """
+    Предохранитель перед базой. По последним window_size запросам считает долю ошибок
+    и медленных запросов; при превышении порога размыкается на open_timeout секунд,
+    затем пропускает half_open_max_calls пробных запросов: все успешны и быстры - замыкается,
+    любая ошибка или медленный ответ - снова размыкается
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window_size: int,
+        min_calls: int,
+        failure_rate: float,
+        slow_call_duration: float,
+        slow_call_rate: float,
+        open_timeout: float,
+        half_open_max_calls: int,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.open_timeout = open_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.stats = get_circuit_stats(name)
+        self.stats.state = CircuitState.CLOSED
+        # (ошибка, медленный) для последних запросов
+        self._calls: deque[tuple[bool, bool]] = deque(maxlen=window_size)
+        self._state_since = 0.0
+        self._probes = 0  # пробные запросы в полуоткрытом состоянии
+        self._probe_successes = 0
+
+    @property
+    def state(self) -> CircuitState:
+        return self.stats.state
+
+    def before_call(self) -> None:
+        """Проверить, можно ли идти в базу. Иначе CircuitOpenError"""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self._state_since < self.open_timeout:
+                self._reject()
+            self._transition(CircuitState.HALF_OPEN)
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                if time.monotonic() - self._state_since < self.open_timeout:
+                    self._reject()
+                # пробные запросы не вернулись (отменены) - новая попытка
+                self._probes = self._probe_successes = 0
+                self._state_since = time.monotonic()
+            self._probes += 1
+
+    def record(self, duration: float, failed: bool) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            # медленная проба - тоже неудача, иначе разомкнутый по медленным запросам предохранитель замкнется
+            if failed or duration >= self.slow_call_duration:
+                self._transition(CircuitState.OPEN)
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_max_calls:
+                self._transition(CircuitState.CLOSED)
+            return
+
+        if self.state == CircuitState.OPEN:
+            # ответ на запрос, начатый до размыкания
+            return
+
+        self._calls.append((failed, duration >= self.slow_call_duration))
+        if len(self._calls) < self.min_calls:
+            return
+        failures = sum(failed for failed, _ in self._calls)
+        slow = sum(slow for _, slow in self._calls)
+        if failures >= self.failure_rate * len(self._calls) or slow >= self.slow_call_rate * len(self._calls):
+            self._transition(CircuitState.OPEN)
+
+    def _reject(self) -> None:
+        self.stats.rejected += 1
+        raise CircuitOpenError(f"Circuit breaker {self.name} is open")
+
+    def _transition(self, state: CircuitState) -> None:
+        logger.warning(f"circuit breaker {self.name}: {self.state.value} -> {state.value}")
+        self.stats.state = state
+        self._state_since = time.monotonic()
+        self._calls.clear()
+        self._probes = self._probe_successes = 0
+        if state == CircuitState.OPEN:
+            self.stats.opened += 1
+        elif state == CircuitState.HALF_OPEN:
+            self.stats.half_opened += 1
+        else:
+            self.stats.closed += 1
@@ -2,6 +2,8 @@ from pathlib import Path
 
 from pydantic import BaseSettings, Field
 
+from core.cache_codec import CacheCodec
+
 BASE_DIR = Path(__file__).parent.parent
 ENV_FILE = BASE_DIR.parent / ".env.local"
 VAR_DIR = BASE_DIR / "var/"
@@ -15,6 +17,42 @@ class Settings(BaseSettings):
     REDIS_URI: str = Field(..., env="REDIS_BACKEND_DSN")
     ES_URI: str = Field(..., env="ELK_MOVIES_DSN")
     DATABASE_WAIT_TIME: float = 1.0
+    # point in time для согласованного обхода курсором
+    ES_CURSOR_USE_PIT: bool = Field(False, env="BACKEND_ES_CURSOR_USE_PIT")
+    ES_PIT_KEEP_ALIVE: str = "1m"
+    # пакетная отправка запросов search через _msearch: окно сбора (сек) и размер пачки
+    ES_MSEARCH_ENABLED: bool = Field(False, env="BACKEND_ES_MSEARCH_ENABLED")
+    ES_MSEARCH_WINDOW: float = Field(0.005, env="BACKEND_ES_MSEARCH_WINDOW")
+    ES_MSEARCH_MAX_BATCH: int = Field(50, env="BACKEND_ES_MSEARCH_MAX_BATCH")
+    # прогрев кэша популярных фильмов (первые WARMUP_PAGES страниц каждого жанра) при старте и после цикла ETL
+    WARMUP_ENABLED: bool = Field(True, env="BACKEND_WARMUP_ENABLED")
+    WARMUP_PAGES: int = Field(3, env="BACKEND_WARMUP_PAGES")
+    WARMUP_CONCURRENCY: int = Field(4, env="BACKEND_WARMUP_CONCURRENCY")
+    WARMUP_ETL_POLL_INTERVAL: float = Field(30, env="BACKEND_WARMUP_ETL_POLL_INTERVAL")
+    # предохранитель (circuit breaker) перед ES, отдельный для каждого индекса:
+    # размыкается, если среди последних запросов много ошибок или медленных запросов
+    ES_CIRCUIT_BREAKER_ENABLED: bool = Field(True, env="BACKEND_ES_CIRCUIT_BREAKER_ENABLED")
+    ES_CIRCUIT_WINDOW_SIZE: int = 50
+    ES_CIRCUIT_MIN_CALLS: int = 20
+    ES_CIRCUIT_FAILURE_RATE: float = 0.5
+    ES_CIRCUIT_SLOW_CALL_DURATION: float = Field(2.0, env="BACKEND_ES_CIRCUIT_SLOW_CALL_DURATION")
+    ES_CIRCUIT_SLOW_CALL_RATE: float = 0.8
+    ES_CIRCUIT_OPEN_TIMEOUT: float = Field(10, env="BACKEND_ES_CIRCUIT_OPEN_TIMEOUT")
+    ES_CIRCUIT_HALF_OPEN_CALLS: int = 3
+    # поколения индексов в ключах кэша: ETL увеличивает поколение после загрузки, backend опрашивает их
+    CACHE_GENERATIONS_ENABLED: bool = Field(True, env="BACKEND_CACHE_GENERATIONS_ENABLED")
+    CACHE_GENERATIONS_POLL_INTERVAL: float = Field(5, env="BACKEND_CACHE_GENERATIONS_POLL_INTERVAL")
+    # сжатие значений в кэш-сервисе: кодек по умолчанию (сервис может задать свой) и минимальный размер значения
+    CACHE_CODEC: CacheCodec = Field(CacheCodec.ZLIB, env="BACKEND_CACHE_CODEC")
+    CACHE_COMPRESS_MIN_SIZE: int = Field(1024, env="BACKEND_CACHE_COMPRESS_MIN_SIZE")
+    # каталог жанров в памяти процесса
+    GENRE_CATALOG_ENABLED: bool = Field(True, env="BACKEND_GENRE_CATALOG_ENABLED")
+    GENRE_CATALOG_REFRESH_INTERVAL: float = Field(60, env="BACKEND_GENRE_CATALOG_REFRESH_INTERVAL")
+    # как часто измерять задержку event loop (метрика event_loop_lag_seconds)
+    EVENT_LOOP_LAG_INTERVAL: float = 0.5
+    # профилировщик (заголовок X-Profile и /api/v1/profiler), только для роли ROOT
+    PROFILER_ENABLED: bool = Field(False, env="BACKEND_PROFILER_ENABLED")
+    PROFILER_INTERVAL: float = 0.005
     JWT_SECRET_KEY: str = Field(..., env="BACKEND_JWT_KEY")
     JAEGER_HOST_NAME: str = Field(..., env="JAEGER_HOST_NAME")
     JAEGER_PORT: int = Field(..., env="JAEGER_PORT")
@@ -2,16 +2,77 @@ KEY_PAGE_SIZE = "page[size]"
 KEY_PAGE_NUM = "page[number]"
 KEY_QUERY = "query"
 KEY_ID = "ID"
+KEY_BATCH_ID = "id"
 KEY_FILTER_GENRE = "filter[genre]"
 KEY_SORT = "sort"
+KEY_PAGE_CURSOR = "page[cursor]"
+# проекция: поля ответа через запятую
+KEY_FIELDS = "fields"
+# число фильмов по жанрам в ответе поиска
+KEY_FACETS = "facets"
+
+# значение курсора для первой страницы
+CURSOR_START = "*"
 
 MAX_PAGE_SIZE = 200
 DEFAULT_PAGE_SIZE = 50
+MAX_BATCH_SIZE = 50
+# размер пачки документов при выгрузке каталога (NDJSON)
+EXPORT_BATCH_SIZE = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# последняя строка выгрузки, оборванной ошибкой базы после начала ответа
+EXPORT_INTERRUPTED = "Export interrupted, data is incomplete"
 DEFAULT_CACHE_EXPIRE_IN_SECONDS = 60 * 5
+# время жизни записей с поколениями индексов в ключе: после загрузки ETL ключи меняются сами
+VERSIONED_CACHE_EXPIRE_IN_SECONDS = 60 * 60
+DEFAULT_CACHE_STALE_IN_SECONDS = 60
+DEFAULT_LOCAL_CACHE_SIZE = 1000
+DEFAULT_LOCAL_CACHE_EXPIRE_IN_SECONDS = 10
+DEFAULT_CACHE_LOCK_EXPIRE_IN_SECONDS = 3
+DEFAULT_NEGATIVE_CACHE_EXPIRE_IN_SECONDS = 30
+DEFAULT_STALE_IF_ERROR_IN_SECONDS = 60 * 10
+# подсказки при наборе (suggest): размер списка, длина строки, кэш в памяти процесса для горячих префиксов
+SUGGEST_DEFAULT_SIZE = 10
+SUGGEST_MAX_SIZE = 20
+SUGGEST_MAX_LENGTH = 100
+SUGGEST_CACHE_SIZE = 10_000
+SUGGEST_CACHE_EXPIRE_IN_SECONDS = 60
+# до скольких совпадений считать total точно в режиме приблизительного total
+DEFAULT_TOTAL_HITS_THRESHOLD = 1000
+TOTAL_RELATION_EQ = "eq"  # total точный
+TOTAL_RELATION_GTE = "gte"  # total - нижняя граница
+# значение в кэш-сервисе для результата "не найдено"
+NEGATIVE_CACHE_VALUE = b"null"
+CACHE_LOCK_POLL_INTERVAL = 0.05
+GENRE_CATALOG_MAX_SIZE = 1000
+# каталог жанров загружается из базы страницами по столько жанров
+GENRE_CATALOG_PAGE_SIZE = 1000
+# не чаще, чем раз в столько секунд, обновлять каталог жанров при запросе неизвестного жанра
+GENRE_CATALOG_MIN_REFRESH_INTERVAL = 5
+# прогрев кэша популярных фильмов: порядки сортировки и блокировка, чтобы прогревал один воркер
+WARMUP_SORT_ORDERS = ("-imdb_rating", "+imdb_rating")
+WARMUP_LOCK_KEY = "warmup"
 
 ES_PAGINATION_LIMIT = 10_000
 ES_MOVIES_INDEX = "movies"
+# имя агрегации числа фильмов по жанрам (facets)
+ES_FACETS_AGG = "genre_facets"
 ES_GENRES_INDEX = "genres"
 ES_PERSONS_INDEX = "persons"
+# похожие фильмы, которые считает ETL
+ES_SIMILAR_FILMS_INDEX = "similar_films"
+# статус ETL: документ о последнем завершенном цикле
+ES_ETL_STATUS_INDEX = "etl_status"
+ETL_CYCLE_DOC_ID = "cycle"
+# документы поколений индексов: generation:<индекс>
+ETL_GENERATION_DOC_PREFIX = "generation:"
+# индексы, поколения которых входят в ключи кэша
+CACHE_GENERATIONS_INDICES = (ES_MOVIES_INDEX, ES_PERSONS_INDEX, ES_GENRES_INDEX, ES_SIMILAR_FILMS_INDEX)
 
 ROOT_ROLE = "ROOT"
+# сколько проверенных JWT держать в памяти процесса
+JWT_CACHE_SIZE = 10_000
+
+# заголовок запроса: профилировать этот запрос и вернуть профиль вместо ответа
+PROFILE_HEADER = "X-Profile"
+PROFILER_MAX_SECONDS = 60
@@ -1,14 +1,44 @@
 import logging
+import time
 from abc import abstractmethod
-from typing import TypeVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Generic, TypeVar
 from uuid import UUID
 
-from elasticsearch import AsyncElasticsearch, ConnectionError, NotFoundError
-
-from core.constants import ES_GENRES_INDEX, ES_MOVIES_INDEX, ES_PERSONS_INDEX
-from core.exceptions import DatabaseConnectionError
+from elasticsearch import ApiError, AsyncElasticsearch, ConnectionError, ConnectionTimeout, NotFoundError
+
+from core.circuit_breaker import CircuitBreaker
+from core.config import settings
+from core.constants import (
+    ES_ETL_STATUS_INDEX,
+    ES_FACETS_AGG,
+    ES_GENRES_INDEX,
+    ES_MOVIES_INDEX,
+    ES_PERSONS_INDEX,
+    ES_SIMILAR_FILMS_INDEX,
+    ETL_CYCLE_DOC_ID,
+    ETL_GENERATION_DOC_PREFIX,
+    GENRE_CATALOG_MAX_SIZE,
+    TOTAL_RELATION_EQ,
+)
+from core.exceptions import DatabaseConnectionError, InvalidCursorError
+from core.metrics import ES_LATENCY, timed
+from core.msearch import MultiSearchDispatcher
 from core.singletone import Singleton
-from models.dto_models import ExtendedFilm, ExtendedPerson, Genre, IdModel, ImdbFilm
+from core.utils import PageCursor
+from models.dto_models import (
+    ETLCycle,
+    ExtendedFilm,
+    ExtendedPerson,
+    Film,
+    Genre,
+    GenreFacet,
+    IdModel,
+    ImdbFilm,
+    Person,
+    SimilarFilms,
+)
+from models.projection import partial_model, source_includes
 
 ModelT = TypeVar("ModelT", bound=IdModel)
 
@@ -16,27 +46,74 @@ ModelT = TypeVar("ModelT", bound=IdModel)
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class DocsPage(Generic[ModelT]):
+    """Страница документов из базы"""
+
+    total: int
+    result: list[ModelT]
+    # значения сортировки последнего документа и point in time для следующей страницы
+    last_sort: list | None = None
+    pit_id: str | None = None
+    # gte - total не точный, а нижняя граница (см. track_total_hits)
+    total_relation: str = TOTAL_RELATION_EQ
+    # число документов по жанрам (агрегация, см. ESDatabaseService._apply_facets)
+    facets: list[GenreFacet] | None = None
+
+
 class BaseDatabaseService(metaclass=Singleton):
     """Абстрактный класс для базы данных"""
 
     @abstractmethod
     async def films_all(
-        self, sort_by: str, page_size: int, page_number: int, genre_id: UUID | None = None
-    ) -> tuple[int, list[ImdbFilm]]:
+        self,
+        sort_by: str,
+        page_size: int,
+        page_number: int,
+        genre_id: UUID | None = None,
+        cursor: PageCursor | None = None,
+        track_total_hits: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        facets: bool = False,
+    ) -> DocsPage[ImdbFilm]:
         pass
 
     @abstractmethod
     async def films_search(
-        self, search_for: str, page_size: int, page_number: int, genre_id: UUID | None = None
-    ) -> tuple[int, list[ImdbFilm]]:
+        self,
+        search_for: str,
+        page_size: int,
+        page_number: int,
+        genre_id: UUID | None = None,
+        cursor: PageCursor | None = None,
+        track_total_hits: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        facets: bool = False,
+    ) -> DocsPage[ImdbFilm]:
+        pass
+
+    @abstractmethod
+    async def films_suggest(self, prefix: str, size: int) -> DocsPage[Film]:
+        """Фильмы, название которых начинается со слов prefix (последнее слово - префикс)"""
+
+    @abstractmethod
+    async def film_by_id(self, id_: UUID, fields: tuple[str, ...] | None = None) -> ExtendedFilm | None:
+        pass
+
+    @abstractmethod
+    async def films_by_ids(self, ids: list[UUID]) -> list[ExtendedFilm]:
         pass
 
     @abstractmethod
-    async def film_by_id(self, id_: UUID) -> ExtendedFilm | None:
+    async def imdb_films_by_ids(self, ids: list[UUID]) -> list[ImdbFilm]:
         pass
 
     @abstractmethod
-    async def genres_all(self, page_size: int, page_number: int) -> tuple[int, list[Genre]]:
+    async def similar_film_ids(self, id_: UUID) -> list[UUID] | None:
+        """Ранжированный список похожих фильмов, None - если список не посчитан"""
+
+    @abstractmethod
+    async def genres_all(self, page_size: int, page_number: int) -> DocsPage[Genre]:
         pass
 
     @abstractmethod
@@ -45,18 +122,45 @@ class BaseDatabaseService(metaclass=Singleton):
 
     @abstractmethod
     async def persons_search(
-        self, search_for: str, page_size: int, page_number: int
-    ) -> tuple[int, list[ExtendedPerson]]:
+        self, search_for: str, page_size: int, page_number: int, track_total_hits: int | None = None
+    ) -> DocsPage[ExtendedPerson]:
         pass
 
+    @abstractmethod
+    async def persons_suggest(self, prefix: str, size: int) -> DocsPage[Person]:
+        """Персоны, имя которых начинается со слов prefix (последнее слово - префикс)"""
+
     @abstractmethod
     async def person_by_id(self, id_: UUID) -> ExtendedPerson | None:
         pass
 
     @abstractmethod
-    async def person_films(self, id_: UUID, page_size: int, page_number: int) -> tuple[int, list[ImdbFilm]]:
+    async def person_films(
+        self,
+        id_: UUID,
+        page_size: int,
+        page_number: int,
+        cursor: PageCursor | None = None,
+        track_total_hits: int | None = None,
+    ) -> DocsPage[ImdbFilm]:
         pass
 
+    @abstractmethod
+    async def etl_cycle(self) -> ETLCycle | None:
+        """Последний завершенный цикл ETL, None - ETL еще не сообщал о циклах"""
+
+    @abstractmethod
+    async def index_generations(self, indices: tuple[str, ...]) -> dict[str, int]:
+        """Поколения индексов (ETL увеличивает поколение после каждой загрузки), нет в ответе - ETL не сообщал"""
+
+    @abstractmethod
+    def films_export(self, genre_id: UUID | None = None, batch_size: int = 1000) -> AsyncIterator[list[ExtendedFilm]]:
+        """Все фильмы (с фильтром по жанру) пачками по batch_size"""
+
+    @abstractmethod
+    def persons_export(self, batch_size: int = 1000) -> AsyncIterator[list[ExtendedPerson]]:
+        """Все персоны пачками по batch_size"""
+
     @abstractmethod
     async def ping(self) -> bool:
         """True if available"""
@@ -67,43 +171,248 @@ class ESDatabaseService(BaseDatabaseService):
 
     def __init__(self, elastic: AsyncElasticsearch):
         self.elastic = elastic
+        # объединение одновременных запросов search в один _msearch
+        self.msearch: MultiSearchDispatcher | None = None
+        if settings.ES_MSEARCH_ENABLED:
+            self.msearch = MultiSearchDispatcher(elastic, settings.ES_MSEARCH_WINDOW, settings.ES_MSEARCH_MAX_BATCH)
+        # предохранители по индексам
+        self.breakers: dict[str, CircuitBreaker] = {}
         logger.debug("create elasticsearch")
 
+    @timed(ES_LATENCY)
     async def ping(self) -> bool:
         """True if available"""
         return await self.elastic.ping()
 
-    async def _process_many_docs_query(self, model: type[ModelT], es_query_params: dict) -> tuple[int, list[ModelT]]:
+    def _breaker(self, index: str) -> CircuitBreaker:
+        if (breaker := self.breakers.get(index)) is None:
+            breaker = self.breakers[index] = CircuitBreaker(
+                index,
+                window_size=settings.ES_CIRCUIT_WINDOW_SIZE,
+                min_calls=settings.ES_CIRCUIT_MIN_CALLS,
+                failure_rate=settings.ES_CIRCUIT_FAILURE_RATE,
+                slow_call_duration=settings.ES_CIRCUIT_SLOW_CALL_DURATION,
+                slow_call_rate=settings.ES_CIRCUIT_SLOW_CALL_RATE,
+                open_timeout=settings.ES_CIRCUIT_OPEN_TIMEOUT,
+                half_open_max_calls=settings.ES_CIRCUIT_HALF_OPEN_CALLS,
+            )
+        return breaker
+
+    async def _request(self, index: str, request: Callable[..., Awaitable[Any]], /, **params) -> Any:
+        """
+        Запрос к ES через предохранитель индекса. Пока предохранитель разомкнут,
+        запрос сразу завершается CircuitOpenError, не дожидаясь таймаута
+        """
+        if not settings.ES_CIRCUIT_BREAKER_ENABLED:
+            try:
+                return await request(**params)
+            except (ConnectionError, ConnectionTimeout) as err:
+                raise DatabaseConnectionError("Cannot connect to elasticsearch") from err
+
+        breaker = self._breaker(index)
+        breaker.before_call()
+        start = time.monotonic()
         try:
-            response = await self.elastic.search(**es_query_params)
-        except ConnectionError as err:
+            response = await request(**params)
+        except (ConnectionError, ConnectionTimeout) as err:
+            breaker.record(time.monotonic() - start, failed=True)
             raise DatabaseConnectionError("Cannot connect to elasticsearch") from err
-
+        except ApiError as err:
+            # 404 и ошибки запроса - не сбой базы
+            breaker.record(time.monotonic() - start, failed=err.meta.status >= 500)
+            raise
+        breaker.record(time.monotonic() - start, failed=False)
+        return response
+
+    async def _process_many_docs_query(self, model: type[ModelT], es_query_params: dict) -> DocsPage[ModelT]:
+        if "pit" in es_query_params:
+            # в запросе с point in time индекс не указывается
+            index = es_query_params.pop("index")
+        else:
+            index = es_query_params["index"]
+        try:
+            if self.msearch is not None and "pit" not in es_query_params:
+                response = await self._request(index, self.msearch.search, **es_query_params)
+            else:
+                response = await self._request(index, self.elastic.search, **es_query_params)
+        except NotFoundError as err:
+            if "pit" in es_query_params:
+                raise InvalidCursorError("Point in time is expired") from err
+            raise
+
+        hits = response["hits"]["hits"]
         total = response["hits"]["total"]["value"]
-        result = [model(uuid=doc["_id"], **doc["_source"]) for doc in response["hits"]["hits"]]
-        return total, result
+        total_relation = response["hits"]["total"].get("relation", TOTAL_RELATION_EQ)
+        result = [model(uuid=doc["_id"], **doc["_source"]) for doc in hits]
+        last_sort = hits[-1].get("sort") if hits else None
+        facets = self._parse_facets(response)
+
+        pit_id = response.get("pit_id")
+        if pit_id and len(hits) < es_query_params["size"]:
+            # последняя страница, point in time больше не нужен
+            await self._close_pit(pit_id)
+            pit_id = None
+
+        return DocsPage(
+            total=total,
+            result=result,
+            last_sort=last_sort,
+            pit_id=pit_id,
+            total_relation=total_relation,
+            facets=facets,
+        )
+
+    @staticmethod
+    def _apply_facets(es_query_params: dict, genre_id: UUID | None) -> None:
+        """
+        Число фильмов по жанрам в том же запросе: агрегация terms по genres.id,
+        reverse_nested - чтобы считать фильмы, а не вложенные документы жанров.
+        Фильтр по жанру переносится в post_filter: он отсекает страницу, но не агрегацию,
+        и счетчики жанров - те же, что у поиска с фильтром по каждому жанру
+        """
+        es_query_params["aggs"] = {
+            ES_FACETS_AGG: {
+                "nested": {"path": "genres"},
+                "aggs": {
+                    "ids": {
+                        "terms": {"field": "genres.id", "size": GENRE_CATALOG_MAX_SIZE},
+                        "aggs": {"films": {"reverse_nested": {}}},
+                    }
+                },
+            }
+        }
+        if genre_id is not None:
+            es_query_params["post_filter"] = es_query_params["query"]["bool"].pop("filter")
+
+    @staticmethod
+    def _parse_facets(response: dict) -> list[GenreFacet] | None:
+        if (aggregation := response.get("aggregations", {}).get(ES_FACETS_AGG)) is None:
+            return None
+        return [
+            GenreFacet(uuid=bucket["key"], count=bucket["films"]["doc_count"])
+            for bucket in aggregation["ids"]["buckets"]
+        ]
+
+    @staticmethod
+    def _apply_track_total_hits(es_query_params: dict, track_total_hits: int | None) -> None:
+        """Считать совпадения только до порога, но не меньше конца запрошенной страницы"""
+        if track_total_hits is None:
+            return
+        page_end = es_query_params.get("from_", es_query_params.get("from", 0)) + es_query_params["size"]
+        es_query_params["track_total_hits"] = max(track_total_hits, page_end)
+
+    async def _apply_cursor(self, es_query_params: dict, cursor: PageCursor | None) -> None:
+        """Заменяет пагинацию from/size на search_after и point in time (если включен)"""
+        if cursor is None:
+            return
+
+        es_query_params.pop("from_", None)
+        es_query_params.pop("from", None)
+        if cursor.search_after:
+            es_query_params["search_after"] = cursor.search_after
+
+        pit_id = cursor.pit_id
+        if pit_id is None and cursor.search_after is None and settings.ES_CURSOR_USE_PIT:
+            pit_id = await self._open_pit(es_query_params["index"])
+
+        if pit_id:
+            es_query_params["pit"] = {"id": pit_id, "keep_alive": settings.ES_PIT_KEEP_ALIVE}
+
+    async def _open_pit(self, index: str) -> str:
+        response = await self._request(
+            index, self.elastic.open_point_in_time, index=index, keep_alive=settings.ES_PIT_KEEP_ALIVE
+        )
+        return response["id"]
+
+    async def _close_pit(self, pit_id: str) -> None:
+        try:
+            await self.elastic.close_point_in_time(id=pit_id)
+        except (ConnectionError, NotFoundError) as err:
+            logger.debug(f"Cannot close point in time: {err}")
+
+    async def _scan_docs(
+        self, model: type[ModelT], index: str, query: dict, batch_size: int
+    ) -> AsyncIterator[list[ModelT]]:
+        """
+        Обход всех документов запроса пачками: point in time + search_after, без ограничения глубины
+        пагинации. В памяти держится только текущая пачка
+        """
+        pit_id = await self._open_pit(index)
+        search_after = None
+        try:
+            while True:
+                es = {
+                    "size": batch_size,
+                    "query": query,
+                    # _shard_doc - самый дешевый однозначный порядок внутри point in time
+                    "sort": [{"_shard_doc": "asc"}],
+                    "track_total_hits": False,
+                    "pit": {"id": pit_id, "keep_alive": settings.ES_PIT_KEEP_ALIVE},
+                }
+                if search_after is not None:
+                    es["search_after"] = search_after
+                try:
+                    response = await self._request(index, self.elastic.search, **es)
+                except NotFoundError as err:
+                    raise InvalidCursorError("Point in time is expired") from err
+
+                pit_id = response.get("pit_id", pit_id)
+                hits = response["hits"]["hits"]
+                if hits:
+                    yield [model(uuid=doc["_id"], **doc["_source"]) for doc in hits]
+                if len(hits) < batch_size:
+                    return
+                search_after = hits[-1]["sort"]
+        finally:
+            await self._close_pit(pit_id)
+
+    @staticmethod
+    def _films_query(genre_id: UUID | None) -> dict:
+        query = {"bool": {"must": {"match_all": {}}}}
+        if genre_id is not None:
+            filter_genre = {"filter": {"nested": {"path": "genres", "query": {"term": {"genres.id": str(genre_id)}}}}}
+            query["bool"].update(filter_genre)
+        return query
+
+    @staticmethod
+    def _projection(model: type[ModelT], es_query_params: dict, fields: tuple[str, ...] | None) -> type[ModelT]:
+        """Запросить из базы только поля fields. Возвращает модель для разбора ответа"""
+        if not fields:
+            return model
+        es_query_params["source_includes"] = source_includes(fields)
+        return partial_model(model, fields)
 
     async def _process_single_doc_query(self, model: type[ModelT], es_query_params: dict) -> ModelT | None:
         try:
-            response = await self.elastic.get(**es_query_params)
+            response = await self._request(es_query_params["index"], self.elastic.get, **es_query_params)
             logger.debug("RESPONSE SOURCE %s", response["_source"])
         except NotFoundError:
             return None
-        except ConnectionError as err:
-            raise DatabaseConnectionError(f"Cannot connect to elasticsearch {self.elastic}") from err
 
         return model(uuid=response["_id"], **response["_source"])
 
+    async def _process_ids_query(self, model: type[ModelT], es_query_params: dict) -> list[ModelT]:
+        response = await self._request(es_query_params["index"], self.elastic.mget, **es_query_params)
+
+        return [model(uuid=doc["_id"], **doc["_source"]) for doc in response["docs"] if doc.get("found")]
+
+    @timed(ES_LATENCY)
     async def films_all(
-        self, sort_by: str, page_size: int, page_number: int, genre_id: UUID | None = None
-    ) -> tuple[int, list[ImdbFilm]]:
-        query = {"bool": {"must": {"match_all": {}}}}
-        if genre_id is not None:
-            filter_genre = {"filter": {"nested": {"path": "genres", "query": {"term": {"genres.id": str(genre_id)}}}}}
-            query["bool"].update(filter_genre)
+        self,
+        sort_by: str,
+        page_size: int,
+        page_number: int,
+        genre_id: UUID | None = None,
+        cursor: PageCursor | None = None,
+        track_total_hits: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        facets: bool = False,
+    ) -> DocsPage[ImdbFilm]:
+        query = self._films_query(genre_id)
 
         sort_order = "asc" if sort_by[0] == "+" else "desc"
-        sort = [{sort_by[1:]: {"order": sort_order}}]
+        # id - для однозначного порядка при пагинации курсором
+        sort = [{sort_by[1:]: {"order": sort_order}}, {"id": {"order": "asc"}}]
 
         es = {
             "index": ES_MOVIES_INDEX,
@@ -113,12 +422,25 @@ class ESDatabaseService(BaseDatabaseService):
             "query": query,
             "sort": sort,
         }
+        self._apply_track_total_hits(es, track_total_hits)
+        if facets:
+            self._apply_facets(es, genre_id)
+        await self._apply_cursor(es, cursor)
 
-        return await self._process_many_docs_query(ImdbFilm, es)
+        return await self._process_many_docs_query(self._projection(ImdbFilm, es, fields), es)
 
+    @timed(ES_LATENCY)
     async def films_search(
-        self, search_for: str, page_size: int, page_number: int, genre_id: UUID | None = None
-    ) -> tuple[int, list[ImdbFilm]] | None:
+        self,
+        search_for: str,
+        page_size: int,
+        page_number: int,
+        genre_id: UUID | None = None,
+        cursor: PageCursor | None = None,
+        track_total_hits: int | None = None,
+        fields: tuple[str, ...] | None = None,
+        facets: bool = False,
+    ) -> DocsPage[ImdbFilm]:
         query = {
             "bool": {
                 "must": {
@@ -140,17 +462,66 @@ class ESDatabaseService(BaseDatabaseService):
             "size": page_size,
             "source_includes": ["imdb_rating", "title"],
             "query": query,
+            # id - для однозначного порядка при пагинации курсором
+            "sort": [{"_score": {"order": "desc"}}, {"id": {"order": "asc"}}],
         }
-        return await self._process_many_docs_query(ImdbFilm, es)
+        self._apply_track_total_hits(es, track_total_hits)
+        if facets:
+            self._apply_facets(es, genre_id)
+        await self._apply_cursor(es, cursor)
+
+        return await self._process_many_docs_query(self._projection(ImdbFilm, es, fields), es)
 
-    async def film_by_id(self, id_: UUID) -> ExtendedFilm | None:
+    @timed(ES_LATENCY)
+    async def films_suggest(self, prefix: str, size: int) -> DocsPage[Film]:
         es = {
             "index": ES_MOVIES_INDEX,
+            "size": size,
+            "source_includes": ["title"],
+            "query": self._suggest_query(prefix, "title_suggest"),
+            "sort": [{"_score": {"order": "desc"}}, {"imdb_rating": {"order": "desc"}}],
+            # total подсказкам не нужен
+            "track_total_hits": size,
+        }
+        return await self._process_many_docs_query(Film, es)
+
+    @timed(ES_LATENCY)
+    async def film_by_id(self, id_: UUID, fields: tuple[str, ...] | None = None) -> ExtendedFilm | None:
+        es = {
+            "index": ES_MOVIES_INDEX,
+            "id": str(id_),
+        }
+        return await self._process_single_doc_query(self._projection(ExtendedFilm, es, fields), es)
+
+    @timed(ES_LATENCY)
+    async def films_by_ids(self, ids: list[UUID]) -> list[ExtendedFilm]:
+        es = {
+            "index": ES_MOVIES_INDEX,
+            "ids": [str(id_) for id_ in ids],
+        }
+        return await self._process_ids_query(ExtendedFilm, es)
+
+    @timed(ES_LATENCY)
+    async def imdb_films_by_ids(self, ids: list[UUID]) -> list[ImdbFilm]:
+        es = {
+            "index": ES_MOVIES_INDEX,
+            "ids": [str(id_) for id_ in ids],
+            "source_includes": ["imdb_rating", "title"],
+        }
+        return await self._process_ids_query(ImdbFilm, es)
+
+    @timed(ES_LATENCY)
+    async def similar_film_ids(self, id_: UUID) -> list[UUID] | None:
+        es = {
+            "index": ES_SIMILAR_FILMS_INDEX,
             "id": str(id_),
         }
-        return await self._process_single_doc_query(ExtendedFilm, es)
+        if (doc := await self._process_single_doc_query(SimilarFilms, es)) is None:
+            return None
+        return doc.similar
 
-    async def genres_all(self, page_size: int, page_number: int) -> tuple[int, list[Genre]]:
+    @timed(ES_LATENCY)
+    async def genres_all(self, page_size: int, page_number: int) -> DocsPage[Genre]:
         es = {
             "index": ES_GENRES_INDEX,
             "from": (page_number - 1) * page_size,
@@ -159,6 +530,7 @@ class ESDatabaseService(BaseDatabaseService):
         }
         return await self._process_many_docs_query(Genre, es)
 
+    @timed(ES_LATENCY)
     async def genre_by_id(self, id_: UUID) -> Genre | None:
         es = {
             "index": ES_GENRES_INDEX,
@@ -166,17 +538,45 @@ class ESDatabaseService(BaseDatabaseService):
         }
         return await self._process_single_doc_query(Genre, es)
 
+    @timed(ES_LATENCY)
     async def persons_search(
-        self, search_for: str, page_size: int, page_number: int
-    ) -> tuple[int, list[ExtendedPerson]]:
+        self, search_for: str, page_size: int, page_number: int, track_total_hits: int | None = None
+    ) -> DocsPage[ExtendedPerson]:
         es = {
             "index": ES_PERSONS_INDEX,
             "from": (page_number - 1) * page_size,
             "size": page_size,
             "query": {"match": {"full_name": {"query": search_for, "fuzziness": "AUTO"}}},
         }
+        self._apply_track_total_hits(es, track_total_hits)
         return await self._process_many_docs_query(ExtendedPerson, es)
 
+    @timed(ES_LATENCY)
+    async def persons_suggest(self, prefix: str, size: int) -> DocsPage[Person]:
+        es = {
+            "index": ES_PERSONS_INDEX,
+            "size": size,
+            "source_includes": ["full_name"],
+            "query": self._suggest_query(prefix, "full_name_suggest"),
+            "track_total_hits": size,
+        }
+        return await self._process_many_docs_query(Person, es)
+
+    @staticmethod
+    def _suggest_query(prefix: str, field: str) -> dict:
+        """
+        Поиск по полю search_as_you_type: все слова, кроме последнего, - целиком, последнее - как префикс.
+        Без нечеткого поиска и подсчета total - в разы дешевле полнотекстового поиска
+        """
+        return {
+            "multi_match": {
+                "query": prefix,
+                "type": "bool_prefix",
+                "fields": [field, f"{field}._2gram", f"{field}._3gram"],
+            }
+        }
+
+    @timed(ES_LATENCY)
     async def person_by_id(self, id_: UUID) -> ExtendedPerson | None:
         es = {
             "index": ES_PERSONS_INDEX,
@@ -184,35 +584,53 @@ class ESDatabaseService(BaseDatabaseService):
         }
         return await self._process_single_doc_query(ExtendedPerson, es)
 
-    async def person_films(self, id_: UUID, page_size: int, page_number: int) -> tuple[int, list[ImdbFilm]]:
+    @timed(ES_LATENCY)
+    async def person_films(
+        self,
+        id_: UUID,
+        page_size: int,
+        page_number: int,
+        cursor: PageCursor | None = None,
+        track_total_hits: int | None = None,
+    ) -> DocsPage[ImdbFilm]:
         es = {
             "index": ES_MOVIES_INDEX,
             "from": (page_number - 1) * page_size,
             "size": page_size,
-            "sort": [{"imdb_rating": {"order": "desc"}}],
-            "query": {
-                "bool": {
-                    "should": [
-                        {
-                            "nested": {
-                                "path": "actors",
-                                "query": {"bool": {"filter": {"term": {"actors.id": str(id_)}}}},
-                            }
-                        },
-                        {
-                            "nested": {
-                                "path": "directors",
-                                "query": {"bool": {"filter": {"term": {"directors.id": str(id_)}}}},
-                            }
-                        },
-                        {
-                            "nested": {
-                                "path": "writers",
-                                "query": {"bool": {"filter": {"term": {"writers.id": str(id_)}}}},
-                            }
-                        },
-                    ]
-                }
-            },
+            "sort": [{"imdb_rating": {"order": "desc"}}, {"id": {"order": "asc"}}],
+            # плоское поле с id всех персон фильма (заполняет ETL): фильтр без nested, ES кэширует его
+            "query": {"bool": {"filter": {"term": {"persons_ids": str(id_)}}}},
         }
+        self._apply_track_total_hits(es, track_total_hits)
+        await self._apply_cursor(es, cursor)
+
         return await self._process_many_docs_query(ImdbFilm, es)
+
+    def films_export(self, genre_id: UUID | None = None, batch_size: int = 1000) -> AsyncIterator[list[ExtendedFilm]]:
+        # тот же фильтр по жанру, что и в films_all
+        return self._scan_docs(ExtendedFilm, ES_MOVIES_INDEX, self._films_query(genre_id), batch_size)
+
+    def persons_export(self, batch_size: int = 1000) -> AsyncIterator[list[ExtendedPerson]]:
+        return self._scan_docs(ExtendedPerson, ES_PERSONS_INDEX, {"match_all": {}}, batch_size)
+
+    @timed(ES_LATENCY)
+    async def etl_cycle(self) -> ETLCycle | None:
+        try:
+            response = await self._request(
+                ES_ETL_STATUS_INDEX, self.elastic.get, index=ES_ETL_STATUS_INDEX, id=ETL_CYCLE_DOC_ID
+            )
+        except NotFoundError:
+            # нет документа или индекса - ETL старой версии
+            return None
+        return ETLCycle(**response["_source"])
+
+    @timed(ES_LATENCY)
+    async def index_generations(self, indices: tuple[str, ...]) -> dict[str, int]:
+        ids = [f"{ETL_GENERATION_DOC_PREFIX}{index}" for index in indices]
+        try:
+            response = await self._request(ES_ETL_STATUS_INDEX, self.elastic.mget, index=ES_ETL_STATUS_INDEX, ids=ids)
+        except NotFoundError:
+            return {}
+        return {
+            index: doc["_source"]["generation"] for index, doc in zip(indices, response["docs"]) if doc.get("found")
+        }
@@ -1,2 +1,14 @@
 class DatabaseConnectionError(Exception):
     pass
+
+
+class CircuitOpenError(DatabaseConnectionError):
+    """Запрос отклонен предохранителем без обращения к базе"""
+
+
+class InvalidCursorError(Exception):
+    pass
+
+
+class ProfilerBusyError(Exception):
+    """В воркере уже идет профилирование"""
@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass
+class CacheStats:
+    """Счетчики попаданий/промахов кэша для одного сервиса"""
+
+    local_hits: int = 0  # попадания в кэш в памяти процесса
+    local_misses: int = 0
+    cache_hits: int = 0  # попадания в кэш-сервис (redis)
+    cache_misses: int = 0
+    cache_errors: int = 0  # ошибки кэш-сервиса: запрос считается промахом или запись пропускается
+    negative_hits: int = 0  # попадания в закэшированный результат "не найдено"
+    # запросы с новым вариантом написания ключа, которые попали в уже известный канонический ключ
+    absorbed_keys: int = 0
+    stale_hits: int = 0  # устаревшие данные, отданные при недоступной базе
+
+
+# статистика кэша по имени сервиса (BaseService.NAME)
+cache_stats: dict[str, CacheStats] = {}
+# сколько сырых ключей поглотил каждый канонический ключ (BaseService.get_key_variants_count) по имени сервиса
+key_variant_counts: dict[str, Callable[[], dict[str, int]]] = {}
+
+
+def get_cache_stats(name: str) -> CacheStats:
+    return cache_stats.setdefault(name, CacheStats())
+
+
+class MemoryCache:
+    """
+    Кэш в памяти процесса с ограниченным размером,
+    вытеснением LRU и временем жизни для каждой записи.
+    Устаревшая запись еще stale секунд доступна через get_stale
+    """
+
+    def __init__(self, max_size: int, expire: float, stale: float = 0):
+        self.max_size = max_size
+        self.expire = expire
+        self.stale = stale
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expire_at, value = item
+        if expire_at < time.monotonic():
+            if expire_at + self.stale < time.monotonic():
+                del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def get_stale(self, key: str) -> Any | None:
+        """Значение, даже если оно устарело (но не дольше stale секунд)"""
+        item = self._data.get(key)
+        if item is None or item[0] + self.stale < time.monotonic():
+            return None
+        return item[1]
+
+    def put(self, key: str, value: Any, expire: float | None = None) -> None:
+        if self.max_size <= 0:
+            return
+
+        expire_at = time.monotonic() + (self.expire if expire is None else expire)
+        self._data[key] = (expire_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def items(self) -> list[tuple[str, Any]]:
+        """Неустаревшие записи, порядок LRU не меняется"""
+        now = time.monotonic()
+        return [(key, value) for key, (expire_at, value) in self._data.items() if expire_at >= now]
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
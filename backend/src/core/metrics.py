@@ -0,0 +1,229 @@
+"""
+Метрики в формате Prometheus без внешних зависимостей.
+
+Все обновления идут из одного потока event loop, поэтому счетчики - обычные числа
+без блокировок. Дочерние метрики (набор значений меток) создаются один раз
+и кэшируются, на горячем пути только поиск в словаре и сложение
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+
+from core.circuit_breaker import circuit_stats
+from core.memory_cache import cache_stats, key_variant_counts
+
+FuncT = TypeVar("FuncT", bound=Callable[..., Awaitable[Any]])
+
+# границы корзин гистограмм задержки, секунды
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class HistogramChild:
+    """Гистограмма для одного набора значений меток"""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # последний элемент - корзина +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._children: dict[tuple[str, ...], HistogramChild] = {}
+
+    def labels(self, *labels: str) -> HistogramChild:
+        if (child := self._children.get(labels)) is None:
+            child = self._children[labels] = HistogramChild(self.buckets)
+        return child
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, child in self._children.items():
+            total = 0
+            for bound, count in zip((*self.buckets, "+Inf"), child.counts):
+                total += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {child.sum}"
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+ES_LATENCY = Histogram("es_request_duration_seconds", "Elasticsearch latency by database service method", ("method",))
+REDIS_LATENCY = Histogram("redis_request_duration_seconds", "Redis latency by cache service method", ("method",))
+REDIS_ERRORS = Counter("redis_errors_total", "Redis errors by cache service method", ("method",))
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "Delay of event loop wakeups", buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+)
+
+METRICS = (REQUEST_LATENCY, ES_LATENCY, REDIS_LATENCY, REDIS_ERRORS, EVENT_LOOP_LAG)
+
+
+def timed(histogram: Histogram) -> Callable[[FuncT], FuncT]:
+    """Декоратор корутины: время выполнения в histogram с меткой - именем функции"""
+
+    def decorator(func: FuncT) -> FuncT:
+        child = histogram.labels(func.__name__)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """ASGI middleware: задержка HTTP запросов по шаблону пути (route), а не по самому пути"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # route появляется в scope после маршрутизации, для неизвестных путей - пусто
+            route = getattr(scope.get("route"), "path", "")
+            REQUEST_LATENCY.labels(scope["method"], route, status).observe(time.perf_counter() - start)
+
+
+class EventLoopLagMonitor:
+    """Задержка event loop: насколько позже запланированного просыпается sleep(interval)"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def run(self) -> None:
+        lag = EVENT_LOOP_LAG.labels()
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag.observe(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+
+def collect_cache_stats() -> Iterator[str]:
+    """Счетчики кэша по сервисам (BaseService.NAME) - берутся из CacheStats в момент сбора"""
+    for field in (
+        "local_hits",
+        "local_misses",
+        "cache_hits",
+        "cache_misses",
+        "cache_errors",
+        "negative_hits",
+        "stale_hits",
+        "absorbed_keys",
+    ):
+        name = f"cache_{field.removeprefix('cache_')}_total"
+        yield f"# TYPE {name} counter"
+        for service, stats in cache_stats.items():
+            yield f'{name}{{service="{service}"}} {getattr(stats, field)}'
+
+
+def collect_key_variants() -> Iterator[str]:
+    """
+    Нормализация ключей кэша (BaseService.NORMALIZED_FIELDS): сколько канонических ключей и сколько
+    сырых ключей (вариантов написания) они поглотили, и наибольшее число вариантов у одного ключа.
+    Разница raw и canonical - столько записей кэша и запросов к базе сэкономила нормализация
+    """
+    counts = {service: get_counts() for service, get_counts in key_variant_counts.items()}
+    for name, aggregate in (("canonical", len), ("raw", sum), ("max_variants", max)):
+        yield f"# TYPE cache_keys_{name} gauge"
+        for service, variants in counts.items():
+            yield f'cache_keys_{name}{{service="{service}"}} {aggregate(variants.values()) if variants else 0}'
+
+
+def collect_circuit_stats() -> Iterator[str]:
+    yield "# TYPE circuit_breaker_state gauge"
+    for name, stats in circuit_stats.items():
+        for state in ("closed", "open", "half_open"):
+            yield f'circuit_breaker_state{{index="{name}",state="{state}"}} {int(stats.state.value == state)}'
+    yield "# TYPE circuit_breaker_transitions_total counter"
+    for name, stats in circuit_stats.items():
+        for state, count in (("open", stats.opened), ("half_open", stats.half_opened), ("closed", stats.closed)):
+            yield f'circuit_breaker_transitions_total{{index="{name}",to="{state}"}} {count}'
+    yield "# TYPE circuit_breaker_rejected_total counter"
+    for name, stats in circuit_stats.items():
+        yield f'circuit_breaker_rejected_total{{index="{name}"}} {stats.rejected}'
+
+
+def render_metrics() -> str:
+    """Все метрики в текстовом формате Prometheus"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.collect())
+    lines.extend(collect_cache_stats())
+    lines.extend(collect_key_variants())
+    lines.extend(collect_circuit_stats())
+    return "\n".join(lines) + "\n"
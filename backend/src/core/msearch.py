@@ -0,0 +1,115 @@
+import asyncio
+import logging
+
+from elastic_transport import ApiResponseMeta
+from elasticsearch import ApiError, AsyncElasticsearch
+from elasticsearch.exceptions import HTTP_EXCEPTIONS
+
+logger = logging.getLogger(__name__)
+
+# параметры search, которые в _msearch передаются в заголовке, а не в теле запроса
+HEADER_PARAMS = ("index", "routing", "preference", "search_type", "request_cache")
+
+
+def split_search_params(es_query_params: dict) -> tuple[dict, dict]:
+    """Разбивает параметры AsyncElasticsearch.search на заголовок и тело для _msearch"""
+    header, body = {}, {}
+    for key, value in es_query_params.items():
+        if key in HEADER_PARAMS:
+            header[key] = value
+        elif key == "from_":
+            body["from"] = value
+        elif key == "source_includes":
+            body["_source"] = {"includes": value}
+        else:
+            body[key] = value
+    return header, body
+
+
+class MultiSearchDispatcher:
+    """
+    Собирает запросы search, пришедшие в течение короткого окна (или пока
+    их не наберется max_batch), и отправляет одним запросом _msearch.
+    Каждый вызывающий получает только свой ответ.
+    """
+
+    def __init__(self, elastic: AsyncElasticsearch, window: float, max_batch: int):
+        self.elastic = elastic
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: list[tuple[dict, dict, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # ссылки на отправляемые пачки, чтобы задачи не собрал сборщик мусора
+        self._sending: set[asyncio.Task] = set()
+
+    async def search(self, **es_query_params) -> dict:
+        loop = asyncio.get_running_loop()
+        header, body = split_search_params(es_query_params)
+        future = loop.create_future()
+        self._pending.append((header, body, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._send(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: list[tuple[dict, dict, asyncio.Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                # одиночный запрос нет смысла заворачивать в _msearch
+                header, body, _ = batch[0]
+                responses = [await self.elastic.search(**header, **body)]
+            else:
+                searches = []
+                for header, body, _ in batch:
+                    searches.extend((header, body))
+                response = await self.elastic.msearch(searches=searches)
+                logger.debug("msearch batch of %s searches", len(batch))
+                responses = [self._item_result(item, response.meta) for item in response["responses"]]
+        except Exception as err:  # noqa: B902
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        for (*_, future), result in zip(batch, responses):
+            if future.done():
+                # вызывающий уже отменил ожидание
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _item_result(item: dict, meta: ApiResponseMeta) -> dict | ApiError:
+        """Ответ одного запроса из _msearch или исключение, как его выбросил бы search"""
+        if "error" not in item:
+            return item
+
+        status = item.get("status", 500)
+        item_meta = ApiResponseMeta(
+            status=status,
+            http_version=meta.http_version,
+            headers=meta.headers,
+            duration=meta.duration,
+            node=meta.node,
+        )
+        error = item["error"]
+        message = error.get("type", "") if isinstance(error, dict) else str(error)
+        return HTTP_EXCEPTIONS.get(status, ApiError)(message=message, meta=item_meta, body=item)
@@ -0,0 +1,149 @@
+"""
+Семплирующий профилировщик для одного воркера.
+
+Отдельный поток раз в interval снимает стек потока event loop (sys._current_frames)
+и считает одинаковые стеки. Результат - collapsed stacks ("f1;f2;f3 count" в строке),
+формат flamegraph.pl / speedscope / inferno.
+Пока профилирование не запущено, ничего не выполняется
+"""
+import sys
+import threading
+from collections import Counter
+from http import HTTPStatus
+from types import FrameType
+
+import jwt
+from fastapi.responses import PlainTextResponse
+
+from core.auth_bearer import decode_access_token, is_root
+from core.constants import PROFILE_HEADER
+from core.exceptions import ProfilerBusyError
+
+PROFILE_HEADER_KEY = PROFILE_HEADER.lower().encode()
+
+
+def frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{code.co_firstlineno}"
+
+
+def collapse_stack(frame: FrameType | None) -> str:
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Семплирование стека одного потока (по умолчанию - текущего, то есть потока event loop)"""
+
+    # в воркере одновременно работает только один профилировщик
+    _active: "StackSampler | None" = None
+
+    def __init__(self, interval: float, thread_id: int | None = None):
+        self.interval = interval
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def start(self) -> None:
+        if StackSampler._active is not None:
+            raise ProfilerBusyError("Profiler is already running")
+        StackSampler._active = self
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Остановить семплирование, вернуть collapsed stacks"""
+        self._stop.set()
+        self._thread.join()
+        StackSampler._active = None
+        return self.render()
+
+    def render(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if (frame := sys._current_frames().get(self.thread_id)) is not None:
+                self.stacks[collapse_stack(frame)] += 1
+            # ссылка на кадр не должна жить дольше итерации
+            del frame
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware: запрос с заголовком X-Profile и токеном администратора выполняется
+    под профилировщиком, вместо ответа возвращается профиль (статус ответа - в X-Profiled-Status).
+    Профилировщик снимает стек всего event loop, поэтому в профиль попадают и другие запросы
+    воркера, выполнявшиеся в это время. Их число - в X-Profile-Concurrent: профиль чистый, только если там 0.
+    Добавляется в приложение, только если профилировщик включен в настройках
+    """
+
+    def __init__(self, app, interval: float):
+        self.app = app
+        self.interval = interval
+        # запросы воркера: выполняются сейчас и начатые всего
+        self.in_flight = 0
+        self.started = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not any(name == PROFILE_HEADER_KEY for name, _ in scope["headers"]):
+            self.in_flight += 1
+            self.started += 1
+            try:
+                return await self.app(scope, receive, send)
+            finally:
+                self.in_flight -= 1
+
+        if error := self.check_access(scope):
+            return await error(scope, receive, send)
+
+        sampler = StackSampler(self.interval)
+        try:
+            sampler.start()
+        except ProfilerBusyError as err:
+            return await PlainTextResponse(str(err), status_code=HTTPStatus.CONFLICT)(scope, receive, send)
+
+        status = HTTPStatus.INTERNAL_SERVER_ERROR.value
+        # другие запросы, попавшие в профиль: уже выполнялись и начались во время профилирования
+        concurrent = self.in_flight - self.started
+
+        async def send_profiled(message):
+            # ответ приложения не отправляем, только запоминаем статус
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            profile = sampler.stop()
+        concurrent += self.started
+
+        headers = {
+            "X-Profiled-Status": str(status),
+            "X-Profile-Samples": str(sampler.samples),
+            "X-Profile-Concurrent": str(concurrent),
+        }
+        await PlainTextResponse(profile, headers=headers)(scope, receive, send)
+
+    @staticmethod
+    def check_access(scope) -> PlainTextResponse | None:
+        """Ответ с ошибкой, если у запроса нет токена администратора"""
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode()
+        scheme, _, token = authorization.partition(" ")
+        if scheme != "Bearer" or not token:
+            return PlainTextResponse("Invalid authorization code.", status_code=HTTPStatus.UNAUTHORIZED)
+        try:
+            token_payload = decode_access_token(token)
+        except jwt.PyJWTError:
+            return PlainTextResponse("Invalid token or expired token.", status_code=HTTPStatus.UNAUTHORIZED)
+        if not is_root(token_payload):
+            return PlainTextResponse("Admin role required.", status_code=HTTPStatus.FORBIDDEN)
+        return None
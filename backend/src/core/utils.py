@@ -1,5 +1,9 @@
+import base64
+import binascii
 import hashlib
 import logging
+import unicodedata
+from typing import NamedTuple
 
 import orjson
 from opentelemetry import trace
@@ -9,7 +13,15 @@ from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
 
 from core.config import settings
-from core.constants import DEFAULT_PAGE_SIZE, ES_PAGINATION_LIMIT, KEY_PAGE_NUM, KEY_PAGE_SIZE, MAX_PAGE_SIZE, ROOT_ROLE
+from core.constants import (
+    CURSOR_START,
+    DEFAULT_PAGE_SIZE,
+    ES_PAGINATION_LIMIT,
+    KEY_PAGE_NUM,
+    KEY_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    ROOT_ROLE,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +46,30 @@ def validate_pagination(page_number: int, page_size: int) -> str | None:
     return None
 
 
+class PageCursor(NamedTuple):
+    """Курсор для постраничного обхода через search_after"""
+
+    search_after: list | None = None
+    pit_id: str | None = None
+
+
+def encode_cursor(cursor: PageCursor) -> str:
+    """return opaque string for cursor"""
+    data = orjson.dumps({"s": cursor.search_after, "p": cursor.pit_id})
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor: str) -> PageCursor:
+    """return cursor from opaque string, raise ValueError if cursor is invalid"""
+    if cursor == CURSOR_START:
+        return PageCursor()
+    try:
+        data = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return PageCursor(search_after=list(data["s"]), pit_id=data.get("p"))
+    except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, AttributeError) as err:
+        raise ValueError(f"Invalid cursor: {cursor}") from err
+
+
 def hash_dict(pretty_key: str, key_dict: dict):
     """return hash for dict with pretty key at first
     for example:
@@ -46,6 +82,11 @@ def hash_dict(pretty_key: str, key_dict: dict):
         return f"{hashlib.sha1(s_key).hexdigest()}"
 
 
+def normalize_text(value: str) -> str:
+    """Unicode NFKC, без учета регистра, пробелы схлопнуты: STAR  Wars -> star wars"""
+    return " ".join(unicodedata.normalize("NFKC", value).casefold().split())
+
+
 def restrict_pages(query_dict: dict | None) -> dict:
     """создает пагинауию если ее нет и ограничивает до MAX_PAGE_SIZE на странице"""
     if not query_dict:
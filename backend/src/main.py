@@ -8,11 +8,15 @@ from fastapi.responses import ORJSONResponse
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 
 import redis.asyncio as aioredis
-from api.v1 import films, genres, persons, ping, view
+from api.v1 import films, genres, metrics, persons, ping, profiler, view
 from core.config import settings
 from core.logger import LOGGING
+from core.metrics import EventLoopLagMonitor, MetricsMiddleware
+from core.profiler import ProfilerMiddleware
 from core.utils import configure_tracer
 from db import elastic, redis_
+from services import cache_generations, genre_catalog
+from services.warmup import CacheWarmer
 
 tags_metadata = [
     {"name": "Фильмы", "description": "Запросы по фильмам"},
@@ -44,6 +48,12 @@ app = FastAPI(
     default_response_class=ORJSONResponse,
     dependencies=deps,
 )
+app.add_middleware(MetricsMiddleware)
+if settings.PROFILER_ENABLED:
+    # профилировщик снаружи остальных middleware, чтобы в профиль попало все
+    app.add_middleware(ProfilerMiddleware, interval=settings.PROFILER_INTERVAL)
+event_loop_lag_monitor = EventLoopLagMonitor(settings.EVENT_LOOP_LAG_INTERVAL)
+cache_warmer: CacheWarmer | None = None
 
 
 @app.on_event("startup")
@@ -51,6 +61,24 @@ async def startup():
     logger.info("service start")
     redis_.redis = await aioredis.from_url(settings.REDIS_URI)
     elastic.es = AsyncElasticsearch(hosts=[settings.ES_URI])
+    event_loop_lag_monitor.start()
+    await cache_generations.start_cache_generations(await elastic.get_es_database_service())
+    if settings.GENRE_CATALOG_ENABLED:
+        genre_catalog.genre_catalog = genre_catalog.GenreCatalog(
+            await elastic.get_es_database_service(), settings.GENRE_CATALOG_REFRESH_INTERVAL
+        )
+        await genre_catalog.genre_catalog.start()
+    if settings.WARMUP_ENABLED:
+        global cache_warmer
+        cache_warmer = CacheWarmer(
+            await redis_.get_redis(),
+            await elastic.get_es_database_service(),
+            films.films_response,
+            settings.WARMUP_PAGES,
+            settings.WARMUP_CONCURRENCY,
+            settings.WARMUP_ETL_POLL_INTERVAL,
+        )
+        cache_warmer.start()
     if settings.ENABLE_TRACER:
         configure_tracer()
         FastAPIInstrumentor.instrument_app(app)
@@ -58,6 +86,12 @@ async def startup():
 
 @app.on_event("shutdown")
 async def shutdown():
+    event_loop_lag_monitor.stop()
+    if cache_warmer is not None:
+        cache_warmer.stop()
+    if genre_catalog.genre_catalog is not None:
+        await genre_catalog.genre_catalog.stop()
+    await cache_generations.stop_cache_generations()
     # Отключаемся от баз при выключении сервера
     await redis_.redis.close()
     await elastic.es.close()
@@ -69,6 +103,9 @@ app.include_router(films.router, prefix="/api/v1/films", tags=["Фильмы"])
 app.include_router(persons.router, prefix="/api/v1/persons", tags=["Персоны"])
 app.include_router(genres.router, prefix="/api/v1/genres", tags=["Жанры"])
 app.include_router(view.router, prefix="/api/v1/view", tags=["Просмотр"])
+app.include_router(metrics.router, prefix="/metrics", tags=["Метрики"])
+if settings.PROFILER_ENABLED:
+    app.include_router(profiler.router, prefix="/api/v1/profiler", tags=["Профилировщик"])
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -13,6 +13,12 @@ class Genre(IdModel):
     name: str
 
 
+class GenreFacet(IdModel):
+    """Сколько фильмов из выдачи в жанре id"""
+
+    count: int
+
+
 class Film(IdModel):
     title: str
 
@@ -21,6 +27,10 @@ class ImdbFilm(Film):
     imdb_rating: float
 
 
+class SimilarFilms(IdModel):
+    similar: list[UUID]
+
+
 class RoleMovies(CoreModel):
     role: str
     movies: list[Film]
@@ -44,3 +54,8 @@ class ExtendedFilm(Film):
     writers: list[Person]
     directors: list[Person]
     marks: list[str] = Field(..., alias="mark")
+
+
+class ETLCycle(CoreModel):
+    cycle: int
+    loaded: int = 0
@@ -0,0 +1,28 @@
+from functools import lru_cache
+from typing import Optional, TypeVar
+
+from pydantic import BaseModel, Field, create_model
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# поле-идентификатор, которое есть в любой проекции
+PROJECTION_ID_FIELD = "uuid"
+
+
+@lru_cache(maxsize=None)
+def partial_model(model: type[ModelT], fields: tuple[str, ...]) -> type[ModelT]:
+    """
+    Модель с частью полей model (проекция по параметру fields):
+    поля не из fields необязательные и по умолчанию None
+    """
+    overrides = {
+        name: (Optional[field.outer_type_], Field(None, alias=field.alias))
+        for name, field in model.__fields__.items()
+        if name not in fields
+    }
+    return create_model(f"Partial{model.__name__}", __base__=model, __module__=model.__module__, **overrides)
+
+
+def source_includes(fields: tuple[str, ...]) -> list[str]:
+    """Поля документа в базе для проекции. id документа приходит всегда"""
+    return [name for name in fields if name != PROJECTION_ID_FIELD] or ["id"]
@@ -2,6 +2,9 @@ from typing import Any, Generic, TypeVar
 
 from pydantic.generics import BaseModel, GenericModel
 
+from core.constants import TOTAL_RELATION_EQ
+from models.dto_models import GenreFacet
+
 ModelT = TypeVar("ModelT")
 
 
@@ -12,6 +15,7 @@ class ServiceResult(BaseModel):
     page_num: int = 0
     page_size: int = 0
     cached: int = 0  # данные из кэша или нет
+    fresh_until: float = 0  # timestamp, до которого данные в кэше считаются свежими
 
 
 class ServiceSingeResult(ServiceResult, GenericModel, Generic[ModelT]):
@@ -24,6 +28,9 @@ class ServiceSingeResult(ServiceResult, GenericModel, Generic[ModelT]):
 
 class ServiceListResult(ServiceResult, GenericModel, Generic[ModelT]):
     result: list[ModelT]
+    next_cursor: str | None = None  # курсор следующей страницы
+    total_relation: str = TOTAL_RELATION_EQ  # gte - total приблизительный (нижняя граница)
+    facets: list[GenreFacet] | None = None  # число фильмов по жанрам, если запрошено
 
     @classmethod
     def __concrete_name__(cls: type[Any], params: tuple[type[Any], ...]) -> str:
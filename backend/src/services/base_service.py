@@ -1,22 +1,83 @@
+import asyncio
+import inspect
 import logging
+import time
 from http import HTTPStatus
-from typing import Type
+from typing import Awaitable, Callable, NamedTuple, Type
 
-from fastapi import Depends, HTTPException
+import orjson
+from fastapi import Depends, HTTPException, Response
+from pydantic import BaseModel
 
+from core.cache_codec import CacheCodec
 from core.cache_service import BaseCacheService
-from core.constants import DEFAULT_CACHE_EXPIRE_IN_SECONDS
-from core.database_service import BaseDatabaseService
-from core.exceptions import DatabaseConnectionError
+from core.config import settings
+from core.constants import (
+    CACHE_LOCK_POLL_INTERVAL,
+    DEFAULT_CACHE_EXPIRE_IN_SECONDS,
+    DEFAULT_CACHE_LOCK_EXPIRE_IN_SECONDS,
+    DEFAULT_CACHE_STALE_IN_SECONDS,
+    DEFAULT_LOCAL_CACHE_EXPIRE_IN_SECONDS,
+    DEFAULT_LOCAL_CACHE_SIZE,
+    DEFAULT_NEGATIVE_CACHE_EXPIRE_IN_SECONDS,
+    DEFAULT_STALE_IF_ERROR_IN_SECONDS,
+    DEFAULT_TOTAL_HITS_THRESHOLD,
+    KEY_FIELDS,
+    NEGATIVE_CACHE_VALUE,
+    VERSIONED_CACHE_EXPIRE_IN_SECONDS,
+)
+from core.database_service import BaseDatabaseService, DocsPage
+from core.exceptions import DatabaseConnectionError, InvalidCursorError
+from core.memory_cache import MemoryCache, get_cache_stats, key_variant_counts
 from core.singletone import Singleton
-from core.utils import classproperty, hash_dict
+from core.utils import PageCursor, classproperty, decode_cursor, encode_cursor, hash_dict, normalize_text
 from db.elastic import get_es_database_service
 from db.redis_ import get_redis
+from models.projection import partial_model
 from models.service_result import ServiceListResult, ServiceSingeResult
+from services.cache_generations import get_cache_generations
 
 logger = logging.getLogger(__name__)
 
 MaybeResult = ServiceSingeResult | ServiceListResult | None
+RenderFunc = Callable[[ServiceSingeResult | ServiceListResult], BaseModel]
+
+
+class CachedResponse(NamedTuple):
+    """Тело ответа API из кэша и время, до которого оно считается свежим (для STALE_WHILE_REVALIDATE)"""
+
+    body: bytes
+    fresh_until: float = 0
+
+
+class NotFound:
+    """Закэшированный результат 'не найдено'"""
+
+    def __bool__(self):
+        return False
+
+
+NOT_FOUND = NotFound()
+
+
+def service_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        detail="Service is unavailable. Please try a few minutes later.",
+    )
+
+
+def mark_cached(result: ServiceSingeResult | ServiceListResult) -> ServiceSingeResult | ServiceListResult:
+    """
+    Копия результата с признаком "из кэша". Сам результат может лежать в кэше в памяти процесса
+    и одновременно возвращаться другим запросам - менять его нельзя
+    """
+    return result.copy(update={"cached": 1})
+
+
+def render_body(render: RenderFunc, result: ServiceSingeResult | ServiceListResult) -> bytes:
+    """Тело ответа API из результата сервиса"""
+    return orjson.dumps(render(result).dict(by_alias=True, exclude_none=True))
 
 
 # ------------------------------------------------------------------------------ #
@@ -31,65 +92,532 @@ class BaseService(metaclass=Singleton):
     USE_CACHE = True  # использовать ли кэш
     NAME = "BASE"  # имя сервиса. Используется в ключе редиса
     CACHE_EXPIRE_IN_SECONDS = DEFAULT_CACHE_EXPIRE_IN_SECONDS
+    # сжатие значений в кэш-сервисе, None - кодек из настроек (CACHE_CODEC)
+    CACHE_CODEC: CacheCodec | None = None
+    # индексы базы, из которых собран результат: их поколения (см. CacheGenerations) входят в ключ кэша,
+    # тогда данные обновляются после загрузки ETL и время жизни может быть длинным
+    INDICES: tuple[str, ...] = ()
+    VERSIONED_CACHE_EXPIRE_IN_SECONDS = VERSIONED_CACHE_EXPIRE_IN_SECONDS
+    # отдавать устаревшие данные из кэша, обновляя их в фоне
+    STALE_WHILE_REVALIDATE = False
+    CACHE_STALE_IN_SECONDS = DEFAULT_CACHE_STALE_IN_SECONDS
+    # кэшировать готовое тело ответа API (см. get_response). Тогда в кэш-сервисе хранится только тело ответа,
+    # а результат сервиса - только в памяти процесса
+    CACHE_RESPONSE = False
+    # кэш в памяти процесса перед кэш-сервисом
+    USE_LOCAL_CACHE = True
+    LOCAL_CACHE_SIZE = DEFAULT_LOCAL_CACHE_SIZE
+    LOCAL_CACHE_EXPIRE_IN_SECONDS = DEFAULT_LOCAL_CACHE_EXPIRE_IN_SECONDS
+    # блокировка в кэш-сервисе, чтобы только один воркер ходил в базу за одним ключом
+    USE_CACHE_LOCK = False
+    CACHE_LOCK_EXPIRE_IN_SECONDS = DEFAULT_CACHE_LOCK_EXPIRE_IN_SECONDS
+    # сколько хранить устаревшие записи кэша в памяти, чтобы отдать их при недоступной базе
+    STALE_IF_ERROR_IN_SECONDS = DEFAULT_STALE_IF_ERROR_IN_SECONDS
+    # кэшировать результат "не найдено", чтобы повторные запросы не ходили в базу
+    USE_NEGATIVE_CACHE = True
+    NEGATIVE_CACHE_EXPIRE_IN_SECONDS = DEFAULT_NEGATIVE_CACHE_EXPIRE_IN_SECONDS
+    # строковые параметры, которые приводятся к каноническому виду перед построением ключа кэша
+    NORMALIZED_FIELDS: tuple[str, ...] = ()
+    # считать total в базе только до порога, дальше total - нижняя граница (total_relation = gte)
+    APPROXIMATE_TOTALS = False
+    TOTAL_HITS_THRESHOLD = DEFAULT_TOTAL_HITS_THRESHOLD
     RESULT_MODEL: ServiceSingeResult | ServiceListResult
 
     def __init__(self, cache: BaseCacheService, database: BaseDatabaseService):
         self.cache_service = cache
         self.database_service = database
+        self.local_cache = MemoryCache(
+            self.LOCAL_CACHE_SIZE, self.LOCAL_CACHE_EXPIRE_IN_SECONDS, self.STALE_IF_ERROR_IN_SECONDS
+        )
+        self.stats = get_cache_stats(self.NAME)
+        # запросы к базе, которые выполняются сейчас, по ключу кэша
+        self._in_flight: dict[str, asyncio.Task] = {}
+        # значения по умолчанию параметров get_from_database - в ключ кэша не попадают
+        self.query_defaults = {
+            name: param.default
+            for name, param in inspect.signature(self.get_from_database).parameters.items()
+            if param.default is not inspect.Parameter.empty
+        }
+        # варианты написания (сырые ключи) для канонического ключа кэша, отдаются в /metrics
+        self.key_variants = MemoryCache(self.LOCAL_CACHE_SIZE, self.CACHE_EXPIRE_IN_SECONDS)
+        if self.NORMALIZED_FIELDS:
+            key_variant_counts[self.NAME] = self.get_key_variants_count
 
     @classproperty
     def BASE_MODEL(self):
         """return base model from Result_model"""
         return self.RESULT_MODEL.__fields__["result"].type_
 
+    def get_result_model(self, fields: tuple[str, ...] | None = None) -> type[ServiceSingeResult | ServiceListResult]:
+        """Модель результата, для проекции полей (параметр fields) - с частью полей"""
+        if not fields:
+            return self.RESULT_MODEL
+        result_class = ServiceListResult if issubclass(self.RESULT_MODEL, ServiceListResult) else ServiceSingeResult
+        return result_class[partial_model(self.BASE_MODEL, fields)]
+
+    def cache_results(self) -> bool:
+        """Хранить результаты сервиса в кэш-сервисе"""
+        return self.USE_CACHE and not self.CACHE_RESPONSE
+
+    @staticmethod
+    def is_cacheable(query_dict: dict) -> bool:
+        """
+        Можно ли кэшировать результат и делить его между клиентами.
+        Страницы курсора с point in time - нельзя: point in time живет ES_PIT_KEEP_ALIVE, меньше записи кэша,
+        и закрывается, когда клиент дошел до последней страницы
+        """
+        if (cursor := query_dict.get("cursor")) is None:
+            return True
+        try:
+            page_cursor = decode_cursor(cursor)
+        except ValueError:
+            return False
+        # первая страница открывает point in time, если он включен (см. ESDatabaseService._apply_cursor)
+        opens_pit = page_cursor.search_after is None and settings.ES_CURSOR_USE_PIT
+        return page_cursor.pit_id is None and not opens_pit
+
+    def get_key_prefix(self) -> str:
+        """NAME и поколения индексов INDICES, если ETL о них сообщает"""
+        if self.INDICES and (generations := get_cache_generations()) is not None:
+            return f"{self.NAME}:G{generations.tag(self.INDICES)}"
+        return self.NAME
+
     def get_hash_key(self, keys: dict):
-        return hash_dict(self.NAME, keys)
+        return hash_dict(self.get_key_prefix(), keys)
+
+    def normalize_query(self, query_dict: dict) -> dict:
+        """
+        Канонический вид параметров запроса: строки из NORMALIZED_FIELDS нормализуются,
+        параметры со значением по умолчанию отбрасываются.
+        Разные написания одного запроса получают один ключ кэша и один запрос к базе
+        """
+        normalized = {}
+        for name, value in query_dict.items():
+            if name in self.NORMALIZED_FIELDS and isinstance(value, str):
+                value = normalize_text(value)
+            if name in self.query_defaults and self.query_defaults[name] == value:
+                continue
+            normalized[name] = value
+
+        if self.NORMALIZED_FIELDS:
+            self.count_key_variant(query_dict, normalized)
+        return normalized
+
+    def count_key_variant(self, query_dict: dict, normalized: dict) -> None:
+        key = self.get_hash_key(normalized)
+        # запрос уже в каноническом виде - второй хэш не нужен
+        raw_key = key if query_dict == normalized else self.get_hash_key(query_dict)
+        variants = self.key_variants.get(key)
+        if variants is None:
+            self.key_variants.put(key, {raw_key})
+        elif raw_key not in variants:
+            variants.add(raw_key)
+            self.stats.absorbed_keys += 1
+
+    def get_key_variants_count(self) -> dict[str, int]:
+        """Сколько разных сырых ключей поглотил каждый канонический ключ"""
+        return {key: len(variants) for key, variants in self.key_variants.items()}
+
+    def get_from_memory(self, query_dict: dict) -> MaybeResult | NotFound:
+        """
+        Результат из данных, которые целиком хранятся в памяти процесса.
+        None - в памяти ответа нет, идем в кэш и базу
+        """
+        return None
 
     async def get(self, **kwargs) -> MaybeResult:
+        return await self.get_normalized(self.normalize_query(kwargs))
+
+    async def get_normalized(self, kwargs: dict) -> MaybeResult:
+        """get() для уже нормализованных параметров"""
+        if (result := self.get_from_memory(kwargs)) is not None:
+            return result or None
+
+        key = self.get_hash_key(kwargs)
+        if not self.is_cacheable(kwargs):
+            return await self.query_database(key, kwargs)
+
         # 1. try to get data from cache
-        if result := await self.get_from_cache(kwargs):
-            result.cached = 1
-            return result
+        result = await self.get_from_cache(kwargs)
+        if result is NOT_FOUND:
+            return None
+        if result:
+            # устаревшие данные отдаем сразу, а обновляем в фоне
+            if self.STALE_WHILE_REVALIDATE and result.fresh_until < time.time():
+                self.start_loading(key, kwargs)
+            return mark_cached(result)
 
         # 2. try to get data from es
+        # одновременные запросы с одинаковым ключом ждут один и тот же запрос к базе
+        task = self.start_loading(key, kwargs)
+
+        # shield - отмена одного запроса не отменяет загрузку для остальных
+        return await asyncio.shield(task)
+
+    def start_loading(self, key: str, query_dict: dict, render: RenderFunc | None = None) -> asyncio.Task:
+        """Запустить загрузку из базы, если она еще не выполняется. С render - загрузку тела ответа"""
+        if task := self._in_flight.get(key):
+            logger.debug(f"request in flight, key: {key}")
+            return task
+
+        if render is None:
+            task = asyncio.ensure_future(self.load_from_database(key, query_dict))
+        else:
+            task = asyncio.ensure_future(self.load_response(key, query_dict, render))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done_task: self._on_loading_done(key, done_task))
+        return task
+
+    def _on_loading_done(self, key: str, task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        # при фоновом обновлении результат никто не ждет, поэтому ошибку забираем здесь
+        if not task.cancelled() and (err := task.exception()):
+            logger.debug(f"error while loading from database, key: {key}: {err}")
+
+    async def load_from_database(self, key: str, query_dict: dict) -> MaybeResult:
+        """Загрузить данные из базы и положить в кэш"""
+        locked = False
+        if self.cache_results() and self.USE_CACHE_LOCK:
+            locked = await self.cache_service.lock(key, self.CACHE_LOCK_EXPIRE_IN_SECONDS, service=self.NAME)
+            # данные уже загружает другой воркер - ждем их в кэше
+            if not locked and (result := await self.wait_for_cache(self.get_from_cache, query_dict)) is not None:
+                if result is NOT_FOUND:
+                    return None
+                return mark_cached(result)
+
+        try:
+            result = await self.query_database(key, query_dict)
+            if result and result.cached:
+                # устаревшие данные при недоступной базе
+                return result
+
+            if self.get_hash_key(query_dict) != key:
+                # пока шел запрос, сменилось поколение индекса - результат мог быть прочитан до загрузки ETL
+                logger.debug(f"index generation changed while loading, key: {key}")
+                return result or None
+
+            if result:
+                logger.debug(f"get from database: {result}")
+                await self.put_to_cache(query_dict, result)
+                return result
+            else:
+                logger.debug("Nothing find")
+                await self.put_not_found_to_cache(query_dict)
+                return None
+        finally:
+            # снимаем блокировку только после записи в кэш
+            if locked:
+                await self.cache_service.unlock(key, service=self.NAME)
+
+    async def query_database(self, key: str, query_dict: dict) -> MaybeResult:
+        """Запрос к базе без кэша, ошибки базы - в ответы API"""
         try:
-            result = await self.get_from_database(**kwargs)
+            return await self.get_from_database(**query_dict)
         except DatabaseConnectionError:
-            raise HTTPException(
-                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
-                detail="Service is unavailable. Please try a few minutes later.",
-            )
+            # база недоступна (или разомкнут предохранитель) - лучше устаревшие данные, чем 503
+            if (result := await self.get_stale(key, query_dict)) is not None:
+                return result
+            raise service_unavailable()
+        except InvalidCursorError:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Cursor is expired or invalid")
 
-        if result:
-            logger.debug(f"get from database: {result}")
-            await self.put_to_cache(kwargs, result)
-            return result
-        else:
-            logger.debug("Nothing find")
+    async def get_stale(self, key: str, query_dict: dict) -> MaybeResult:
+        """
+        Устаревший результат при недоступной базе: из памяти процесса (не старше STALE_IF_ERROR_IN_SECONDS),
+        иначе из кэш-сервиса. После TTL запись в кэш-сервисе живет только у STALE_WHILE_REVALIDATE сервисов,
+        у остальных там найдется только результат, который успел записать другой воркер
+        """
+        result = self.local_cache.get_stale(key) if self.USE_LOCAL_CACHE else None
+        if not result and self.cache_results() and (data := await self.cache_service.get(key, service=self.NAME)):
+            result = self.parse_cached(data, query_dict)
+        if not result:
             return None
+        logger.info(f"database unavailable, serve stale result, key: {key}")
+        self.stats.stale_hits += 1
+        return mark_cached(result)
+
+    async def wait_for_cache(self, get: Callable[..., Awaitable], *args):
+        """Ждать появления данных в кэше (get(*args) - чтение из кэша) не дольше времени блокировки"""
+        wait_time = 0.0
+        while wait_time < self.CACHE_LOCK_EXPIRE_IN_SECONDS:
+            await asyncio.sleep(CACHE_LOCK_POLL_INTERVAL)
+            wait_time += CACHE_LOCK_POLL_INTERVAL
+            if (result := await get(*args)) is not None:
+                return result
+        return None
 
     async def get_from_database(self, **kwargs) -> MaybeResult:
         pass
 
-    async def get_from_cache(self, query_dict: dict) -> MaybeResult:
-        if not self.USE_CACHE:
+    def get_track_total_hits(self) -> int | None:
+        """Порог подсчета совпадений для базы, None - по умолчанию базы"""
+        return self.TOTAL_HITS_THRESHOLD if self.APPROXIMATE_TOTALS else None
+
+    @staticmethod
+    def get_cursor(cursor: str | None) -> PageCursor | None:
+        return None if cursor is None else decode_cursor(cursor)
+
+    @staticmethod
+    def get_next_cursor(cursor: str | None, docs: DocsPage, page_size: int) -> str | None:
+        """Курсор следующей страницы, если запрошена пагинация курсором и страница не последняя"""
+        if cursor is None or len(docs.result) < page_size or docs.last_sort is None:
             return None
+        return encode_cursor(PageCursor(search_after=docs.last_sort, pit_id=docs.pit_id))
+
+    async def get_from_cache(self, query_dict: dict) -> MaybeResult | NotFound:
+        """Результат из кэша, NOT_FOUND - если закэширован результат 'не найдено'"""
         key = self.get_hash_key(query_dict)
+
+        if self.USE_LOCAL_CACHE:
+            if (result := self.local_cache.get(key)) is not None:
+                self.stats.local_hits += 1
+                return result
+            self.stats.local_misses += 1
+
+        if not self.cache_results():
+            return None
+
         logger.debug(f"get from cache, key: {key}")
-        data = await self.cache_service.get(key)
+        data = await self.cache_service.get(key, service=self.NAME)
         if not data:
+            self.stats.cache_misses += 1
             return None
+        self.stats.cache_hits += 1
 
-        result = self.RESULT_MODEL.parse_raw(data)
+        result = self.parse_cached(data, query_dict)
+        if self.USE_LOCAL_CACHE:
+            self.local_cache.put(key, result)
         return result
 
+    def parse_cached(self, data: str | bytes, query_dict: dict) -> ServiceSingeResult | ServiceListResult | NotFound:
+        if data in (NEGATIVE_CACHE_VALUE, NEGATIVE_CACHE_VALUE.decode()):
+            self.stats.negative_hits += 1
+            return NOT_FOUND
+        return self.get_result_model(query_dict.get(KEY_FIELDS)).parse_raw(data)
+
     async def put_to_cache(self, query_dict: dict, result: ServiceSingeResult | ServiceListResult) -> None:
-        if not self.USE_CACHE:
+        key = self.get_hash_key(query_dict)
+        # fresh_until - до того, как результат увидят другие запросы, в том числе без кэш-сервиса
+        expire = self.get_cache_expire(result)
+
+        if self.USE_LOCAL_CACHE:
+            self.local_cache.put(key, result)
+
+        if not self.cache_results():
             return
 
-        key = self.get_hash_key(query_dict)
         logger.debug(f"save to cache, key: {key}")
-        await self.cache_service.put(key, result.json(), self.CACHE_EXPIRE_IN_SECONDS)
+        await self.cache_service.put(key, result.json(), expire, codec=self.get_cache_codec(), service=self.NAME)
+
+    async def put_not_found_to_cache(self, query_dict: dict) -> None:
+        """Запомнить в кэше, что по запросу ничего не найдено"""
+        await self.put_many_not_found_to_cache([query_dict])
+
+    async def put_many_not_found_to_cache(self, query_dicts: list[dict]) -> None:
+        if not self.USE_NEGATIVE_CACHE or not query_dicts:
+            return
+
+        keys = [self.get_hash_key(query_dict) for query_dict in query_dicts]
+        if self.USE_LOCAL_CACHE:
+            expire = min(self.LOCAL_CACHE_EXPIRE_IN_SECONDS, self.NEGATIVE_CACHE_EXPIRE_IN_SECONDS)
+            for key in keys:
+                self.local_cache.put(key, NOT_FOUND, expire)
+
+        if not self.cache_results():
+            return
+
+        logger.debug(f"save not found to cache, keys: {keys}")
+        await self.cache_service.put_many(
+            {key: NEGATIVE_CACHE_VALUE for key in keys}, self.NEGATIVE_CACHE_EXPIRE_IN_SECONDS, service=self.NAME
+        )
+
+    def get_cache_codec(self) -> CacheCodec:
+        return settings.CACHE_CODEC if self.CACHE_CODEC is None else self.CACHE_CODEC
+
+    def get_cache_ttl(self) -> int:
+        """Сколько данные в кэше считаются свежими"""
+        if self.INDICES and get_cache_generations() is not None:
+            # устаревшие после загрузки ETL записи больше не читаются - ключ уже другой
+            return self.VERSIONED_CACHE_EXPIRE_IN_SECONDS
+        return self.CACHE_EXPIRE_IN_SECONDS
+
+    def get_cache_expire(self, result: ServiceSingeResult | ServiceListResult) -> int:
+        """Время жизни записи в кэш-сервисе. Для STALE_WHILE_REVALIDATE задает result.fresh_until"""
+        expire = ttl = self.get_cache_ttl()
+        if self.STALE_WHILE_REVALIDATE:
+            # после fresh_until данные считаются устаревшими, но отдаются еще CACHE_STALE_IN_SECONDS
+            result.fresh_until = time.time() + ttl
+            expire += self.CACHE_STALE_IN_SECONDS
+        return expire
+
+    async def get_many_from_cache(self, query_dicts: list[dict]) -> list[MaybeResult | NotFound]:
+        """Результаты из кэша для нескольких запросов, одним запросом к кэш-сервису"""
+        keys = [self.get_hash_key(query_dict) for query_dict in query_dicts]
+        results: list[MaybeResult | NotFound] = [None] * len(keys)
+
+        if self.USE_LOCAL_CACHE:
+            for i, key in enumerate(keys):
+                results[i] = self.local_cache.get(key)
+            hits = sum(1 for result in results if result is not None)
+            self.stats.local_hits += hits
+            self.stats.local_misses += len(keys) - hits
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not self.cache_results() or not missing:
+            return results
+
+        data = await self.cache_service.get_many([keys[i] for i in missing], service=self.NAME)
+        for i, value in zip(missing, data):
+            if not value:
+                self.stats.cache_misses += 1
+                continue
+            self.stats.cache_hits += 1
+            results[i] = self.parse_cached(value, query_dicts[i])
+            if self.USE_LOCAL_CACHE:
+                self.local_cache.put(keys[i], results[i])
+
+        return results
+
+    async def put_many_to_cache(self, items: list[tuple[dict, ServiceSingeResult | ServiceListResult]]) -> None:
+        """Положить в кэш несколько результатов одним запросом к кэш-сервису"""
+        keys = [self.get_hash_key(query_dict) for query_dict, _ in items]
+        # время жизни у всех записей одного сервиса одинаковое, fresh_until - до записи в кэш
+        expire = max((self.get_cache_expire(result) for _, result in items), default=0)
+
+        if self.USE_LOCAL_CACHE:
+            for key, (_, result) in zip(keys, items):
+                self.local_cache.put(key, result)
+
+        if not self.cache_results() or not items:
+            return
+
+        await self.cache_service.put_many(
+            {key: result.json() for key, (_, result) in zip(keys, items)},
+            expire,
+            codec=self.get_cache_codec(),
+            service=self.NAME,
+        )
+
+    def get_response_key(self, keys: dict):
+        return hash_dict(f"{self.get_key_prefix()}:RESPONSE", keys)
+
+    async def get_response(self, render: RenderFunc, **kwargs) -> Response | None:
+        """
+        Ответ API в виде готового json.
+        render - функция, которая строит модель ответа API из результата сервиса.
+        Если включен CACHE_RESPONSE, тело ответа кэшируется и при попадании в кэш
+        отдается клиенту как есть, без создания pydantic моделей
+        """
+        kwargs = self.normalize_query(kwargs)
+        if (result := self.get_from_memory(kwargs)) is not None:
+            # данные в памяти, кэшировать готовый ответ незачем
+            if not result:
+                return None
+            return self.render_response(render, result)
+
+        if not self.CACHE_RESPONSE or not self.is_cacheable(kwargs):
+            if not (result := await self.get_normalized(kwargs)):
+                return None
+            return self.render_response(render, result)
+
+        key = self.get_response_key(kwargs)
+        cached = await self.get_response_from_cache(key)
+        if cached is NOT_FOUND:
+            return None
+        if cached:
+            # устаревший ответ отдаем сразу, а обновляем в фоне
+            if self.STALE_WHILE_REVALIDATE and cached.fresh_until < time.time():
+                self.start_loading(key, kwargs, render)
+            return Response(content=cached.body, media_type="application/json")
+
+        if (body := await asyncio.shield(self.start_loading(key, kwargs, render))) is None:
+            return None
+        return Response(content=body, media_type="application/json")
+
+    @staticmethod
+    def render_response(render: RenderFunc, result: ServiceSingeResult | ServiceListResult) -> Response:
+        return Response(content=render_body(render, result), media_type="application/json")
+
+    async def load_response(self, key: str, query_dict: dict, render: RenderFunc) -> bytes | None:
+        """Загрузить данные из базы и положить в кэш тело ответа"""
+        locked = False
+        if self.USE_CACHE and self.USE_CACHE_LOCK:
+            locked = await self.cache_service.lock(key, self.CACHE_LOCK_EXPIRE_IN_SECONDS, service=self.NAME)
+            if not locked:
+                # ответ уже строит другой воркер - ждем его в кэше
+                cached = await self.wait_for_cache(self.get_response_from_cache, key)
+                if cached is NOT_FOUND:
+                    return None
+                if cached:
+                    return cached.body
+
+        try:
+            # сам запрос к базе - общий с get(): тот же ключ, та же защита от одновременных запросов
+            result = await self.start_loading(self.get_hash_key(query_dict), query_dict)
+            # пока шел запрос, сменилось поколение индекса - не кэшируем
+            is_actual = self.get_response_key(query_dict) == key
+            if not result:
+                if is_actual:
+                    await self.put_response_to_cache(key, NEGATIVE_CACHE_VALUE)
+                return None
+
+            body = render_body(render, result)
+            # устаревшие данные при недоступной базе (get_stale) в кэш не кладем
+            if is_actual and not result.cached:
+                await self.put_response_to_cache(key, body)
+            return body
+        finally:
+            if locked:
+                await self.cache_service.unlock(key, service=self.NAME)
+
+    async def get_response_from_cache(self, key: str) -> CachedResponse | NotFound | None:
+        if self.USE_LOCAL_CACHE:
+            if (cached := self.local_cache.get(key)) is not None:
+                self.stats.local_hits += 1
+                return cached
+            self.stats.local_misses += 1
+
+        if not self.USE_CACHE:
+            return None
+
+        if not (data := await self.cache_service.get(key, service=self.NAME)):
+            self.stats.cache_misses += 1
+            return None
+        self.stats.cache_hits += 1
+
+        cached = self.parse_cached_response(data)
+        if self.USE_LOCAL_CACHE:
+            self.local_cache.put(key, cached)
+        return cached
+
+    def parse_cached_response(self, data: str | bytes) -> CachedResponse | NotFound:
+        if isinstance(data, str):
+            data = data.encode()
+        if data == NEGATIVE_CACHE_VALUE:
+            self.stats.negative_hits += 1
+            return NOT_FOUND
+        if not self.STALE_WHILE_REVALIDATE:
+            return CachedResponse(data)
+        # первая строка - время, до которого ответ свежий (в json ответа переводов строк нет)
+        fresh_until, _, body = data.partition(b"\n")
+        return CachedResponse(body, float(fresh_until))
+
+    async def put_response_to_cache(self, key: str, body: bytes) -> None:
+        if body == NEGATIVE_CACHE_VALUE:
+            cached, data, expire = NOT_FOUND, body, self.NEGATIVE_CACHE_EXPIRE_IN_SECONDS
+        elif self.STALE_WHILE_REVALIDATE:
+            ttl = self.get_cache_ttl()
+            cached = CachedResponse(body, time.time() + ttl)
+            data = b"%f\n%b" % (cached.fresh_until, body)
+            expire = ttl + self.CACHE_STALE_IN_SECONDS
+        else:
+            cached, data, expire = CachedResponse(body), body, self.get_cache_ttl()
+
+        if self.USE_LOCAL_CACHE:
+            self.local_cache.put(key, cached, min(self.LOCAL_CACHE_EXPIRE_IN_SECONDS, expire))
+
+        if self.USE_CACHE:
+            await self.cache_service.put(key, data, expire, codec=self.get_cache_codec(), service=self.NAME)
 
     @classmethod
     async def get_service(
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+
+from core.config import settings
+from core.constants import CACHE_GENERATIONS_INDICES
+from core.database_service import BaseDatabaseService
+
+logger = logging.getLogger(__name__)
+
+
+class CacheGenerations:
+    """
+    Поколения индексов базы в памяти процесса. ETL увеличивает поколение индекса после каждой загрузки,
+    поколение входит в ключи кэша сервисов, которые читают этот индекс (BaseService.INDICES):
+    после загрузки запросы идут по новым ключам, а старые записи просто истекают.
+    Обновляется в фоне раз в refresh_interval
+    """
+
+    def __init__(self, database: BaseDatabaseService, indices: tuple[str, ...], refresh_interval: float):
+        self.database_service = database
+        self.indices = indices
+        self.refresh_interval = refresh_interval
+        self.generations: dict[str, int] = {}
+        self._loop_task: asyncio.Task | None = None
+
+    @property
+    def loaded(self) -> bool:
+        # ETL еще не сообщал о поколениях (или старой версии) - ключи без поколений
+        return bool(self.generations)
+
+    def tag(self, indices: tuple[str, ...]) -> str:
+        """Часть ключа кэша: поколения индексов через точку"""
+        return ".".join(str(self.generations.get(index, 0)) for index in indices)
+
+    async def refresh(self) -> None:
+        generations = await self.database_service.index_generations(self.indices)
+        if generations != self.generations:
+            logger.info(f"index generations changed: {generations}")
+        self.generations = generations
+
+    async def safe_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as err:  # noqa: B902
+            # остаются последние известные поколения
+            logger.warning(f"Cannot refresh index generations: {err}")
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.safe_refresh()
+
+    async def start(self) -> None:
+        await self.safe_refresh()
+        self._loop_task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+
+
+cache_generations: CacheGenerations | None = None
+
+
+def get_cache_generations() -> CacheGenerations | None:
+    """Поколения индексов, если они включены и ETL о них сообщал"""
+    if not settings.CACHE_GENERATIONS_ENABLED or cache_generations is None or not cache_generations.loaded:
+        return None
+    return cache_generations
+
+
+async def start_cache_generations(database: BaseDatabaseService) -> None:
+    """
+    Загрузить поколения индексов и обновлять их в фоне. Вызывается при старте сервиса
+    и в warmup.py - иначе прогрев пишет по ключам без поколений, которые сервис не читает
+    """
+    global cache_generations
+    if not settings.CACHE_GENERATIONS_ENABLED:
+        return
+    cache_generations = CacheGenerations(database, CACHE_GENERATIONS_INDICES, settings.CACHE_GENERATIONS_POLL_INTERVAL)
+    await cache_generations.start()
+
+
+async def stop_cache_generations() -> None:
+    if cache_generations is not None:
+        await cache_generations.stop()
@@ -0,0 +1,51 @@
+import logging
+from typing import AsyncIterator, Callable, TypeVar
+
+import orjson
+from pydantic import BaseModel
+
+from core.constants import EXPORT_INTERRUPTED
+from core.exceptions import DatabaseConnectionError, InvalidCursorError
+from services.base_service import service_unavailable
+
+logger = logging.getLogger(__name__)
+
+DocT = TypeVar("DocT", bound=BaseModel)
+
+
+async def ndjson_stream(
+    batches: AsyncIterator[list[DocT]], render: Callable[[DocT], BaseModel]
+) -> AsyncIterator[bytes]:
+    """
+    Выгрузка в NDJSON: один документ - одна строка, одна пачка из базы - один кусок ответа.
+    Первая пачка читается до начала ответа, чтобы ошибку базы вернуть статусом 503,
+    а не оборванным потоком. Если база отказала позже, последней строкой потока
+    идет запись {"error": ...}: без нее выгрузка полная
+    """
+    try:
+        first = await anext(batches, [])
+    except (DatabaseConnectionError, InvalidCursorError) as err:
+        # закрыть point in time, поток клиенту еще не начат
+        await batches.aclose()
+        logger.error(f"Export failed: {err}")
+        raise service_unavailable()
+    except BaseException:
+        await batches.aclose()
+        raise
+    return _render_batches(first, batches, render)
+
+
+async def _render_batches(
+    first: list[DocT], batches: AsyncIterator[list[DocT]], render: Callable[[DocT], BaseModel]
+) -> AsyncIterator[bytes]:
+    batch = first
+    try:
+        while batch:
+            yield b"".join(orjson.dumps(render(doc).dict(by_alias=True)) + b"\n" for doc in batch)
+            batch = await anext(batches, [])
+    except (DatabaseConnectionError, InvalidCursorError) as err:
+        # заголовки уже отправлены: сообщаем клиенту, что выгрузка неполная, последней строкой
+        logger.error(f"Export interrupted: {err}")
+        yield orjson.dumps({"error": EXPORT_INTERRUPTED}) + b"\n"
+    finally:
+        await batches.aclose()
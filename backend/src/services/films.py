@@ -1,9 +1,11 @@
 import logging
 from uuid import UUID
 
+from core.constants import ES_MOVIES_INDEX, ES_SIMILAR_FILMS_INDEX, SUGGEST_CACHE_EXPIRE_IN_SECONDS, SUGGEST_CACHE_SIZE
+from core.exceptions import DatabaseConnectionError
 from models import dto_models
 from models.service_result import ServiceListResult, ServiceSingeResult
-from services.base_service import BaseService
+from services.base_service import BaseService, mark_cached, service_unavailable
 
 logger = logging.getLogger(__name__)
 
@@ -12,60 +14,145 @@ class PopularFilmsService(BaseService):
     """Популярные фильмы."""
 
     NAME = "POPULAR_FILMS"
+    INDICES = (ES_MOVIES_INDEX,)
     RESULT_MODEL = ServiceListResult[dto_models.ImdbFilm]
+    CACHE_RESPONSE = True
+    STALE_WHILE_REVALIDATE = True
+    USE_CACHE_LOCK = True
+    APPROXIMATE_TOTALS = True
 
     async def get_from_database(
         self,
         *,
         sort_by: str,
-        genre_id: UUID | None,
+        genre_id: UUID | None = None,
         page_number: int,
         page_size: int,
+        cursor: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        facets: bool = False,
     ) -> "PopularFilmsService.RESULT_MODEL | None":
-        total, result = await self.database_service.films_all(sort_by, page_size, page_number, genre_id)
-        if total == 0:
+        docs = await self.database_service.films_all(
+            sort_by,
+            page_size,
+            page_number,
+            genre_id,
+            self.get_cursor(cursor),
+            self.get_track_total_hits(),
+            fields,
+            facets,
+        )
+        if docs.total == 0:
             return None
-        return self.RESULT_MODEL(total=total, page_num=page_number, page_size=page_size, result=result)
+        return self.get_result_model(fields)(
+            total=docs.total,
+            page_num=page_number,
+            page_size=page_size,
+            result=docs.result,
+            next_cursor=self.get_next_cursor(cursor, docs, page_size),
+            total_relation=docs.total_relation,
+            facets=docs.facets,
+        )
 
 
 class SearchFilmsService(BaseService):
     """Поиск фильмов."""
 
     NAME = "SEARCH_FILMS"
+    INDICES = (ES_MOVIES_INDEX,)
     RESULT_MODEL = ServiceListResult[dto_models.ImdbFilm]
+    CACHE_RESPONSE = True
+    NEGATIVE_CACHE_EXPIRE_IN_SECONDS = 10
+    NORMALIZED_FIELDS = ("search_for",)
+    # широкий нечеткий поиск совпадает с большой частью индекса - точный total дорог
+    APPROXIMATE_TOTALS = True
 
     async def get_from_database(
         self,
         *,
         search_for: str,
-        genre_id: UUID,
+        genre_id: UUID | None = None,
         page_number: int,
         page_size: int,
+        cursor: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        facets: bool = False,
     ) -> "SearchFilmsService.RESULT_MODEL | None":
-        total, result = await self.database_service.films_search(search_for, page_size, page_number, genre_id)
-        if total == 0:
+        docs = await self.database_service.films_search(
+            search_for,
+            page_size,
+            page_number,
+            genre_id,
+            self.get_cursor(cursor),
+            self.get_track_total_hits(),
+            fields,
+            facets,
+        )
+        if docs.total == 0:
             return None
-        return self.RESULT_MODEL(total=total, page_num=page_number, page_size=page_size, result=result)
+        return self.get_result_model(fields)(
+            total=docs.total,
+            page_num=page_number,
+            page_size=page_size,
+            result=docs.result,
+            next_cursor=self.get_next_cursor(cursor, docs, page_size),
+            total_relation=docs.total_relation,
+            facets=docs.facets,
+        )
 
 
 class FilmByIdService(BaseService):
     """Фильм по id."""
 
     NAME = "FILM_BY_ID"
+    INDICES = (ES_MOVIES_INDEX,)
     RESULT_MODEL = ServiceSingeResult[dto_models.ExtendedFilm]
+    # ненайденные id чаще всего приходят от краулеров и устаревших ссылок
+    NEGATIVE_CACHE_EXPIRE_IN_SECONDS = 60
 
-    async def get_from_database(self, *, film_id: UUID) -> "FilmByIdService.RESULT_MODEL | None":
-        if (result := await self.database_service.film_by_id(film_id)) is None:
+    async def get_from_database(
+        self, *, film_id: UUID, fields: tuple[str, ...] | None = None
+    ) -> "FilmByIdService.RESULT_MODEL | None":
+        if (result := await self.database_service.film_by_id(film_id, fields)) is None:
             return None
 
-        return self.RESULT_MODEL(total=1, page_num=1, page_size=1, result=result)
+        return self.get_result_model(fields)(total=1, page_num=1, page_size=1, result=result)
+
+    async def get_many(self, film_ids: list[UUID]) -> list["FilmByIdService.RESULT_MODEL"]:
+        """
+        Несколько фильмов по id: одно чтение из кэша, один запрос в базу
+        за отсутствующими в кэше фильмами и одна запись в кэш.
+        Фильмы возвращаются в порядке film_ids, ненайденные пропускаются
+        и кэшируются как "не найдено"
+        """
+        film_ids = list(dict.fromkeys(film_ids))
+        # ключи те же, что и в get(film_id=...)
+        query_dicts = [{"film_id": film_id} for film_id in film_ids]
+        results = [mark_cached(result) if result else result for result in await self.get_many_from_cache(query_dicts)]
+
+        if missing := [film_id for film_id, result in zip(film_ids, results) if result is None]:
+            try:
+                films = await self.database_service.films_by_ids(missing)
+            except DatabaseConnectionError:
+                raise service_unavailable()
+
+            found = {film.uuid: self.RESULT_MODEL(total=1, page_num=1, page_size=1, result=film) for film in films}
+            results = [result or found.get(film_id) for film_id, result in zip(film_ids, results)]
+            await self.put_many_to_cache([({"film_id": film_id}, result) for film_id, result in found.items()])
+            await self.put_many_not_found_to_cache(
+                [{"film_id": film_id} for film_id in missing if film_id not in found]
+            )
+
+        return [result for result in results if result]
 
 
 class SimilarFilmsService(BaseService):
     """Похожие фильмы."""
 
     NAME = "SIMILAR_FILMS"
+    INDICES = (ES_SIMILAR_FILMS_INDEX, ES_MOVIES_INDEX)
     RESULT_MODEL = ServiceListResult[dto_models.ImdbFilm]
+    CACHE_RESPONSE = True
 
     async def get_from_database(
         self,
@@ -74,6 +161,17 @@ class SimilarFilmsService(BaseService):
         page_number: int,
         page_size: int,
     ) -> "SimilarFilmsService.RESULT_MODEL | None":
+        # список похожих посчитан в ETL: чтение одного документа и один mget
+        if (similar_ids := await self.database_service.similar_film_ids(film_id)) is not None:
+            # список короткий (ETL_MOVIES_SIMILAR_SIZE), берем его целиком: удаленные после расчета
+            # фильмы mget не вернет, и total - число найденных фильмов, а не id в списке
+            films = await self.database_service.imdb_films_by_ids(similar_ids) if similar_ids else []
+            start, end = (page_number - 1) * page_size, page_number * page_size
+            if not (page := films[start:end]):
+                return None
+            return self.RESULT_MODEL(total=len(films), page_num=page_number, page_size=page_size, result=page)
+
+        # для фильма еще нет списка - фильмы того же жанра
         if (film := await self.database_service.film_by_id(film_id)) is None:
             return None
         # у фильма нет жанров :(
@@ -82,7 +180,27 @@ class SimilarFilmsService(BaseService):
 
         genre_id = film.genres[0].uuid
 
-        total, result = await self.database_service.films_all("-imdb_rating", page_size, page_number, genre_id)
-        if total == 0:
+        docs = await self.database_service.films_all("-imdb_rating", page_size, page_number, genre_id)
+        if docs.total == 0:
+            return None
+        return self.RESULT_MODEL(total=docs.total, page_num=page_number, page_size=page_size, result=docs.result)
+
+
+class FilmSuggestService(BaseService):
+    """Подсказки при наборе названия фильма."""
+
+    NAME = "FILM_SUGGEST"
+    INDICES = (ES_MOVIES_INDEX,)
+    RESULT_MODEL = ServiceListResult[dto_models.Film]
+    # запрос на каждое нажатие клавиши: горячие префиксы - в памяти процесса, без кэш-сервиса
+    USE_CACHE = False
+    LOCAL_CACHE_SIZE = SUGGEST_CACHE_SIZE
+    LOCAL_CACHE_EXPIRE_IN_SECONDS = SUGGEST_CACHE_EXPIRE_IN_SECONDS
+    NEGATIVE_CACHE_EXPIRE_IN_SECONDS = SUGGEST_CACHE_EXPIRE_IN_SECONDS
+    NORMALIZED_FIELDS = ("prefix",)
+
+    async def get_from_database(self, *, prefix: str, size: int) -> "FilmSuggestService.RESULT_MODEL | None":
+        docs = await self.database_service.films_suggest(prefix, size)
+        if not docs.result:
             return None
-        return self.RESULT_MODEL(total=total, page_num=page_number, page_size=page_size, result=result)
+        return self.RESULT_MODEL(total=len(docs.result), page_num=1, page_size=size, result=docs.result)
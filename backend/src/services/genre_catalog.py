@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from uuid import UUID
+
+from core.config import settings
+from core.constants import (
+    ES_PAGINATION_LIMIT,
+    GENRE_CATALOG_MIN_REFRESH_INTERVAL,
+    GENRE_CATALOG_PAGE_SIZE,
+    TOTAL_RELATION_EQ,
+)
+from core.database_service import BaseDatabaseService
+from models.dto_models import Genre
+
+logger = logging.getLogger(__name__)
+
+
+class GenreCatalog:
+    """
+    Все жанры в памяти процесса: список в порядке выдачи и словарь по id.
+    Обновляется в фоне раз в GENRE_CATALOG_REFRESH_INTERVAL и
+    при запросе неизвестного жанра (не чаще GENRE_CATALOG_MIN_REFRESH_INTERVAL).
+    Загружается постранично, но не дальше ES_PAGINATION_LIMIT: если жанров больше,
+    каталог неполный (complete) и за неизвестными жанрами запросы идут в базу
+    """
+
+    def __init__(self, database: BaseDatabaseService, refresh_interval: float):
+        self.database_service = database
+        self.refresh_interval = refresh_interval
+        self.genres: list[Genre] = []
+        self.by_id: dict[UUID, Genre] = {}
+        self.total = 0  # жанров в индексе
+        self.total_relation = TOTAL_RELATION_EQ
+        self.complete = True  # в каталоге все жанры индекса
+        self.refreshed_at = 0.0
+        self._refresh_task: asyncio.Task | None = None
+        self._loop_task: asyncio.Task | None = None
+
+    @property
+    def loaded(self) -> bool:
+        # пустой индекс жанров каталогом не считаем - запросы идут в базу
+        return bool(self.genres)
+
+    def get(self, genre_id: UUID) -> Genre | None:
+        # в неполном каталоге неизвестный жанр скорее всего просто не загружен
+        if (genre := self.by_id.get(genre_id)) is None and self.complete:
+            self.request_refresh()
+        return genre
+
+    def page(self, page_num: int, page_size: int) -> list[Genre]:
+        start, end = (page_num - 1) * page_size, page_num * page_size
+        return self.genres[start:end]
+
+    async def refresh(self) -> None:
+        genres: list[Genre] = []
+        for page_number in range(1, ES_PAGINATION_LIMIT // GENRE_CATALOG_PAGE_SIZE + 1):
+            docs = await self.database_service.genres_all(GENRE_CATALOG_PAGE_SIZE, page_number)
+            genres.extend(docs.result)
+            if len(docs.result) < GENRE_CATALOG_PAGE_SIZE or len(genres) >= docs.total:
+                break
+        # новые объекты целиком, чтобы читатели не видели каталог наполовину обновленным
+        self.genres, self.by_id = genres, {genre.uuid: genre for genre in genres}
+        self.total, self.total_relation = docs.total, docs.total_relation
+        # total больше порога подсчета ES - только нижняя граница
+        self.complete = len(genres) >= docs.total and docs.total_relation == TOTAL_RELATION_EQ
+        self.refreshed_at = time.monotonic()
+        logger.debug(f"genre catalog refreshed, genres: {len(self.genres)} of {self.total}")
+
+    async def safe_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as err:  # noqa: B902
+            # каталог - только ускорение, без него запросы идут через кэш и базу
+            logger.warning(f"Cannot refresh genre catalog: {err}")
+
+    def request_refresh(self) -> None:
+        """Обновить каталог в фоне, если он давно не обновлялся"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if time.monotonic() - self.refreshed_at < GENRE_CATALOG_MIN_REFRESH_INTERVAL:
+            return
+        self._refresh_task = asyncio.create_task(self.safe_refresh())
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.safe_refresh()
+
+    async def start(self) -> None:
+        await self.safe_refresh()
+        self._loop_task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+
+
+genre_catalog: GenreCatalog | None = None
+
+
+def get_genre_catalog() -> GenreCatalog | None:
+    """Каталог жанров, если он включен и загружен"""
+    if not settings.GENRE_CATALOG_ENABLED or genre_catalog is None or not genre_catalog.loaded:
+        return None
+    return genre_catalog
@@ -1,9 +1,11 @@
 import logging
 from uuid import UUID
 
+from core.constants import ES_GENRES_INDEX
 from models.dto_models import Genre
 from models.service_result import ServiceListResult, ServiceSingeResult
-from services.base_service import BaseService
+from services.base_service import NOT_FOUND, BaseService, MaybeResult, NotFound
+from services.genre_catalog import get_genre_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -14,8 +16,17 @@ class GenreByIdService(BaseService):
     """Жанр по id"""
 
     NAME = "GENRE_BY_ID"
+    INDICES = (ES_GENRES_INDEX,)
     RESULT_MODEL = ServiceSingeResult[Genre]
 
+    def get_from_memory(self, query_dict: dict) -> MaybeResult | NotFound:
+        if (catalog := get_genre_catalog()) is None:
+            return None
+        # неизвестный жанр может быть новым - ищем его в кэше и базе
+        if (genre := catalog.get(query_dict["genre_id"])) is None:
+            return None
+        return self.RESULT_MODEL(total=1, page_num=1, page_size=1, result=genre)
+
     async def get_from_database(self, *, genre_id: UUID) -> "GenreByIdService.RESULT_MODEL | None":
         if (result := await self.database_service.genre_by_id(genre_id)) is None:
             return None
@@ -30,10 +41,31 @@ class GenresAllService(BaseService):
     """список жанров"""
 
     NAME = "GENRES_ALL"
+    INDICES = (ES_GENRES_INDEX,)
     RESULT_MODEL = ServiceListResult[Genre]
+    CACHE_RESPONSE = True
+    STALE_WHILE_REVALIDATE = True
+
+    def get_from_memory(self, query_dict: dict) -> MaybeResult | NotFound:
+        if (catalog := get_genre_catalog()) is None:
+            return None
+        page_num, page_size = query_dict["page_num"], query_dict["page_size"]
+        genres = catalog.page(page_num, page_size)
+        # страница за пределами неполного каталога - из кэша и базы
+        if len(genres) < page_size and not catalog.complete:
+            return None
+        if not genres:
+            return NOT_FOUND
+        return self.RESULT_MODEL(
+            total=catalog.total,
+            total_relation=catalog.total_relation,
+            page_num=page_num,
+            page_size=page_size,
+            result=genres,
+        )
 
     async def get_from_database(self, *, page_num: int, page_size: int) -> "GenresAllService.RESULT_MODEL | None":
-        total, result = await self.database_service.genres_all(page_size, page_num)
-        if total == 0:
+        docs = await self.database_service.genres_all(page_size, page_num)
+        if docs.total == 0:
             return None
-        return self.RESULT_MODEL(total=total, page_num=page_num, page_size=page_size, result=result)
+        return self.RESULT_MODEL(total=docs.total, page_num=page_num, page_size=page_size, result=docs.result)
@@ -1,6 +1,7 @@
 from uuid import UUID
 
-from models.dto_models import ExtendedPerson, ImdbFilm
+from core.constants import ES_MOVIES_INDEX, ES_PERSONS_INDEX, SUGGEST_CACHE_EXPIRE_IN_SECONDS, SUGGEST_CACHE_SIZE
+from models.dto_models import ExtendedPerson, ImdbFilm, Person
 from models.service_result import ServiceListResult, ServiceSingeResult
 from services.base_service import BaseService
 
@@ -11,15 +12,26 @@ class FilmsByPersonService(BaseService):
     """Фильмы по персоне"""
 
     NAME = "FILMS_BY_PERSON"
+    INDICES = (ES_MOVIES_INDEX,)
     RESULT_MODEL = ServiceListResult[ImdbFilm]
+    CACHE_RESPONSE = True
 
     async def get_from_database(
-        self, *, page_num: int, page_size: int, person_id: UUID
+        self, *, page_num: int, page_size: int, person_id: UUID, cursor: str | None = None
     ) -> "FilmsByPersonService.RESULT_MODEL | None":
-        total, result = await self.database_service.person_films(person_id, page_size, page_num)
-        if total == 0:
+        docs = await self.database_service.person_films(
+            person_id, page_size, page_num, self.get_cursor(cursor), self.get_track_total_hits()
+        )
+        if docs.total == 0:
             return None
-        return self.RESULT_MODEL(total=total, page_num=page_num, page_size=page_size, result=result)
+        return self.RESULT_MODEL(
+            total=docs.total,
+            page_num=page_num,
+            page_size=page_size,
+            result=docs.result,
+            next_cursor=self.get_next_cursor(cursor, docs, page_size),
+            total_relation=docs.total_relation,
+        )
 
 
 # ------------------------------------------------------------------------------ #
@@ -29,7 +41,9 @@ class PersonByIdService(BaseService):
     """Персона по id"""
 
     NAME = "PERSON_BY_ID"
+    INDICES = (ES_PERSONS_INDEX,)
     RESULT_MODEL = ServiceSingeResult[ExtendedPerson]
+    NEGATIVE_CACHE_EXPIRE_IN_SECONDS = 60
 
     async def get_from_database(self, *, person_id: UUID) -> "PersonByIdService.RESULT_MODEL | None":
         if (result := await self.database_service.person_by_id(person_id)) is None:
@@ -45,15 +59,48 @@ class PersonSearchService(BaseService):
     """Персона по имени"""
 
     NAME = "PERSONS_SEARCH"
+    INDICES = (ES_PERSONS_INDEX,)
     RESULT_MODEL = ServiceListResult[ExtendedPerson]
+    CACHE_RESPONSE = True
+    NEGATIVE_CACHE_EXPIRE_IN_SECONDS = 10
+    NORMALIZED_FIELDS = ("query",)
 
     async def get_from_database(
         self, *, page_num: int, page_size: int, query: str
     ) -> "PersonSearchService.RESULT_MODEL | None":
-        total, result = await self.database_service.persons_search(query, page_size, page_num)
-        if total == 0:
+        docs = await self.database_service.persons_search(query, page_size, page_num, self.get_track_total_hits())
+        if docs.total == 0:
             return None
-        return self.RESULT_MODEL(total=total, page_num=page_num, page_size=page_size, result=result)
+        return self.RESULT_MODEL(
+            total=docs.total,
+            page_num=page_num,
+            page_size=page_size,
+            result=docs.result,
+            total_relation=docs.total_relation,
+        )
+
+
+# ------------------------------------------------------------------------------ #
+
+
+class PersonSuggestService(BaseService):
+    """Подсказки при наборе имени персоны"""
+
+    NAME = "PERSON_SUGGEST"
+    INDICES = (ES_PERSONS_INDEX,)
+    RESULT_MODEL = ServiceListResult[Person]
+    # запрос на каждое нажатие клавиши: горячие префиксы - в памяти процесса, без кэш-сервиса
+    USE_CACHE = False
+    LOCAL_CACHE_SIZE = SUGGEST_CACHE_SIZE
+    LOCAL_CACHE_EXPIRE_IN_SECONDS = SUGGEST_CACHE_EXPIRE_IN_SECONDS
+    NEGATIVE_CACHE_EXPIRE_IN_SECONDS = SUGGEST_CACHE_EXPIRE_IN_SECONDS
+    NORMALIZED_FIELDS = ("prefix",)
+
+    async def get_from_database(self, *, prefix: str, size: int) -> "PersonSuggestService.RESULT_MODEL | None":
+        docs = await self.database_service.persons_suggest(prefix, size)
+        if not docs.result:
+            return None
+        return self.RESULT_MODEL(total=len(docs.result), page_num=1, page_size=size, result=docs.result)
 
 
 # ------------------------------------------------------------------------------ #
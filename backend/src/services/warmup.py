@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from itertools import product
+from typing import Awaitable
+
+from fastapi import HTTPException
+
+from core.cache_service import BaseCacheService
+from core.constants import DEFAULT_PAGE_SIZE, GENRE_CATALOG_MAX_SIZE, WARMUP_LOCK_KEY, WARMUP_SORT_ORDERS
+from core.database_service import BaseDatabaseService
+from core.exceptions import DatabaseConnectionError
+from services.base_service import RenderFunc
+from services.cache_generations import get_cache_generations
+from services.films import PopularFilmsService
+from services.genre_catalog import get_genre_catalog
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Прогрев кэша популярных фильмов: первые pages страниц для каждого порядка сортировки
+    и каждого жанра (и без фильтра), не больше concurrency запросов к базе одновременно.
+    render - функция ответа роутера, чтобы в кэш попали и готовые тела ответов.
+    Запускается при старте и после каждого цикла ETL, в котором были загружены данные
+    """
+
+    def __init__(
+        self,
+        cache: BaseCacheService,
+        database: BaseDatabaseService,
+        render: RenderFunc,
+        pages: int,
+        concurrency: int,
+        etl_poll_interval: float,
+    ):
+        self.cache_service = cache
+        self.database_service = database
+        self.render = render
+        self.pages = pages
+        self.concurrency = concurrency
+        self.etl_poll_interval = etl_poll_interval
+        self.etl_cycle: int | None = None
+        self._task: asyncio.Task | None = None
+
+    async def get_queries(self) -> list[dict]:
+        """Параметры запросов - те же, что передает роутер /api/v1/films/"""
+        # жанры - из каталога в памяти, по которому роутер проверяет фильтр; без каталога - из базы
+        if (catalog := get_genre_catalog()) is not None:
+            genres = catalog.genres[:GENRE_CATALOG_MAX_SIZE]
+        else:
+            genres = (await self.database_service.genres_all(GENRE_CATALOG_MAX_SIZE, 1)).result
+        genre_ids = [None, *(genre.uuid for genre in genres)]
+        return [
+            {"sort_by": sort_by, "genre_id": genre_id, "page_number": page_number, "page_size": DEFAULT_PAGE_SIZE}
+            for sort_by, genre_id, page_number in product(WARMUP_SORT_ORDERS, genre_ids, range(1, self.pages + 1))
+        ]
+
+    async def warm_up(self, force: bool = False) -> int:
+        """
+        Прогреть кэш, вернуть количество прогретых страниц.
+        force - загрузить из базы, даже если страница уже есть в кэше (после ETL данные в кэше устарели)
+        """
+        service = PopularFilmsService(self.cache_service, self.database_service)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm_page(query: dict) -> bool:
+            query = service.normalize_query(query)
+            # роутер отдает готовое тело ответа из кэша - его и прогреваем
+            key = service.get_response_key(query)
+            async with semaphore:
+                if not force and await service.get_response_from_cache(key):
+                    return True
+                try:
+                    body = await service.start_loading(key, query, self.render)
+                except HTTPException as err:
+                    logger.warning(f"cache warm-up error: {err.detail}, query: {query}")
+                    return False
+                return body is not None
+
+        try:
+            queries = await self.get_queries()
+        except DatabaseConnectionError as err:
+            logger.warning(f"cache warm-up skipped: {err}")
+            return 0
+
+        warmed = sum(await asyncio.gather(*(warm_page(query) for query in queries)))
+        logger.info(f"cache warm-up: {warmed} of {len(queries)} pages")
+        return warmed
+
+    async def warm_up_once(self, name: str, force: bool = False) -> int:
+        """
+        Прогрев одним воркером из всех: остальные увидят блокировку name в кэш-сервисе и пропустят прогрев.
+        Блокировка не снимается, а истекает - чтобы воркеры, проверившие позже, тоже пропустили
+        """
+        if not await self.cache_service.lock(f"{WARMUP_LOCK_KEY}:{name}", self.etl_poll_interval):
+            logger.debug(f"cache warm-up {name} is done by another worker")
+            return 0
+        return await self.warm_up(force)
+
+    async def check_etl_cycle(self) -> None:
+        """Прогреть кэш заново, если ETL завершил новый цикл с загруженными данными"""
+        try:
+            cycle = await self.database_service.etl_cycle()
+        except DatabaseConnectionError as err:
+            logger.debug(f"Cannot get ETL status: {err}")
+            return
+        if cycle is None or cycle.cycle == self.etl_cycle:
+            return
+
+        # первая проверка только запоминает цикл, кэш прогревается при старте
+        is_first_check, self.etl_cycle = self.etl_cycle is None, cycle.cycle
+        if not is_first_check and cycle.loaded:
+            # ключи кэша зависят от поколений индексов - прогреваем уже по новым
+            if (generations := get_cache_generations()) is not None:
+                await generations.refresh()
+            await self.warm_up_once(f"etl:{cycle.cycle}", force=True)
+
+    async def run(self) -> None:
+        await self.safe_run(self.check_etl_cycle())
+        await self.safe_run(self.warm_up_once("startup"))
+        while True:
+            await asyncio.sleep(self.etl_poll_interval)
+            await self.safe_run(self.check_etl_cycle())
+
+    @staticmethod
+    async def safe_run(coro: Awaitable) -> None:
+        try:
+            await coro
+        except Exception as err:  # noqa: B902
+            # прогрев - только ускорение, ошибки не должны останавливать опрос ETL
+            logger.warning(f"cache warm-up error: {err}")
+
+    def start(self) -> None:
+        # в фоне, чтобы не задерживать старт сервиса
+        self._task = asyncio.create_task(self.run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,64 @@
+"""
+Прогрев кэша популярных фильмов вручную, без запуска сервиса:
+    python warmup.py [--force] [--pages 5]
+"""
+import argparse
+import asyncio
+import logging
+
+from elasticsearch import AsyncElasticsearch
+
+import redis.asyncio as aioredis
+from api.v1.films import films_response
+from core.cache_service import BaseCacheService
+from core.config import settings
+from core.database_service import BaseDatabaseService
+from db import elastic, redis_
+from services.base_service import RenderFunc
+from services.cache_generations import start_cache_generations, stop_cache_generations
+from services.warmup import CacheWarmer
+
+
+async def warm_up(
+    cache: BaseCacheService,
+    database: BaseDatabaseService,
+    render: RenderFunc,
+    force: bool,
+    pages: int,
+    concurrency: int,
+) -> int:
+    # ключи кэша - с поколениями индексов, как у запущенного сервиса
+    await start_cache_generations(database)
+    try:
+        warmer = CacheWarmer(cache, database, render, pages, concurrency, settings.WARMUP_ETL_POLL_INTERVAL)
+        return await warmer.warm_up(force)
+    finally:
+        await stop_cache_generations()
+
+
+async def main(force: bool, pages: int, concurrency: int) -> None:
+    redis_.redis = await aioredis.from_url(settings.REDIS_URI)
+    elastic.es = AsyncElasticsearch(hosts=[settings.ES_URI])
+    try:
+        warmed = await warm_up(
+            await redis_.get_redis(),
+            await elastic.get_es_database_service(),
+            films_response,
+            force,
+            pages,
+            concurrency,
+        )
+        print(f"warmed {warmed} pages")
+    finally:
+        await redis_.redis.close()
+        await elastic.es.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm up popular films cache")
+    parser.add_argument("--force", action="store_true", help="reload pages that are already cached")
+    parser.add_argument("--pages", type=int, default=settings.WARMUP_PAGES)
+    parser.add_argument("--concurrency", type=int, default=settings.WARMUP_CONCURRENCY)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(args.force, args.pages, args.concurrency))
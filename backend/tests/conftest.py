@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 
@@ -5,3 +6,120 @@ from pathlib import Path
 src_path = Path(__file__).parent.parent / "src/"
 if src_path not in sys.path:
     sys.path.insert(1, str(src_path))
+
+# обязательные настройки, чтобы юнит-тесты не требовали .env.local
+for env_name, env_value in {
+    "REDIS_BACKEND_DSN": "redis://localhost:6379",
+    "ELK_MOVIES_DSN": "http://localhost:9200",
+    "BACKEND_JWT_KEY": "secret_jwt_key",
+    "JAEGER_HOST_NAME": "localhost",
+    "JAEGER_PORT": "6831",
+}.items():
+    os.environ.setdefault(env_name, env_value)
+
+import asyncio
+from collections import Counter
+
+import pytest
+
+from core.database_service import DocsPage
+from models.dto_models import Genre, ImdbFilm
+
+GENRES = [
+    Genre(id="715b726d-2239-4984-99d6-89420a6634c0", name="Comedy"),
+    Genre(id="3fbed5ed-1e53-45f6-ae0f-91f63eda6b7d", name="Drama"),
+    Genre(id="d5e9fd46-d89f-403f-b685-c1f1c9643748", name="Horror"),
+]
+FILM = ImdbFilm(id="2a090dde-f688-46fe-a9f4-b781a985275e", title="Star Wars", imdb_rating=8.6)
+
+
+class CacheMock:
+    """Кэш-сервис в памяти: значения, время жизни записей и блокировки"""
+
+    def __init__(self):
+        self.mem = {}
+        self.expire = {}
+        self.locks = set()
+
+    async def get(self, key, service=None):
+        return self.mem.get(key)
+
+    async def get_many(self, keys, service=None):
+        return [self.mem.get(key) for key in keys]
+
+    async def put(self, key, value, expire=0, codec=None, service=None):
+        self.mem[key] = value
+        self.expire[key] = expire
+
+    async def put_many(self, items, expire=0, codec=None, service=None):
+        for key, value in items.items():
+            await self.put(key, value, expire)
+
+    async def lock(self, key, expire, service=None):
+        if key in self.locks:
+            return False
+        self.locks.add(key)
+        return True
+
+    async def unlock(self, key, service=None):
+        self.locks.discard(key)
+
+
+class DatabaseMock:
+    """База с жанрами genres и одним фильмом film, calls - число запросов по методам"""
+
+    # id, которого нет в базе
+    MISSING_ID = "00000000-0000-0000-0000-000000000000"
+
+    def __init__(self):
+        self.genres = list(GENRES)
+        self.film = FILM
+        self.calls = Counter()
+        self.cycle = None
+        self.generations = {"genres": 1}
+        self.prefixes = []
+        # списки похожих фильмов, посчитанные ETL
+        self.similar = {}
+
+    async def genre_by_id(self, id_):
+        self.calls["genre_by_id"] += 1
+        await asyncio.sleep(0.01)
+        if id_ == self.MISSING_ID:
+            return None
+        return Genre(id=id_, name="Comedy")
+
+    async def genres_all(self, page_size, page_number):
+        self.calls["genres_all"] += 1
+        start, end = (page_number - 1) * page_size, page_number * page_size
+        return DocsPage(total=len(self.genres), result=self.genres[start:end])
+
+    async def films_all(self, sort_by, page_size, page_number, genre_id, *args, **kwargs):
+        self.calls["films_all"] += 1
+        return DocsPage(total=1, result=[self.film])
+
+    async def similar_film_ids(self, id_):
+        return self.similar.get(id_)
+
+    async def imdb_films_by_ids(self, ids):
+        self.calls["imdb_films_by_ids"] += 1
+        return [self.film for id_ in ids if id_ == self.film.uuid]
+
+    async def films_suggest(self, prefix, size):
+        self.prefixes.append(prefix)
+        return DocsPage(total=1, result=[self.film] if prefix.startswith("star") else [])
+
+    async def etl_cycle(self):
+        return self.cycle
+
+    async def index_generations(self, indices):
+        return {index: self.generations[index] for index in indices if index in self.generations}
+
+
+@pytest.fixture
+def cache():
+    return CacheMock()
+
+
+@pytest.fixture
+def database():
+    return DatabaseMock()
@@ -0,0 +1,40 @@
+import time
+import uuid
+
+import jwt
+import pytest
+
+from core import auth_bearer
+from core.auth_bearer import JWT_ALGORITHM, JWT_SECRET, decode_access_token
+
+
+def make_token(exp_in: float = 600) -> str:
+    now = int(time.time())
+    payload = {
+        "fresh": True,
+        "iat": now,
+        "jti": str(uuid.uuid4()),
+        "type": "access",
+        "sub": str(uuid.uuid4()),
+        "nbf": now,
+        "csrf": str(uuid.uuid4()),
+        "exp": now + exp_in,
+        "name": "user",
+        "roles": ["ROOT"],
+        "device_id": "device",
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+def test_verified_token_cache(monkeypatch):
+    token = make_token()
+    payload = decode_access_token(token)
+
+    # повторный запрос - из кэша, без проверки подписи
+    monkeypatch.setattr(auth_bearer.jwt, "decode", lambda *args, **kwargs: pytest.fail("token decoded again"))
+    assert decode_access_token(token) is payload
+
+
+def test_expired_token_not_cached():
+    with pytest.raises(jwt.ExpiredSignatureError):
+        decode_access_token(make_token(exp_in=-1))
@@ -0,0 +1,263 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from core.config import settings
+from core.exceptions import CircuitOpenError
+from models.dto_models import Genre
+from models.service_result import ServiceSingeResult
+from services.base_service import BaseService
+
+
+class GenreService(BaseService):
+    NAME = "TEST_GENRE"
+    RESULT_MODEL = ServiceSingeResult[Genre]
+
+    async def get_from_database(self, *, genre_id):
+        if (result := await self.database_service.genre_by_id(genre_id)) is None:
+            return None
+        return self.RESULT_MODEL(total=1, page_num=1, page_size=1, result=result)
+
+
+@pytest.fixture
+def service(cache, database):
+    service = GenreService(cache, database)
+    yield service
+    # сервисы - синглтоны, для каждого теста создаем новый
+    GenreService._instances.pop(GenreService, None)
+
+
+@pytest.mark.asyncio
+async def test_single_flight(service):
+    genre_id = "715b726d-2239-4984-99d6-89420a6634c0"
+    results = await asyncio.gather(*[service.get(genre_id=genre_id) for _ in range(10)])
+
+    assert service.database_service.calls["genre_by_id"] == 1
+    assert all(result.result.name == "Comedy" for result in results)
+
+
+@pytest.mark.asyncio
+async def test_local_cache(service):
+    genre_id = "715b726d-2239-4984-99d6-89420a6634c0"
+    await service.get(genre_id=genre_id)
+    result = await service.get(genre_id=genre_id)
+
+    assert result.cached == 1
+    assert service.database_service.calls["genre_by_id"] == 1
+    assert service.stats.local_hits >= 1
+
+
+@pytest.mark.asyncio
+async def test_cached_result_not_changed(service):
+    genre_id = "715b726d-2239-4984-99d6-89420a6634c0"
+    loaded = await service.get(genre_id=genre_id)
+    cached = await service.get(genre_id=genre_id)
+
+    # признак "из кэша" - только у копии, объект в кэше в памяти и ответ первому запросу не меняются
+    assert (loaded.cached, cached.cached) == (0, 1)
+    assert service.local_cache.get(service.get_hash_key({"genre_id": genre_id})).cached == 0
+
+
+@pytest.mark.asyncio
+async def test_negative_cache(service, database):
+    assert await service.get(genre_id=database.MISSING_ID) is None
+    # результат "не найдено" берется из кэш-сервиса, без запроса в базу
+    service.local_cache.clear()
+    assert await service.get(genre_id=database.MISSING_ID) is None
+
+    assert service.database_service.calls["genre_by_id"] == 1
+    assert service.stats.negative_hits == 1
+
+
+class SearchGenreService(GenreService):
+    NAME = "TEST_SEARCH_GENRE"
+    NORMALIZED_FIELDS = ("query",)
+
+    async def get_from_database(self, *, query, genre_id=None):
+        return await super().get_from_database(genre_id="715b726d-2239-4984-99d6-89420a6634c0")
+
+
+@pytest.mark.asyncio
+async def test_key_normalization(cache, database):
+    service = SearchGenreService(cache, database)
+    for query in ("Star Wars", "star wars ", "STAR  WARS", "star wars"):
+        await service.get(query=query, genre_id=None)
+
+    # один запрос к базе на все варианты написания
+    assert service.database_service.calls["genre_by_id"] == 1
+    assert service.stats.absorbed_keys == 3
+    assert list(service.get_key_variants_count().values()) == [4]
+    SearchGenreService._instances.pop(SearchGenreService, None)
+
+
+class StaleGenreService(GenreService):
+    NAME = "TEST_STALE_GENRE"
+    STALE_WHILE_REVALIDATE = True
+    CACHE_EXPIRE_IN_SECONDS = 0
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate(cache, database):
+    service = StaleGenreService(cache, database)
+    genre_id = "715b726d-2239-4984-99d6-89420a6634c0"
+    await service.get(genre_id=genre_id)
+
+    # данные устарели, но отдаются из кэша, а обновление идет в фоне
+    result = await service.get(genre_id=genre_id)
+    assert result.cached == 1
+    assert service.database_service.calls["genre_by_id"] == 1
+
+    await asyncio.sleep(0.02)
+    assert service.database_service.calls["genre_by_id"] == 2
+    StaleGenreService._instances.pop(StaleGenreService, None)
+
+
+class LocalStaleGenreService(GenreService):
+    NAME = "TEST_LOCAL_STALE_GENRE"
+    STALE_WHILE_REVALIDATE = True
+    USE_CACHE = False
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate_local_cache_only(cache, database):
+    service = LocalStaleGenreService(cache, database)
+    genre_id = "715b726d-2239-4984-99d6-89420a6634c0"
+    try:
+        await service.get(genre_id=genre_id)
+        # fresh_until задан и без кэш-сервиса - свежая запись в памяти не обновляется в фоне
+        assert (await service.get(genre_id=genre_id)).fresh_until > time.time()
+        await asyncio.sleep(0.02)
+        assert service.database_service.calls["genre_by_id"] == 1
+    finally:
+        LocalStaleGenreService._instances.pop(LocalStaleGenreService, None)
+
+
+class UnavailableDatabaseMock:
+    """База, у которой разомкнут предохранитель"""
+
+    async def genre_by_id(self, id_):
+        raise CircuitOpenError("open")
+
+
+@pytest.mark.asyncio
+async def test_stale_if_error(service):
+    # запись в памяти сразу устаревает, в кэш-сервисе ее нет
+    service.local_cache.expire = 0
+    genre_id = "715b726d-2239-4984-99d6-89420a6634c0"
+    await service.get(genre_id=genre_id)
+    service.cache_service.mem.clear()
+    service.database_service = UnavailableDatabaseMock()
+
+    result = await service.get(genre_id=genre_id)
+    assert result.result.name == "Comedy"
+    assert service.stats.stale_hits == 1
+
+    with pytest.raises(HTTPException):
+        await service.get(genre_id="3fbed5ed-1e53-45f6-ae0f-91f63eda6b7d")
+
+
+@pytest.mark.asyncio
+async def test_stale_if_error_from_cache_service(service):
+    # в памяти этого воркера записи нет, в кэш-сервисе - есть (записал другой воркер)
+    genre_id = "715b726d-2239-4984-99d6-89420a6634c0"
+    await service.get(genre_id=genre_id)
+    service.local_cache.clear()
+    key = service.get_hash_key({"genre_id": genre_id})
+    service.database_service = UnavailableDatabaseMock()
+    # статистика общая для сервисов с одним NAME
+    stale_hits = service.stats.stale_hits
+
+    # запрос мимо кэша, как фоновое обновление устаревшей записи
+    result = await service.query_database(key, {"genre_id": genre_id})
+    assert result.result.name == "Comedy"
+    assert result.cached == 1
+    assert service.stats.stale_hits == stale_hits + 1
+
+
+class ResponseGenreService(GenreService):
+    NAME = "TEST_RESPONSE_GENRE"
+    CACHE_RESPONSE = True
+    USE_CACHE_LOCK = True
+
+
+@pytest.fixture
+def response_service(cache, database):
+    service = ResponseGenreService(cache, database)
+    yield service
+    ResponseGenreService._instances.pop(ResponseGenreService, None)
+
+
+def render(result):
+    return result.result
+
+
+@pytest.mark.asyncio
+async def test_response_cache(response_service, cache):
+    genre_id = "715b726d-2239-4984-99d6-89420a6634c0"
+    responses = await asyncio.gather(*[response_service.get_response(render, genre_id=genre_id) for _ in range(5)])
+    assert response_service.database_service.calls["genre_by_id"] == 1
+    assert all(b'"name":"Comedy"' in response.body for response in responses)
+
+    # в кэш-сервисе одна запись на страницу - тело ответа
+    assert list(cache.mem) == [response_service.get_response_key({"genre_id": genre_id})]
+
+    # ответ из кэш-сервиса без запроса в базу
+    response_service.local_cache.clear()
+    response = await response_service.get_response(render, genre_id=genre_id)
+    assert response.body == responses[0].body
+    assert response_service.database_service.calls["genre_by_id"] == 1
+    assert response_service.stats.cache_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_response_not_found(response_service, database):
+    assert await response_service.get_response(render, genre_id=database.MISSING_ID) is None
+    response_service.local_cache.clear()
+    assert await response_service.get_response(render, genre_id=database.MISSING_ID) is None
+    assert database.calls["genre_by_id"] == 1
+
+
+class StaleResponseGenreService(ResponseGenreService):
+    NAME = "TEST_STALE_RESPONSE_GENRE"
+    STALE_WHILE_REVALIDATE = True
+    CACHE_EXPIRE_IN_SECONDS = 0
+
+
+@pytest.mark.asyncio
+async def test_response_stale_while_revalidate(cache, database):
+    service = StaleResponseGenreService(cache, database)
+    genre_id = "715b726d-2239-4984-99d6-89420a6634c0"
+    await service.get_response(render, genre_id=genre_id)
+
+    # ответ устарел, но отдается из кэш-сервиса, а обновление идет в фоне
+    service.local_cache.clear()
+    assert await service.get_response(render, genre_id=genre_id)
+    assert database.calls["genre_by_id"] == 1
+
+    await asyncio.sleep(0.02)
+    assert database.calls["genre_by_id"] == 2
+    StaleResponseGenreService._instances.pop(StaleResponseGenreService, None)
+
+
+class CursorGenreService(GenreService):
+    NAME = "TEST_CURSOR_GENRE"
+
+    async def get_from_database(self, *, genre_id, cursor=None):
+        return await super().get_from_database(genre_id=genre_id)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_pit, cursor, calls", [(False, "*", 1), (True, "*", 2), (True, None, 1)])
+async def test_cursor_with_pit_is_not_cached(monkeypatch, cache, database, use_pit, cursor, calls):
+    monkeypatch.setattr(settings, "ES_CURSOR_USE_PIT", use_pit)
+    service = CursorGenreService(cache, database)
+    genre_id = "715b726d-2239-4984-99d6-89420a6634c0"
+    for _ in range(2):
+        await service.get(genre_id=genre_id, cursor=cursor)
+
+    # point in time у каждого клиента свой - страницы с ним не кэшируются
+    assert database.calls["genre_by_id"] == calls
+    assert bool(cache.mem) == (calls == 1)
+    CursorGenreService._instances.pop(CursorGenreService, None)
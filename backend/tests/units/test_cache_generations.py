@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from core.constants import VERSIONED_CACHE_EXPIRE_IN_SECONDS
+from models.dto_models import Genre
+from models.service_result import ServiceSingeResult
+from services import cache_generations
+from services.base_service import BaseService
+from services.cache_generations import CacheGenerations
+
+GENRE_ID = "715b726d-2239-4984-99d6-89420a6634c0"
+
+
+class GenreService(BaseService):
+    NAME = "TEST_GENERATIONS"
+    INDICES = ("genres",)
+    RESULT_MODEL = ServiceSingeResult[Genre]
+    USE_LOCAL_CACHE = False
+
+    async def get_from_database(self, *, genre_id):
+        result = await self.database_service.genre_by_id(genre_id)
+        return self.RESULT_MODEL(total=1, page_num=1, page_size=1, result=result)
+
+
+@pytest.fixture
+def service(cache, database):
+    service = GenreService(cache, database)
+    yield service
+    GenreService._instances.pop(GenreService, None)
+
+
+@pytest.fixture
+def generations(database):
+    cache_generations.cache_generations = CacheGenerations(database, ("genres", "movies"), refresh_interval=60)
+    cache_generations.cache_generations.generations = {"genres": 1}
+    yield cache_generations.cache_generations
+    cache_generations.cache_generations = None
+
+
+@pytest.mark.asyncio
+async def test_generation_in_key(service, generations):
+    await service.get(genre_id=GENRE_ID)
+    await service.get(genre_id=GENRE_ID)
+    assert service.database_service.calls["genre_by_id"] == 1
+    key = service.get_hash_key({"genre_id": GENRE_ID})
+    assert key.startswith("TEST_GENERATIONS:G1:")
+    # поколения известны - записи живут долго
+    assert service.cache_service.expire[key] == VERSIONED_CACHE_EXPIRE_IN_SECONDS
+
+    # ETL загрузил индекс - новый ключ, запрос идет в базу
+    service.database_service.generations["genres"] = 2
+    await generations.refresh()
+    await service.get(genre_id=GENRE_ID)
+    assert service.database_service.calls["genre_by_id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_generation_changed_while_loading(service, generations):
+    task = asyncio.create_task(service.get(genre_id=GENRE_ID))
+    await asyncio.sleep(0)
+    service.database_service.generations["genres"] = 2
+    await generations.refresh()
+
+    # результат мог быть прочитан до загрузки - отдаем, но не кэшируем
+    assert (await task).result.name == "Comedy"
+    assert service.cache_service.mem == {}
+
+
+@pytest.mark.asyncio
+async def test_without_generations(service, database):
+    # ETL не сообщал о поколениях - ключи и время жизни как раньше
+    cache_generations.cache_generations = CacheGenerations(database, ("movies",), refresh_interval=60)
+    await cache_generations.cache_generations.refresh()
+    try:
+        await service.get(genre_id=GENRE_ID)
+        key = service.get_hash_key({"genre_id": GENRE_ID})
+        assert key.startswith("TEST_GENERATIONS:") and ":G" not in key
+        assert service.cache_service.expire[key] == service.CACHE_EXPIRE_IN_SECONDS
+    finally:
+        cache_generations.cache_generations = None
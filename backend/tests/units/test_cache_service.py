@@ -1,6 +1,11 @@
 import pytest
 
+from core.cache_codec import ZLIB_HEADER, CacheCodec
 from core.cache_service import RedisCacheService
+from core.constants import NEGATIVE_CACHE_VALUE
+from core.memory_cache import get_cache_stats
+from core.metrics import collect_cache_stats
+from redis.asyncio import RedisError
 
 
 class RedisMock:
@@ -34,3 +39,53 @@ async def test_put(redis_cache):
     await cache.put(key, value1)
     value2 = await cache.get(key)
     assert value1 == value2
+
+
+@pytest.mark.asyncio
+async def test_put_compressed(redis_cache):
+    cache, redis = redis_cache
+    value = b'{"result": [' + b'{"title": "Star Wars", "imdb_rating": 8.6},' * 100 + b"]}"
+    await cache.put("compressed", value, codec=CacheCodec.ZLIB)
+
+    assert redis._mem["compressed"][:1] == ZLIB_HEADER
+    assert len(redis._mem["compressed"]) < len(value)
+    assert await cache.get("compressed") == value
+
+
+@pytest.mark.asyncio
+async def test_put_small_not_compressed(redis_cache):
+    cache, redis = redis_cache
+    # маркер "не найдено" и значения меньше порога хранятся как есть
+    await cache.put("not_found", NEGATIVE_CACHE_VALUE, codec=CacheCodec.ZLIB)
+
+    assert redis._mem["not_found"] == NEGATIVE_CACHE_VALUE
+    assert await cache.get("not_found") == NEGATIVE_CACHE_VALUE
+
+
+@pytest.mark.asyncio
+async def test_get_broken_compressed(redis_cache):
+    cache, redis = redis_cache
+    redis._mem["broken"] = ZLIB_HEADER + b"not zlib"
+
+    assert await cache.get("broken") is None
+
+
+class FailingRedisMock:
+    async def get(self, key):
+        raise RedisError("connection refused")
+
+    async def set(self, key, value, ex=0):
+        raise RedisError("connection refused")
+
+
+@pytest.mark.asyncio
+async def test_errors_by_service(redis_cache, monkeypatch):
+    cache, _ = redis_cache
+    monkeypatch.setattr(cache, "redis", FailingRedisMock())
+
+    # ошибка кэша - промах, запрос идет в базу, но считается в статистике сервиса
+    assert await cache.get("key", service="TEST_CACHE_ERRORS") is None
+    await cache.put("key", "value", service="TEST_CACHE_ERRORS")
+
+    assert get_cache_stats("TEST_CACHE_ERRORS").cache_errors == 2
+    assert 'cache_errors_total{service="TEST_CACHE_ERRORS"} 2' in list(collect_cache_stats())
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from core.circuit_breaker import CircuitBreaker, CircuitState
+from core.exceptions import CircuitOpenError
+
+
+@pytest.fixture
+def breaker(request):
+    # статистика хранится по имени, у каждого теста свое
+    return CircuitBreaker(
+        request.node.name,
+        window_size=10,
+        min_calls=4,
+        failure_rate=0.5,
+        slow_call_duration=1.0,
+        slow_call_rate=0.75,
+        open_timeout=0.01,
+        half_open_max_calls=2,
+    )
+
+
+def call(breaker: CircuitBreaker, duration: float = 0.1, failed: bool = False) -> None:
+    breaker.before_call()
+    breaker.record(duration, failed)
+
+
+def test_opens_on_failure_rate(breaker):
+    for failed in (False, True, False, True):
+        call(breaker, failed=failed)
+
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats.rejected == 1
+
+
+def test_opens_on_slow_calls(breaker):
+    for duration in (0.1, 2.0, 2.0, 2.0):
+        call(breaker, duration=duration)
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_half_open(breaker):
+    for _ in range(4):
+        call(breaker, failed=True)
+    time.sleep(0.02)
+
+    # после open_timeout - пробные запросы, лишние отклоняются
+    breaker.before_call()
+    breaker.before_call()
+    assert breaker.state == CircuitState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record(0.1, failed=False)
+    breaker.record(0.1, failed=False)
+    assert breaker.state == CircuitState.CLOSED
+    assert (breaker.stats.opened, breaker.stats.half_opened, breaker.stats.closed) == (1, 1, 1)
+
+
+def test_half_open_failure(breaker):
+    for _ in range(4):
+        call(breaker, failed=True)
+    time.sleep(0.02)
+
+    call(breaker, failed=True)
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_half_open_slow_probe(breaker):
+    for _ in range(4):
+        call(breaker, duration=2.0)
+    time.sleep(0.02)
+
+    # пробы без ошибок, но медленные - предохранитель снова размыкается
+    call(breaker, duration=2.0)
+    assert breaker.state == CircuitState.OPEN
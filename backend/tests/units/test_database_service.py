@@ -0,0 +1,117 @@
+import pytest
+
+from core.database_service import ESDatabaseService
+
+
+class ElasticMock:
+    def __init__(self):
+        self.params = None
+
+    async def search(self, **kwargs):
+        self.params = kwargs
+        hits = [{"_id": "715b726d-2239-4984-99d6-89420a6634c0", "_source": {"title": "Film", "imdb_rating": 8.0}}]
+        return {"hits": {"hits": hits, "total": {"value": 100, "relation": "gte"}}}
+
+
+@pytest.fixture
+def database():
+    database = ESDatabaseService(ElasticMock())
+    yield database
+    ESDatabaseService._instances.pop(ESDatabaseService, None)
+
+
+@pytest.mark.asyncio
+async def test_approximate_total(database):
+    docs = await database.films_search("film", page_size=50, page_number=3, track_total_hits=100)
+
+    assert docs.total == 100
+    assert docs.total_relation == "gte"
+    # порог не меньше конца запрошенной страницы
+    assert database.elastic.params["track_total_hits"] == 150
+
+
+@pytest.mark.asyncio
+async def test_exact_total_by_default(database):
+    await database.films_search("film", page_size=50, page_number=1)
+    assert "track_total_hits" not in database.elastic.params
+
+    # без порога от сервиса total популярных фильмов тоже не ограничивается
+    await database.films_all("-imdb_rating", page_size=50, page_number=1)
+    assert "track_total_hits" not in database.elastic.params
+
+
+COMEDY_ID = "715b726d-2239-4984-99d6-89420a6634c0"
+
+
+class FacetsElasticMock(ElasticMock):
+    async def search(self, **kwargs):
+        response = await super().search(**kwargs)
+        buckets = [{"key": COMEDY_ID, "doc_count": 12, "films": {"doc_count": 12}}]
+        response["aggregations"] = {"genre_facets": {"doc_count": 20, "ids": {"buckets": buckets}}}
+        return response
+
+
+@pytest.mark.asyncio
+async def test_facets():
+    database = ESDatabaseService(FacetsElasticMock())
+    try:
+        docs = await database.films_search("film", page_size=50, page_number=1, genre_id=COMEDY_ID, facets=True)
+    finally:
+        ESDatabaseService._instances.pop(ESDatabaseService, None)
+
+    assert [(str(facet.uuid), facet.count) for facet in docs.facets] == [(COMEDY_ID, 12)]
+    params = database.elastic.params
+    assert "genre_facets" in params["aggs"]
+    # фильтр по жанру не сужает агрегацию, только страницу
+    assert "filter" not in params["query"]["bool"]
+    assert params["post_filter"]["nested"]["query"] == {"term": {"genres.id": COMEDY_ID}}
+
+
+@pytest.mark.asyncio
+async def test_no_facets_by_default(database):
+    docs = await database.films_all("-imdb_rating", page_size=50, page_number=1, genre_id=COMEDY_ID)
+
+    assert docs.facets is None
+    assert "aggs" not in database.elastic.params
+    assert "post_filter" not in database.elastic.params
+
+
+class ScanElasticMock:
+    """3 документа, пачки по 2: search_after продолжает с позиции из sort"""
+
+    def __init__(self):
+        self.requests = []
+        self.closed_pit = None
+
+    async def open_point_in_time(self, **kwargs):
+        return {"id": "pit"}
+
+    async def close_point_in_time(self, id):
+        self.closed_pit = id
+
+    async def search(self, **kwargs):
+        self.requests.append(kwargs)
+        start = kwargs.get("search_after", [0])[0]
+        hits = [
+            {
+                "_id": f"00000000-0000-0000-0000-00000000000{i}",
+                "_source": {"name": f"Person {i}", "movies": []},
+                "sort": [i + 1],
+            }
+            for i in range(start, min(start + kwargs["size"], 3))
+        ]
+        return {"pit_id": "pit", "hits": {"hits": hits}}
+
+
+@pytest.mark.asyncio
+async def test_export_scan():
+    database = ESDatabaseService(ScanElasticMock())
+    try:
+        batches = [batch async for batch in database.persons_export(batch_size=2)]
+    finally:
+        ESDatabaseService._instances.pop(ESDatabaseService, None)
+
+    assert [[person.full_name for person in batch] for batch in batches] == [["Person 0", "Person 1"], ["Person 2"]]
+    assert database.elastic.requests[1]["search_after"] == [2]
+    assert "index" not in database.elastic.requests[0]
+    assert database.elastic.closed_pit == "pit"
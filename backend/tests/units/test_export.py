@@ -0,0 +1,65 @@
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from core.constants import EXPORT_INTERRUPTED
+from core.exceptions import DatabaseConnectionError, InvalidCursorError
+from models.dto_models import Genre
+from services.export import ndjson_stream
+
+COMEDY = Genre(uuid="715b726d-2239-4984-99d6-89420a6634c0", name="Comedy")
+
+
+class Batches:
+    """Пачки из базы, после fail_after пачек - ошибка"""
+
+    def __init__(self, fail_after: int, error: Exception):
+        self.fail_after = fail_after
+        self.error = error
+        self.closed = False
+
+    async def __call__(self):
+        try:
+            for _ in range(self.fail_after):
+                yield [COMEDY, COMEDY]
+            raise self.error
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [DatabaseConnectionError("down"), InvalidCursorError("expired")])
+async def test_first_batch_error(error):
+    batches = Batches(0, error)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await ndjson_stream(batches(), lambda doc: doc)
+
+    assert exc_info.value.status_code == 503
+    # point in time закрыт
+    assert batches.closed
+
+
+@pytest.mark.asyncio
+async def test_interrupted_stream_ends_with_error():
+    batches = Batches(2, DatabaseConnectionError("down"))
+
+    stream = await ndjson_stream(batches(), lambda doc: doc)
+    lines = b"".join([chunk async for chunk in stream]).splitlines()
+
+    assert len(lines) == 5
+    assert orjson.loads(lines[0])["name"] == "Comedy"
+    assert orjson.loads(lines[-1]) == {"error": EXPORT_INTERRUPTED}
+    assert batches.closed
+
+
+@pytest.mark.asyncio
+async def test_complete_stream():
+    async def batches():
+        yield [COMEDY]
+
+    stream = await ndjson_stream(batches(), lambda doc: doc)
+    lines = b"".join([chunk async for chunk in stream]).splitlines()
+
+    # без записи об ошибке - выгрузка полная
+    assert [orjson.loads(line)["name"] for line in lines] == ["Comedy"]
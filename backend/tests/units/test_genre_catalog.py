@@ -0,0 +1,56 @@
+import pytest
+
+from api.v1.params import genre_filter
+from core.config import settings
+from services import genre_catalog
+from services.genre_catalog import GenreCatalog
+
+
+@pytest.mark.asyncio
+async def test_catalog(database):
+    catalog = GenreCatalog(database, refresh_interval=60)
+    assert not catalog.loaded
+    await catalog.refresh()
+
+    assert catalog.loaded
+    assert catalog.get(database.genres[1].uuid).name == "Drama"
+    # порядок выдачи сохраняется
+    assert [genre.name for genre in catalog.page(2, 2)] == ["Horror"]
+    assert catalog.page(3, 2) == []
+
+
+@pytest.mark.asyncio
+async def test_refresh_on_miss_is_rate_limited(database):
+    catalog = GenreCatalog(database, refresh_interval=60)
+    await catalog.refresh()
+
+    # каталог только что обновлен - неизвестный жанр не вызывает повторной загрузки
+    assert catalog.get("88d41c11-8e7a-46f6-9890-205848809f34") is None
+    assert database.calls["genres_all"] == 1
+
+
+@pytest.mark.asyncio
+async def test_catalog_loads_all_pages(monkeypatch, database):
+    monkeypatch.setattr(genre_catalog, "GENRE_CATALOG_PAGE_SIZE", 2)
+    catalog = GenreCatalog(database, refresh_interval=60)
+    await catalog.refresh()
+
+    assert [genre.name for genre in catalog.genres] == ["Comedy", "Drama", "Horror"]
+    assert catalog.total == 3 and catalog.complete
+    assert database.calls["genres_all"] == 2
+
+
+@pytest.mark.asyncio
+async def test_incomplete_catalog(monkeypatch, database):
+    # жанров больше, чем можно загрузить постранично
+    monkeypatch.setattr(genre_catalog, "GENRE_CATALOG_PAGE_SIZE", 2)
+    monkeypatch.setattr(genre_catalog, "ES_PAGINATION_LIMIT", 2)
+    catalog = GenreCatalog(database, refresh_interval=60)
+    await catalog.refresh()
+    assert len(catalog.genres) == 2 and catalog.total == 3
+    assert not catalog.complete
+
+    # незагруженный жанр не считается несуществующим
+    monkeypatch.setattr(settings, "GENRE_CATALOG_ENABLED", True)
+    monkeypatch.setattr(genre_catalog, "genre_catalog", catalog)
+    assert genre_filter(database.genres[2].uuid) == database.genres[2].uuid
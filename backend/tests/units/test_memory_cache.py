@@ -0,0 +1,32 @@
+import time
+
+from core.memory_cache import MemoryCache
+
+
+def test_put_get():
+    cache = MemoryCache(max_size=10, expire=60)
+    cache.put("key", "value")
+    assert cache.get("key") == "value"
+    assert cache.get("other key") is None
+
+
+def test_lru_eviction():
+    cache = MemoryCache(max_size=2, expire=60)
+    cache.put("key1", 1)
+    cache.put("key2", 2)
+    # key1 становится самым свежим, вытесняется key2
+    assert cache.get("key1") == 1
+    cache.put("key3", 3)
+
+    assert len(cache) == 2
+    assert cache.get("key2") is None
+    assert cache.get("key1") == 1
+    assert cache.get("key3") == 3
+
+
+def test_expire():
+    cache = MemoryCache(max_size=10, expire=60)
+    cache.put("key", "value", expire=0.01)
+    time.sleep(0.02)
+    assert cache.get("key") is None
+    assert len(cache) == 0
@@ -0,0 +1,40 @@
+import pytest
+
+from core.memory_cache import key_variant_counts
+from core.metrics import Histogram, collect_key_variants, timed
+
+
+def test_histogram():
+    histogram = Histogram("test_seconds", "test", ("method",), buckets=(0.1, 1.0))
+    child = histogram.labels("get")
+    for value in (0.05, 0.1, 0.5, 5.0):
+        child.observe(value)
+
+    lines = list(histogram.collect())
+    # корзины накопительные, граница входит в корзину
+    assert 'test_seconds_bucket{method="get",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{method="get",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{method="get",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{method="get"} 4' in lines
+    assert histogram.labels("get") is child
+
+
+@pytest.mark.asyncio
+async def test_timed():
+    histogram = Histogram("test_timed_seconds", "test", ("method",))
+
+    @timed(histogram)
+    async def films_all():
+        return 1
+
+    assert await films_all() == 1
+    assert sum(histogram.labels("films_all").counts) == 1
+
+
+def test_key_variants(monkeypatch):
+    monkeypatch.setitem(key_variant_counts, "TEST_SEARCH", lambda: {"key1": 4, "key2": 1})
+    lines = list(collect_key_variants())
+
+    assert 'cache_keys_canonical{service="TEST_SEARCH"} 2' in lines
+    assert 'cache_keys_raw{service="TEST_SEARCH"} 5' in lines
+    assert 'cache_keys_max_variants{service="TEST_SEARCH"} 4' in lines
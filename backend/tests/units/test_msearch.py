@@ -0,0 +1,65 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from elasticsearch import NotFoundError
+
+from core.msearch import MultiSearchDispatcher, split_search_params
+
+
+class ElasticMock:
+    def __init__(self):
+        self.msearch_calls = []
+        self.search_calls = []
+
+    async def search(self, **kwargs):
+        self.search_calls.append(kwargs)
+        return {"hits": {"hits": [], "total": {"value": 0}}}
+
+    async def msearch(self, searches):
+        self.msearch_calls.append(searches)
+        responses = []
+        for body in searches[1::2]:
+            if body["query"] == "missing":
+                responses.append({"status": 404, "error": {"type": "index_not_found_exception"}})
+            else:
+                responses.append({"status": 200, "hits": {"hits": [], "total": {"value": body["size"]}}})
+        response = MagicMock()
+        response.__getitem__.side_effect = {"responses": responses}.__getitem__
+        return response
+
+
+def test_split_search_params():
+    header, body = split_search_params({"index": "movies", "from_": 10, "size": 5, "source_includes": ["title"]})
+    assert header == {"index": "movies"}
+    assert body == {"from": 10, "size": 5, "_source": {"includes": ["title"]}}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_searches_batched():
+    elastic = ElasticMock()
+    dispatcher = MultiSearchDispatcher(elastic, window=0.01, max_batch=10)
+
+    responses = await asyncio.gather(*(dispatcher.search(index="movies", size=size, query="q") for size in range(1, 4)))
+
+    assert len(elastic.msearch_calls) == 1
+    assert not elastic.search_calls
+    # каждый получил свой ответ
+    assert [response["hits"]["total"]["value"] for response in responses] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_max_batch_and_errors():
+    elastic = ElasticMock()
+    dispatcher = MultiSearchDispatcher(elastic, window=10, max_batch=2)
+
+    found, missing = await asyncio.gather(
+        dispatcher.search(index="movies", size=1, query="q"),
+        dispatcher.search(index="movies", size=1, query="missing"),
+        return_exceptions=True,
+    )
+
+    # пачка отправлена сразу по достижении max_batch, не дожидаясь окна
+    assert len(elastic.msearch_calls) == 1
+    assert found["hits"]["total"]["value"] == 1
+    assert isinstance(missing, NotFoundError)
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+from core.exceptions import ProfilerBusyError
+from core.profiler import ProfilerMiddleware, StackSampler
+
+
+def busy_loop(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler():
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    try:
+        # второй профилировщик в том же воркере не запускается
+        with pytest.raises(ProfilerBusyError):
+            StackSampler(interval=0.001).start()
+        busy_loop(0.1)
+    finally:
+        profile = sampler.stop()
+
+    assert sampler.samples > 0
+    stack, count = profile.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "test_profiler:busy_loop" in stack
+
+
+async def request(app, path: str, headers: list[tuple[bytes, bytes]]) -> dict:
+    """Запрос к ASGI приложению, возвращает заголовки ответа"""
+    response = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response.update((name.decode(), value.decode()) for name, value in message["headers"])
+
+    await app({"type": "http", "path": path, "headers": headers}, receive, send)
+    return response
+
+
+@pytest.mark.asyncio
+async def test_middleware_reports_concurrent_requests(monkeypatch):
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        if scope["path"] == "/slow":
+            await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = ProfilerMiddleware(app, interval=0.001)
+    monkeypatch.setattr(ProfilerMiddleware, "check_access", staticmethod(lambda scope: None))
+    profiled = [(b"x-profile", b"1")]
+
+    assert (await request(middleware, "/fast", profiled))["x-profile-concurrent"] == "0"
+
+    # другой запрос воркера выполняется во время профилирования и попадает в профиль
+    slow = asyncio.ensure_future(request(middleware, "/slow", []))
+    await asyncio.sleep(0)
+    response = await request(middleware, "/fast", profiled)
+    release.set()
+    await slow
+
+    assert response["x-profiled-status"] == "200"
+    assert response["x-profile-concurrent"] == "1"
+    assert middleware.in_flight == 0
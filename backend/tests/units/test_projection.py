@@ -0,0 +1,34 @@
+import pytest
+from fastapi import HTTPException
+
+from api.v1.params import FieldsParam
+from api.v1.schemas import ExtendedImdbFilm
+from models.dto_models import ExtendedFilm, ImdbFilm
+from models.projection import partial_model, source_includes
+
+FILM_ID = "715b726d-2239-4984-99d6-89420a6634c0"
+
+
+def test_partial_model():
+    model = partial_model(ImdbFilm, ("title", "uuid"))
+    film = model.parse_obj({"id": FILM_ID, "title": "Star Wars"})
+
+    assert film.imdb_rating is None
+    assert film.dict(include={"uuid", "title"}) == {"uuid": film.uuid, "title": "Star Wars"}
+    # модели кэшируются, класс для одних и тех же полей один
+    assert partial_model(ImdbFilm, ("title", "uuid")) is model
+
+
+def test_source_includes():
+    assert source_includes(("title", "uuid")) == ["title"]
+    assert source_includes(("uuid",)) == ["id"]
+
+
+def test_fields_param():
+    fields = FieldsParam(ExtendedImdbFilm, ExtendedFilm)
+
+    assert fields(None) is None
+    assert fields(" title, genres,title") == ("genres", "title", "uuid")
+    for value in ("", "title,marks", "fw_type"):
+        with pytest.raises(HTTPException):
+            fields(value)
@@ -0,0 +1,26 @@
+import uuid
+
+import pytest
+
+from services.films import SimilarFilmsService
+
+FILM_ID = uuid.UUID("3fbed5ed-1e53-45f6-ae0f-91f63eda6b7d")
+
+
+@pytest.fixture
+def service(cache, database):
+    service = SimilarFilmsService(cache, database)
+    yield service
+    SimilarFilmsService._instances.pop(SimilarFilmsService, None)
+
+
+@pytest.mark.asyncio
+async def test_deleted_films_not_counted(service, database):
+    # второй фильм удален после расчета списка похожих
+    database.similar[FILM_ID] = [database.film.uuid, uuid.uuid4()]
+    result = await service.get(film_id=FILM_ID, page_number=1, page_size=10)
+
+    assert result.total == 1
+    assert [film.uuid for film in result.result] == [database.film.uuid]
+    assert database.calls["imdb_films_by_ids"] == 1
+    assert await service.get(film_id=FILM_ID, page_number=2, page_size=10) is None
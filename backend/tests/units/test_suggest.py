@@ -0,0 +1,31 @@
+import pytest
+
+from services.films import FilmSuggestService
+
+
+@pytest.fixture
+def service(cache, database):
+    service = FilmSuggestService(cache, database)
+    yield service
+    FilmSuggestService._instances.pop(FilmSuggestService, None)
+
+
+@pytest.mark.asyncio
+async def test_hot_prefix_from_memory(service, cache, database):
+    result = await service.get(prefix="Star W", size=10)
+    assert result.result[0].title == "Star Wars"
+
+    # другое написание того же префикса - из памяти процесса
+    result = await service.get(prefix="  star   w", size=10)
+    assert result.cached == 1
+    assert database.prefixes == ["star w"]
+    # подсказки не ходят в кэш-сервис
+    assert cache.mem == {}
+    assert service.stats.cache_misses == 0
+
+
+@pytest.mark.asyncio
+async def test_not_found_from_memory(service, database):
+    assert await service.get(prefix="xyz", size=10) is None
+    assert await service.get(prefix="xyz", size=10) is None
+    assert database.prefixes == ["xyz"]
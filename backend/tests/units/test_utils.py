@@ -0,0 +1,24 @@
+import pytest
+
+from core.constants import CURSOR_START
+from core.utils import PageCursor, decode_cursor, encode_cursor, normalize_text
+
+
+def test_cursor_roundtrip():
+    cursor = PageCursor(search_after=[8.6, "edbb87fd-bfdb-458d-852d-61d6f3f67551"], pit_id="pit")
+    assert decode_cursor(encode_cursor(cursor)) == cursor
+
+
+def test_cursor_start():
+    assert decode_cursor(CURSOR_START) == PageCursor()
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "", "W10="])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_normalize_text():
+    assert normalize_text(" STAR\u00a0 Wars\t") == "star wars"
+    assert normalize_text("Ｓｔａｒ") == "star"
@@ -0,0 +1,83 @@
+import pytest
+
+import warmup
+from core.constants import DEFAULT_PAGE_SIZE
+from models.dto_models import ETLCycle
+from services import cache_generations, genre_catalog
+from services.films import PopularFilmsService
+from services.genre_catalog import GenreCatalog
+from services.warmup import CacheWarmer
+
+
+@pytest.fixture
+def warmer(cache, database):
+    warmer = CacheWarmer(cache, database, lambda answer: answer, pages=2, concurrency=2, etl_poll_interval=1)
+    yield warmer
+    # сервисы - синглтоны, для каждого теста создаем новый
+    PopularFilmsService._instances.pop(PopularFilmsService, None)
+
+
+@pytest.mark.asyncio
+async def test_warm_up(warmer, database):
+    # 2 сортировки * (3 жанра + без фильтра) * 2 страницы
+    assert await warmer.warm_up() == 16
+    assert database.calls["films_all"] == 16
+
+    # страницы уже в кэше - база не нужна, с force - загружаются заново
+    await warmer.warm_up()
+    assert database.calls["films_all"] == 16
+    await warmer.warm_up(force=True)
+    assert database.calls["films_all"] == 32
+
+
+@pytest.mark.asyncio
+async def test_warm_up_genres_from_catalog(warmer, database):
+    catalog = genre_catalog.genre_catalog = GenreCatalog(database, refresh_interval=60)
+    try:
+        await catalog.refresh()
+        catalog.genres = catalog.genres[:1]
+        calls = database.calls["genres_all"]
+
+        # 2 сортировки * (1 жанр каталога + без фильтра) * 2 страницы, жанры из базы не запрашиваются
+        assert await warmer.warm_up() == 8
+        assert database.calls["genres_all"] == calls
+    finally:
+        genre_catalog.genre_catalog = None
+
+
+@pytest.mark.asyncio
+async def test_etl_cycle(warmer, database):
+    database.cycle = ETLCycle(cycle=1, loaded=10)
+    await warmer.check_etl_cycle()
+    # первая проверка только запоминает цикл
+    assert database.calls["films_all"] == 0
+
+    database.cycle = ETLCycle(cycle=2, loaded=0)
+    await warmer.check_etl_cycle()
+    assert database.calls["films_all"] == 0
+
+    database.cycle = ETLCycle(cycle=3, loaded=10)
+    await warmer.check_etl_cycle()
+    await warmer.check_etl_cycle()
+    assert database.calls["films_all"] == 16
+
+
+@pytest.mark.asyncio
+async def test_cli_warms_server_keys(cache, database):
+    """warmup.py пишет по тем же ключам (с поколениями индексов), что читает сервис"""
+    database.generations["movies"] = 3
+    try:
+        assert await warmup.warm_up(cache, database, lambda answer: answer, force=False, pages=1, concurrency=2) == 8
+
+        # как при старте сервиса
+        await cache_generations.start_cache_generations(database)
+        service = PopularFilmsService(cache, database)
+        query = {"sort_by": "-imdb_rating", "genre_id": None, "page_number": 1, "page_size": DEFAULT_PAGE_SIZE}
+        key = service.get_response_key(service.normalize_query(query))
+    finally:
+        await cache_generations.stop_cache_generations()
+        cache_generations.cache_generations = None
+        PopularFilmsService._instances.pop(PopularFilmsService, None)
+
+    assert key.startswith(f"{PopularFilmsService.NAME}:G3:")
+    assert key in cache.mem
@@ -8,12 +8,29 @@ FW_UPDATE_KEY = "fw_date"
 PERSONS_UPDATE_KEY = "p_date"
 GENRES_UPDATE_KEY = "g_date"
 MARKS_UPDATE_KEY = "m_date"
+SIMILAR_UPDATE_KEY = "similar_date"
 
 EX_PERSON_UPDATE_KEY = "persons_date"
 EX_GENRE_UPDATE_KEY = "genres_date"
 
 DATA_COUNT_KEY = "data_count"
 
+# документ в индексе статуса ETL о последнем завершенном цикле (читает backend)
+ETL_CYCLE_DOC_ID = "cycle"
+# документы поколений индексов: generation:<индекс>, поколение растет после каждой загрузки в индекс
+# (backend включает его в ключи кэша)
+ETL_GENERATION_DOC_PREFIX = "generation:"
+
+# веса для похожих фильмов: за каждый общий жанр и каждую общую персону по роли
+SIMILAR_GENRE_WEIGHT = 2.0
+SIMILAR_ROLE_WEIGHTS = {
+    RoleType.DIRECTOR: 1.5,
+    RoleType.WRITER: 1.0,
+    RoleType.ACTOR: 1.0,
+}
+# сколько запросов к ES отправлять в одном _msearch
+SIMILAR_MSEARCH_SIZE = 100
+
 
 FILMWORK_SQL = """
     SELECT fw.id AS f_id,
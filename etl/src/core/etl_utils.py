@@ -4,7 +4,14 @@ from elastic_transport import ConnectionError
 from elasticsearch import Elasticsearch
 
 from core import etl_logger
-from core.settings import SCHEMA_FILE_GENRES, SCHEMA_FILE_MOVIES, SCHEMA_FILE_PERSONS, settings
+from core.settings import (
+    SCHEMA_FILE_ETL_STATUS,
+    SCHEMA_FILE_GENRES,
+    SCHEMA_FILE_MOVIES,
+    SCHEMA_FILE_PERSONS,
+    SCHEMA_FILE_SIMILAR_FILMS,
+    settings,
+)
 
 logger = etl_logger.get_logger(__name__)
 
@@ -69,4 +76,6 @@ def check_or_create_indexes():
         es_create_index_if_not_exist(settings.ES_INDEX_MOVIES, SCHEMA_FILE_MOVIES)
         and es_create_index_if_not_exist(settings.ES_INDEX_PERSONS, SCHEMA_FILE_PERSONS)
         and es_create_index_if_not_exist(settings.ES_INDEX_GENRES, SCHEMA_FILE_GENRES)
+        and es_create_index_if_not_exist(settings.ES_INDEX_SIMILAR_FILMS, SCHEMA_FILE_SIMILAR_FILMS)
+        and es_create_index_if_not_exist(settings.ES_INDEX_ETL_STATUS, SCHEMA_FILE_ETL_STATUS)
     )
@@ -9,6 +9,8 @@ ENV_FILE = BASE_DIR.parent / ".env.local"
 SCHEMA_FILE_MOVIES = BASE_DIR / "etc/movies_schema.json"
 SCHEMA_FILE_GENRES = BASE_DIR / "etc/genres_schema.json"
 SCHEMA_FILE_PERSONS = BASE_DIR / "etc/persons_schema.json"
+SCHEMA_FILE_SIMILAR_FILMS = BASE_DIR / "etc/similar_films_schema.json"
+SCHEMA_FILE_ETL_STATUS = BASE_DIR / "etc/etl_status_schema.json"
 
 VAR_DIR = BASE_DIR / "var/"
 LOG_DIR = VAR_DIR / "log/"
@@ -24,6 +26,10 @@ class Settings(BaseSettings):
     ES_INDEX_MOVIES: str = "movies"
     ES_INDEX_PERSONS: str = "persons"
     ES_INDEX_GENRES: str = "genres"
+    ES_INDEX_SIMILAR_FILMS: str = "similar_films"
+    ES_INDEX_ETL_STATUS: str = "etl_status"
+    # длина списка похожих фильмов
+    SIMILAR_FILMS_SIZE: int = Field(50, env="ETL_MOVIES_SIMILAR_SIZE")
     ETL_SLEEP_TIME: int = Field(..., env="ETL_MOVIES_SLEEP_TIME")
 
     # ES_BATCH_SIZE >= PG_BATCH_SIZE !!!
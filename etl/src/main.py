@@ -7,10 +7,12 @@ from core import etl_logger
 from core.backoff import backoff
 from pipeline.es_loader import ESLoader
 from pipeline.etl_pipeline import ETLPipeline, ETLPipelineError
+from pipeline.etl_status import ETLStatusWriter
 from pipeline.etl_transformer import ETLTransformer
 from core.etl_utils import check_or_create_indexes
 from pipeline.pg_extractor import FWExtractor
 from pipeline.plane_pipelines import DummyTransformer, GenreExtractor, PersonExtractor
+from pipeline.similar_pipeline import SimilarFilmsExtractor, SimilarFilmsTransformer
 from core.settings import STATE_FILE, settings
 from core.storage import DictState, JsonFileStorage
 
@@ -23,7 +25,7 @@ def all_ready_for_etl() -> bool:
     return check_or_create_indexes()
 
 
-def run(pipelines: list[ETLPipeline]):
+def run(pipelines: list[ETLPipeline], status: ETLStatusWriter):
     while not ev_exit.is_set():
         loaded = 0
         logger.info("Start working...")
@@ -39,6 +41,8 @@ def run(pipelines: list[ETLPipeline]):
         logger.info("-------------------------------------------------")
         logger.info(f"ETL executed. Time elapsed:{end_time - start_time}")
         logger.info(f"Amount record loaded:{loaded}")
+        # backend по этому событию прогревает кэш
+        status.cycle_completed(loaded)
 
         logger.info(f"wait for {settings.ETL_SLEEP_TIME}s")
         ev_exit.wait(settings.ETL_SLEEP_TIME)
@@ -55,32 +59,45 @@ def pre_check(pipelines: list[ETLPipeline]):
         pipeline.pre_check()
 
 
-def create_fw_pipeline(state_storage: DictState) -> ETLPipeline:
+def create_fw_pipeline(state_storage: DictState, status: ETLStatusWriter) -> ETLPipeline:
     dsn = settings.PG_URI
     pg = FWExtractor(dsn, settings.PG_BATCH_SIZE)
 
     url = settings.ES_URI
-    es = ESLoader(url, settings.ES_INDEX_MOVIES, settings.ES_BATCH_SIZE)
+    es = ESLoader(url, settings.ES_INDEX_MOVIES, settings.ES_BATCH_SIZE, status=status)
 
     return ETLPipeline(pg, ETLTransformer(), es, state_storage, "Filmworks pipeline")
 
 
-def create_person_pipeline(state_storage: DictState) -> ETLPipeline:
+def create_similar_pipeline(state_storage: DictState, status: ETLStatusWriter) -> ETLPipeline:
+    dsn = settings.PG_URI
+    pg = SimilarFilmsExtractor(dsn, settings.PG_BATCH_SIZE)
+
+    url = settings.ES_URI
+    transformer = SimilarFilmsTransformer(url, settings.ES_INDEX_MOVIES, settings.SIMILAR_FILMS_SIZE)
+    es = ESLoader(
+        url, settings.ES_INDEX_SIMILAR_FILMS, settings.ES_BATCH_SIZE, exclude={"modified", "id"}, status=status
+    )
+
+    return ETLPipeline(pg, transformer, es, state_storage, "Similar films pipeline")
+
+
+def create_person_pipeline(state_storage: DictState, status: ETLStatusWriter) -> ETLPipeline:
     dsn = settings.PG_URI
     pg = PersonExtractor(dsn, settings.PG_BATCH_SIZE)
 
     url = settings.ES_URI
-    es = ESLoader(url, settings.ES_INDEX_PERSONS, settings.ES_BATCH_SIZE, exclude={"modified", "id"})
+    es = ESLoader(url, settings.ES_INDEX_PERSONS, settings.ES_BATCH_SIZE, exclude={"modified", "id"}, status=status)
 
     return ETLPipeline(pg, DummyTransformer(), es, state_storage, "Persons pipeline")
 
 
-def create_genre_pipeline(state_storage: DictState) -> ETLPipeline:
+def create_genre_pipeline(state_storage: DictState, status: ETLStatusWriter) -> ETLPipeline:
     dsn = settings.PG_URI
     pg = GenreExtractor(dsn, settings.PG_BATCH_SIZE)
 
     url = settings.ES_URI
-    es = ESLoader(url, settings.ES_INDEX_GENRES, settings.ES_BATCH_SIZE, exclude={"modified", "id"})
+    es = ESLoader(url, settings.ES_INDEX_GENRES, settings.ES_BATCH_SIZE, exclude={"modified", "id"}, status=status)
 
     return ETLPipeline(pg, DummyTransformer(), es, state_storage, "Genres pipeline")
 
@@ -93,12 +110,15 @@ def main():
 
     storage = JsonFileStorage(STATE_FILE)
     state = DictState(storage, save_on_set=False)
+    status = ETLStatusWriter(settings.ES_URI, settings.ES_INDEX_ETL_STATUS)
 
-    fw_pipeline = create_fw_pipeline(state)
-    p_pipeline = create_person_pipeline(state)
-    g_pipeline = create_genre_pipeline(state)
+    fw_pipeline = create_fw_pipeline(state, status)
+    # после загрузки фильмов - похожие считаются по индексу movies
+    s_pipeline = create_similar_pipeline(state, status)
+    p_pipeline = create_person_pipeline(state, status)
+    g_pipeline = create_genre_pipeline(state, status)
 
-    pipelines = [fw_pipeline, p_pipeline, g_pipeline]
+    pipelines = [fw_pipeline, s_pipeline, p_pipeline, g_pipeline]
 
     logger.info("check conditions for ETL pipelines")
     pre_check(pipelines)
@@ -106,7 +126,7 @@ def main():
     logger.info("start pipelines")
 
     try:
-        run(pipelines)
+        run(pipelines, status)
     except Exception as e:
         # catch ALL unexpected exceptions
         # and logging them
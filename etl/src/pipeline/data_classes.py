@@ -31,6 +31,12 @@ class FPerson(BaseModel, ETLData):
     full_name: str
     modified: datetime
     movies: list[RoleMovies]
+    # подсказки при наборе имени (search_as_you_type)
+    full_name_suggest: str | None = None
+
+    @validator("full_name_suggest", always=True)
+    def fill_full_name_suggest(cls, v, values):
+        return values.get("full_name")
 
 
 class FGenre(BaseModel, ETLData):
@@ -41,6 +47,14 @@ class FGenre(BaseModel, ETLData):
     modified: datetime
 
 
+class SimilarFilms(BaseModel, ETLData):
+    """class for load ranked list of similar films"""
+
+    id: str
+    modified: datetime
+    similar: list[str]
+
+
 class Genre(IdNameMixin):
     pass
 
@@ -78,6 +92,11 @@ class ESData(BaseETLData):
     directors_names: list[str]
     actors_names: list[str]
     writers_names: list[str]
+    # id всех персон фильма и id с ролью вида "actor:<id>"
+    persons_ids: list[str]
+    persons_roles: list[str]
+    # подсказки при наборе названия (search_as_you_type)
+    title_suggest: str
 
     actors: list[Person]
     writers: list[Person]
@@ -9,17 +9,27 @@ from core.backoff import backoff
 from core.constants import DATA_COUNT_KEY
 from pipeline.data_classes import ESData
 from pipeline.etl_pipeline import ETLPipelineError, Loader
+from pipeline.etl_status import ETLStatusWriter
 
 logger = etl_logger.get_logger(__name__)
 
 
 class ESLoader(Loader):
-    def __init__(self, url: str, index_name: str, batch_size: int = 1000, exclude={"modified", "marks"}):
+    def __init__(
+        self,
+        url: str,
+        index_name: str,
+        batch_size: int = 1000,
+        exclude={"modified", "marks"},
+        status: ETLStatusWriter | None = None,
+    ):
         self.url = url
         self.index_name = index_name
         self.batch_size = batch_size
         self.connection = None
         self.exclude = exclude
+        # после каждой пачки увеличивает поколение индекса - backend сбрасывает кэш этого индекса
+        self.status = status
 
     def _get_connection(self):
         if self.connection:
@@ -31,8 +41,10 @@ class ESLoader(Loader):
     @backoff(exceptions=(ConnectionError,), logger_func=logger.error)
     def _load_to_es(self, data: list[dict]) -> tuple:
         es = self._get_connection()
-        result = bulk(es, data)
-        return result
+        if self.status is None:
+            return bulk(es, data)
+        # поколение увеличиваем, когда данные уже видны в поиске, иначе backend закэширует старые
+        return bulk(es, data, refresh="wait_for")
 
     def load_data(self, transform_data: Iterator[ESData]) -> Iterator[dict]:
         def make_portion_for_es(es_data: Iterator[ESData]) -> Iterator[list[dict[str, Any]]]:
@@ -57,6 +69,8 @@ class ESLoader(Loader):
                 raise ETLPipelineError(f"Error load to ES. Send rows:{data_count} loaded:{es_data_count}")
 
             logger.debug(f"es load data count:{es_data_count}")
+            if self.status is not None:
+                self.status.index_updated(self.index_name)
 
             # just for info
             self.state[DATA_COUNT_KEY] += data_count
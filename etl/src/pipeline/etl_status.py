@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+
+from elastic_transport import ConnectionError
+from elasticsearch import Elasticsearch
+
+from core import etl_logger
+from core.backoff import backoff
+from core.constants import ETL_CYCLE_DOC_ID, ETL_GENERATION_DOC_PREFIX
+
+logger = etl_logger.get_logger(__name__)
+
+
+class ETLStatusWriter:
+    """
+    Сообщает backend о завершении цикла ETL: документ ETL_CYCLE_DOC_ID в индексе статуса
+    со счетчиком циклов и количеством загруженных за цикл записей.
+    И о загрузках в индексы: документы ETL_GENERATION_DOC_PREFIX<индекс> с поколением индекса
+    """
+
+    def __init__(self, url: str, index_name: str):
+        self.url = url
+        self.index_name = index_name
+        self.connection = None
+
+    def _get_connection(self):
+        if self.connection:
+            return self.connection
+        else:
+            self.connection = Elasticsearch(self.url)
+            return self.connection
+
+    @backoff(exceptions=(ConnectionError,), logger_func=logger.error)
+    def cycle_completed(self, loaded: int) -> None:
+        es = self._get_connection()
+        params = {"loaded": loaded, "finished_at": datetime.now(timezone.utc).isoformat()}
+        es.update(
+            index=self.index_name,
+            id=ETL_CYCLE_DOC_ID,
+            script={
+                "source": "ctx._source.cycle += 1; ctx._source.loaded = params.loaded; "
+                "ctx._source.finished_at = params.finished_at",
+                "params": params,
+            },
+            upsert={"cycle": 1, **params},
+            refresh=True,
+        )
+        logger.debug(f"etl cycle completed, loaded: {loaded}")
+
+    @backoff(exceptions=(ConnectionError,), logger_func=logger.error)
+    def index_updated(self, index_name: str) -> None:
+        es = self._get_connection()
+        es.update(
+            index=self.index_name,
+            id=f"{ETL_GENERATION_DOC_PREFIX}{index_name}",
+            script={"source": "ctx._source.generation += 1"},
+            upsert={"generation": 1},
+            refresh=True,
+        )
+        logger.debug(f"index {index_name} generation incremented")
@@ -29,6 +29,10 @@ class ETLTransformer(Transformer):
             ex_data["actors"], ex_data["actors_names"] = filter_persons(persons, RoleType.ACTOR)
             ex_data["writers"], ex_data["writers_names"] = filter_persons(persons, RoleType.WRITER)
             ex_data["directors"], ex_data["directors_names"] = filter_persons(persons, RoleType.DIRECTOR)
+            # плоские поля для поиска фильмов персоны без nested запросов
+            ex_data["persons_ids"] = sorted({person.id for person in persons})
+            ex_data["persons_roles"] = sorted({f"{person.role}:{person.id}" for person in persons})
+            ex_data["title_suggest"] = row.title
 
             es_data = ESData(**(row.dict() | ex_data))
             yield es_data
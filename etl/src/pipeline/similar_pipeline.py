@@ -0,0 +1,138 @@
+from itertools import islice
+from typing import Iterator
+
+from elastic_transport import ConnectionError
+from elasticsearch import Elasticsearch
+
+from core import etl_logger
+from core.backoff import backoff
+from core.constants import SIMILAR_GENRE_WEIGHT, SIMILAR_MSEARCH_SIZE, SIMILAR_ROLE_WEIGHTS, SIMILAR_UPDATE_KEY
+from pipeline.data_classes import PGData, SimilarFilms
+from pipeline.etl_pipeline import ETLPipelineError, Transformer
+from pipeline.pg_extractor import FWExtractor, FWExtractorWorker
+
+logger = etl_logger.get_logger(__name__)
+
+
+class SimilarFilmsExtractorWorker(FWExtractorWorker):
+    """
+    class for extract filmworks changed since last similar films calculation
+    state is separate from Filmworks pipeline
+    """
+
+    STATE_KEY = SIMILAR_UPDATE_KEY
+    NAME = "Similar films Extractor"
+
+
+class SimilarFilmsExtractor(FWExtractor):
+    def __init__(self, dsn: str, batch_size: int = 100):
+        super().__init__(dsn, batch_size)
+        self.workers = [SimilarFilmsExtractorWorker()]
+
+
+class SimilarFilmsTransformer(Transformer):
+    """
+    Для каждого фильма считает ранжированный список похожих по индексу фильмов:
+    общие жанры, общие персоны (с весом по роли) и рейтинг.
+    Запросы к ES отправляются пачками через _msearch.
+    Пересчитываются только измененные фильмы: списки других фильмов, в которые измененный фильм
+    должен попасть (или из которых выпасть), остаются прежними до их собственного изменения
+    или полного пересчета (см. README ETL)
+    """
+
+    def __init__(self, url: str, movies_index: str, size: int = 50):
+        self.url = url
+        self.movies_index = movies_index
+        self.size = size
+        self.connection = None
+
+    def _get_connection(self):
+        if self.connection:
+            return self.connection
+        else:
+            self.connection = Elasticsearch(self.url)
+            return self.connection
+
+    def _similar_query(self, film: PGData) -> dict | None:
+        """return ES query for similar films or None if film has no genres and persons"""
+        should = []
+        if genre_ids := [genre.id for genre in film.genres or []]:
+            # score_mode sum - оценка растет с каждым общим жанром
+            should.append(
+                {
+                    "nested": {
+                        "path": "genres",
+                        "query": {"terms": {"genres.id": genre_ids}},
+                        "score_mode": "sum",
+                        "boost": SIMILAR_GENRE_WEIGHT,
+                    }
+                }
+            )
+        for role, weight in SIMILAR_ROLE_WEIGHTS.items():
+            if person_ids := [person.id for person in film.persons if person.role == role]:
+                path = f"{role}s"
+                should.append(
+                    {
+                        "nested": {
+                            "path": path,
+                            "query": {"terms": {f"{path}.id": person_ids}},
+                            "score_mode": "sum",
+                            "boost": weight,
+                        }
+                    }
+                )
+        if not should:
+            return None
+
+        return {
+            "size": self.size,
+            "_source": False,
+            "query": {
+                "function_score": {
+                    "query": {
+                        "bool": {
+                            "should": should,
+                            "minimum_should_match": 1,
+                            "must_not": {"ids": {"values": [film.id]}},
+                        }
+                    },
+                    # при равной похожести выше фильмы с большим рейтингом
+                    "field_value_factor": {"field": "imdb_rating", "modifier": "ln2p", "missing": 0},
+                    "boost_mode": "multiply",
+                }
+            },
+        }
+
+    @backoff(exceptions=(ConnectionError,), logger_func=logger.error)
+    def _search_similar(self, queries: list[dict]) -> list[list[str]]:
+        es = self._get_connection()
+        searches = []
+        for query in queries:
+            searches.extend(({"index": self.movies_index}, query))
+        response = es.msearch(searches=searches)
+
+        result = []
+        for item in response["responses"]:
+            if "error" in item:
+                raise ETLPipelineError(f"Error search similar films: {item['error']}")
+            result.append([hit["_id"] for hit in item["hits"]["hits"]])
+        return result
+
+    def _transform_portion(self, films: list[PGData]) -> list[SimilarFilms]:
+        queries = {film.id: query for film in films if (query := self._similar_query(film))}
+        similar = dict(zip(queries, self._search_similar(list(queries.values())))) if queries else {}
+
+        return [SimilarFilms(id=film.id, modified=film.modified, similar=similar.get(film.id, [])) for film in films]
+
+    def transform_data(self, db_data: Iterator[PGData]) -> Iterator[SimilarFilms]:
+        while films := list(islice(db_data, SIMILAR_MSEARCH_SIZE)):
+            yield from self._transform_portion(films)
+            self.row_count += len(films)
+
+    def pre_check(self) -> None:
+        try:
+            if not self._get_connection().ping():
+                raise ETLPipelineError(" Ping to Elasticsearch failed")
+        except ConnectionError as e:
+            raise ETLPipelineError(f"Elasticsearch pre_check error:{e}") from e
+        logger.info("Similar films transformer pre_check OK")
@@ -0,0 +1,121 @@
+"""Бенчмарк сжатия значений кэша (core.cache_codec): размер в Redis против CPU на запись и чтение.
+
+Значения строятся так же, как их пишет backend (result.json() моделей сервисов):
+страница популярных фильмов на 50 и 200 фильмов и фильм с полным составом (ExtendedFilm).
+С --es документы берутся из индекса movies, иначе генерируются похожие по объему данные.
+Для каждого кодека печатает размер значения, долю сэкономленной памяти
+и CPU на сжатие (запись в кэш) и распаковку (чтение из кэша).
+
+Запуск из корня репозитория (нужны зависимости backend, lz4 - если установлен):
+    python tests/benchmarks/cache_compression.py --es http://localhost:9200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[2] / "backend" / "src"))
+# настройки backend читаются при импорте, для бенчмарка достаточно значений-заглушек
+for name, value in {
+    "REDIS_BACKEND_DSN": "redis://localhost:6379",
+    "ELK_MOVIES_DSN": "http://localhost:9200",
+    "BACKEND_JWT_KEY": "benchmark",
+    "JAEGER_HOST_NAME": "localhost",
+    "JAEGER_PORT": "6831",
+}.items():
+    os.environ.setdefault(name, value)
+
+from core import cache_codec  # noqa: E402
+from core.cache_codec import CacheCodec, decode, encode  # noqa: E402
+from models.dto_models import ExtendedFilm, ImdbFilm  # noqa: E402
+from models.service_result import ServiceListResult, ServiceSingeResult  # noqa: E402
+
+WORDS = (
+    "the a of and to in his her with from young man woman war love story life world family secret "
+    "journey city night dark star return last first new old friend enemy team mission space time "
+    "must find save discover against before after together alone home lost power truth"
+).split()
+
+
+def sentence(words: int) -> str:
+    return " ".join(random.choices(WORDS, k=words)).capitalize()
+
+
+def person() -> dict:
+    return {"id": str(uuid.uuid4()), "name": f"{sentence(1)} {sentence(1)}son"}
+
+
+def synthetic_film() -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "title": sentence(random.randint(1, 5)),
+        "description": sentence(random.randint(20, 60)),
+        "imdb_rating": round(random.uniform(1, 10), 1),
+        "fw_type": "movie",
+        "rars_rating": random.choice((0, 6, 12, 16, 18)),
+        "genres": [{"id": str(uuid.uuid4()), "name": sentence(1)} for _ in range(random.randint(1, 4))],
+        "actors": [person() for _ in range(random.randint(5, 30))],
+        "writers": [person() for _ in range(random.randint(1, 5))],
+        "directors": [person() for _ in range(random.randint(1, 2))],
+        "mark": [sentence(1) for _ in range(random.randint(0, 3))],
+    }
+
+
+def es_films(url: str, count: int) -> list[dict]:
+    from elasticsearch import Elasticsearch
+
+    es = Elasticsearch(url)
+    response = es.search(index="movies", size=count, sort=[{"imdb_rating": {"order": "desc"}}])
+    return [hit["_source"] for hit in response["hits"]["hits"]]
+
+
+def payloads(films: list[dict]) -> dict[str, bytes]:
+    """Значения в том виде, в котором их пишет put_to_cache"""
+    page_model = ServiceListResult[ImdbFilm]
+    result = {}
+    for size in (50, 200):
+        page = [ImdbFilm(**film) for film in films[:size]]
+        result[f"films page {len(page)}"] = page_model(total=10_000, page_num=1, page_size=size, result=page).json()
+    # фильм с самым большим составом
+    film = max(films, key=lambda film: len(film.get("actors", [])))
+    result["film with cast"] = ServiceSingeResult[ExtendedFilm](total=1, page_num=1, page_size=1, result=film).json()
+    return {name: value.encode() for name, value in result.items()}
+
+
+def cpu_per_call(func, value, repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        func(value)
+    return (time.process_time() - start) / repeat * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache compression: stored size vs CPU per put/get")
+    parser.add_argument("--es", help="Elasticsearch URL to take films from the movies index")
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    films = es_films(args.es, 200) if args.es else [synthetic_film() for _ in range(200)]
+
+    codecs = [CacheCodec.NONE, CacheCodec.ZLIB]
+    if cache_codec.lz4 is not None:
+        codecs.append(CacheCodec.LZ4)
+    else:
+        print("lz4 is not installed, skipped")
+
+    print(f"{'payload':<16} {'codec':<6} {'bytes':>8} {'saved':>7} {'put us':>8} {'get us':>8}")
+    for name, value in payloads(films).items():
+        for codec in codecs:
+            stored = encode(value, codec, min_size=0)
+            put_us = cpu_per_call(lambda data: encode(data, codec, 0), value, args.repeat)
+            get_us = cpu_per_call(decode, stored, args.repeat)
+            saved = 1 - len(stored) / len(value)
+            print(f"{name:<16} {codec.value:<6} {len(stored):>8} {saved:>7.1%} {put_us:>8.1f} {get_us:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
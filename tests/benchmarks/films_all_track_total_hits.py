@@ -0,0 +1,128 @@
+"""Бенчмарк запроса популярных фильмов (films_all без фильтра) на синтетическом индексе.
+
+Создает индекс с nested-полями, как movies (index.sort с nested-полями ES не поддерживает),
+и сравнивает задержку запроса match_all + sort -imdb_rating с точным подсчетом
+совпадений (track_total_hits=true, до изменений), с порогом ES по умолчанию (10000)
+и с порогом сервиса (APPROXIMATE_TOTALS, total_relation = gte). Когда total не нужен
+точно, ES пропускает документы, которые не попадут в страницу по сортировке.
+
+Запуск (нужен только пакет elasticsearch):
+    python films_all_track_total_hits.py --es http://localhost:9200 --count 1000000
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import bulk
+
+INDEX = "bench_movies"
+
+MAPPINGS = {
+    "dynamic": "strict",
+    "properties": {
+        "id": {"type": "keyword"},
+        "imdb_rating": {"type": "float"},
+        "title": {"type": "text"},
+        "genres": {"type": "nested", "properties": {"id": {"type": "keyword"}, "name": {"type": "text"}}},
+    },
+}
+
+GENRES = [{"id": str(uuid.uuid4()), "name": f"genre {i}"} for i in range(20)]
+
+
+def gen_films(count: int):
+    for i in range(count):
+        film_id = str(uuid.uuid4())
+        yield {
+            "_id": film_id,
+            "_source": {
+                "id": film_id,
+                "imdb_rating": round(random.uniform(0, 10), 1),
+                "title": f"Film {i}",
+                "genres": random.sample(GENRES, k=random.randint(1, 3)),
+            },
+        }
+
+
+def create_index(es: Elasticsearch, index: str, count: int) -> None:
+    if es.indices.exists(index=index):
+        es.indices.delete(index=index)
+
+    settings = {"number_of_replicas": 0, "refresh_interval": "-1"}
+    es.indices.create(index=index, mappings=MAPPINGS, settings=settings)
+
+    random.seed(42)
+    start = time.perf_counter()
+    bulk(es.options(request_timeout=120), gen_films(count), index=index, chunk_size=5000)
+    es.indices.refresh(index=index)
+    es.options(request_timeout=600).indices.forcemerge(index=index, max_num_segments=5)
+    print(f"{index}: {count} films loaded in {time.perf_counter() - start:.1f}s")
+
+
+def films_all_query(page: int, size: int, track_total_hits: int | bool | None) -> dict:
+    query = {
+        "from_": (page - 1) * size,
+        "size": size,
+        "source_includes": ["imdb_rating", "title"],
+        "query": {"bool": {"must": {"match_all": {}}}},
+        "sort": [{"imdb_rating": {"order": "desc"}}, {"id": {"order": "asc"}}],
+        # кэш запросов ES отключен, иначе меряем кэш, а не поиск
+        "request_cache": False,
+    }
+    if track_total_hits is not None:
+        query["track_total_hits"] = track_total_hits
+    return query
+
+
+def measure(es: Elasticsearch, index: str, runs: int, size: int, track_total_hits: int | bool | None) -> list[float]:
+    timings = []
+    for run in range(runs):
+        page = run % 10 + 1
+        start = time.perf_counter()
+        es.search(index=index, **films_all_query(page, size, track_total_hits))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{name:<45} mean {statistics.mean(timings):7.2f}ms  p50 {statistics.median(timings):7.2f}ms  p95 {p95:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="films_all latency: exact vs limited track_total_hits")
+    parser.add_argument("--es", default="http://localhost:9200")
+    parser.add_argument("--count", type=int, default=1_000_000, help="number of synthetic films")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--size", type=int, default=50, help="page size")
+    parser.add_argument("--track-total-hits", type=int, default=1000)
+    parser.add_argument("--skip-load", action="store_true", help="use index from previous run")
+    parser.add_argument("--keep", action="store_true", help="do not delete index after run")
+    args = parser.parse_args()
+
+    es = Elasticsearch(args.es, request_timeout=60)
+    if not args.skip_load:
+        create_index(es, INDEX, args.count)
+
+    cases = [
+        ("before: exact total (track_total_hits=true)", True),
+        ("default total hits (10000)", None),
+        (f"after: track_total_hits={args.track_total_hits}", args.track_total_hits),
+    ]
+    for name, track_total_hits in cases:
+        # прогрев
+        measure(es, INDEX, 10, args.size, track_total_hits)
+        report(name, measure(es, INDEX, args.runs, args.size, track_total_hits))
+
+    if not args.keep:
+        es.indices.delete(index=INDEX)
+
+
+if __name__ == "__main__":
+    main()
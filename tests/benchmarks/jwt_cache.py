@@ -0,0 +1,93 @@
+"""Бенчмарк проверки JWT в backend: jwt.decode + AccessTokenPayload на каждый запрос
+против кэша проверенных токенов (core.auth_bearer.decode_access_token).
+
+Поток запросов моделируется так: у каждого клиента свой токен, доля reuse запросов
+приходит с уже виденным токеном, остальные - с новым (новый логин или refresh).
+Печатает CPU на запрос (process_time) для каждой доли повторного использования.
+
+Запуск из корня репозитория (нужны зависимости backend):
+    python tests/benchmarks/jwt_cache.py --requests 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[2] / "backend" / "src"))
+# настройки backend читаются при импорте, для бенчмарка достаточно значений-заглушек
+for name, value in {
+    "REDIS_BACKEND_DSN": "redis://localhost:6379",
+    "ELK_MOVIES_DSN": "http://localhost:9200",
+    "BACKEND_JWT_KEY": "benchmark",
+    "JAEGER_HOST_NAME": "localhost",
+    "JAEGER_PORT": "6831",
+}.items():
+    os.environ.setdefault(name, value)
+
+import jwt  # noqa: E402
+
+from core.auth_bearer import JWT_ALGORITHM, JWT_SECRET, decode_access_token, verified_tokens  # noqa: E402
+from models.token import AccessTokenPayload  # noqa: E402
+
+
+def make_token() -> str:
+    now = int(time.time())
+    payload = {
+        "fresh": False,
+        "iat": now,
+        "jti": str(uuid.uuid4()),
+        "type": "access",
+        "sub": str(uuid.uuid4()),
+        "nbf": now,
+        "csrf": str(uuid.uuid4()),
+        "exp": now + 3600,
+        "name": "user",
+        "roles": ["subscriber"],
+        "device_id": "benchmark",
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+def token_stream(requests: int, reuse: float) -> list[str]:
+    random.seed(42)
+    tokens = [make_token()]
+    stream = []
+    for _ in range(requests):
+        if random.random() >= reuse:
+            tokens.append(make_token())
+        stream.append(random.choice(tokens) if random.random() < reuse else tokens[-1])
+    return stream
+
+
+def decode_uncached(token: str) -> AccessTokenPayload:
+    # как было до кэша: подпись и pydantic на каждый запрос
+    return AccessTokenPayload(**jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM]))
+
+
+def cpu_per_request(decode, stream: list[str]) -> float:
+    start = time.process_time()
+    for token in stream:
+        decode(token)
+    return (time.process_time() - start) / len(stream) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JWT verification CPU per request: uncached vs cached")
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--reuse", type=float, nargs="+", default=[0.0, 0.5, 0.9, 0.99, 0.999])
+    args = parser.parse_args()
+
+    print(f"{'reuse':>6} {'uncached us/req':>16} {'cached us/req':>14} {'saved':>7}")
+    for reuse in args.reuse:
+        stream = token_stream(args.requests, reuse)
+        uncached = cpu_per_request(decode_uncached, stream)
+        verified_tokens.clear()
+        cached = cpu_per_request(decode_access_token, stream)
+        print(f"{reuse:>6} {uncached:>16.2f} {cached:>14.2f} {1 - cached / uncached:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
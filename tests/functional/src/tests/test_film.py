@@ -139,6 +139,54 @@ async def test_films_similar(make_get_request, query_data: dict[str, str | int],
     check_multi_response(status, body, expected_result)
 
 
+testdata = [
+    (
+        [("id", "edbb87fd-bfdb-458d-852d-61d6f3f67551"), ("id", "23db65dd-a1cb-408e-ad48-b5d7a34a8b96")],
+        {"status": HTTPStatus.OK, "total": 2, "0#title": "First film"},
+        "get films batch",
+    ),
+    (
+        [("id", "edbb87fd-bfdb-458d-852d-61d6f3f67551"), ("id", "a48f8db2-7ae2-4bea-8f55-be6590c5b8d4")],
+        {"status": HTTPStatus.OK, "total": 1, "0#title": "First film"},
+        "non existent film in batch",
+    ),
+    ([("id", "a48f8db2-7ae2-4bea-8f55-be6590c5b8d4")], {"status": HTTPStatus.NOT_FOUND}, "non existent films"),
+    ([("id", "not uuid")], {"status": HTTPStatus.UNPROCESSABLE_ENTITY}, "invalid film uuid"),
+    ([("id", "edbb87fd-bfdb-458d-852d-61d6f3f67551")] * 51, {"status": HTTPStatus.BAD_REQUEST}, "too many films"),
+]
+
+
+@pytest.mark.parametrize("query_data, expected_result", argvalues=args(testdata), ids=ids(testdata))
+async def test_films_batch(make_get_request, query_data: list[tuple[str, str]], expected_result: dict[str, str | int]):
+    url = "/api/v1/films/batch"
+    body, header, status = await make_get_request(url, query_data)
+
+    check_multi_response(status, body, expected_result)
+
+
+# ------------------------------------------------------------------------------ #
+# FILMS SUGGEST, /api/v1/films/suggest
+
+testdata = [
+    ({"query": "first"}, {"status": HTTPStatus.OK, "total": 1, "0#title": "First film"}, "full word"),
+    ({"query": "mid"}, {"status": HTTPStatus.OK, "total": 1, "title": "Middle movie"}, "prefix"),
+    ({"query": "first fi"}, {"status": HTTPStatus.OK, "0#title": "First film"}, "last word is prefix"),
+    ({"query": "mov"}, {"status": HTTPStatus.OK, "length": 10}, "default size"),
+    ({"query": "mov", "page[size]": 3}, {"status": HTTPStatus.OK, "length": 3}, "size"),
+    ({"query": "lucas"}, {"status": HTTPStatus.NOT_FOUND}, "nothing found"),
+    ({}, {"status": HTTPStatus.UNPROCESSABLE_ENTITY}, "no query"),
+    ({"query": "mov", "page[size]": 21}, {"status": HTTPStatus.UNPROCESSABLE_ENTITY}, "too many suggestions"),
+]
+
+
+@pytest.mark.parametrize("query_data, expected_result", argvalues=args(testdata), ids=ids(testdata))
+async def test_films_suggest(make_get_request, query_data: dict[str, str | int], expected_result: dict[str, str | int]):
+    url = "/api/v1/films/suggest"
+    body, header, status = await make_get_request(url, query_data)
+
+    check_multi_response(status, body, expected_result)
+
+
 async def test_cache(clear_indices, make_get_request):
     """кэш проверять только после тестов! Отдельно нельзя!"""
 
@@ -122,6 +122,30 @@ async def test_persons_film(make_get_request, query_data: dict[str, str | int],
     check_multi_response(status, body, expected_result)
 
 
+# ------------------------------------------------------------------------------ #
+# PERSONS SUGGEST, /api/v1/persons/suggest
+
+testdata = [
+    ({"query": "first"}, {"status": HTTPStatus.OK, "total": 1, "0#full_name": "First Person"}, "full word"),
+    ({"query": "midd"}, {"status": HTTPStatus.OK, "total": 1, "full_name": "Middle"}, "prefix"),
+    ({"query": "person la"}, {"status": HTTPStatus.OK, "0#full_name": "Person Last"}, "last word is prefix"),
+    ({"query": "pers"}, {"status": HTTPStatus.OK, "length": 10}, "default size"),
+    ({"query": "pers", "page[size]": 3}, {"status": HTTPStatus.OK, "length": 3}, "size"),
+    ({"query": "Lucas"}, {"status": HTTPStatus.NOT_FOUND}, "nothing found"),
+    ({}, {"status": HTTPStatus.UNPROCESSABLE_ENTITY}, "no query"),
+]
+
+
+@pytest.mark.parametrize("query_data, expected_result", argvalues=args(testdata), ids=ids(testdata))
+async def test_person_suggest(
+    make_get_request, query_data: dict[str, str | int], expected_result: dict[str, str | int]
+):
+    url = "/api/v1/persons/suggest"
+    body, header, status = await make_get_request(url, query_data)
+
+    check_multi_response(status, body, expected_result)
+
+
 async def test_cache(clear_indices, make_get_request):
     """кэш проверять только после тестов! Отдельно нельзя!"""
 
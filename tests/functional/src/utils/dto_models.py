@@ -1,6 +1,6 @@
 from uuid import UUID
 
-from pydantic import Field
+from pydantic import Field, root_validator
 
 from .core_model import CoreModel
 
@@ -33,9 +33,47 @@ class Person(IdModel):
 class ExtendedPerson(IdModel):
     full_name: str
     movies: list[RoleMovies]
+    # подсказки при наборе имени (search_as_you_type), ETL копирует full_name
+    full_name_suggest: str = ""
 
+    @root_validator(skip_on_failure=True)
+    def fill_full_name_suggest(cls, values):
+        values["full_name_suggest"] = values["full_name"]
+        return values
 
-class ExtendedFilm(Film):
+
+class PersonsIdsMixin(CoreModel):
+    """плоские поля с id персон фильма, которые заполняет ETL"""
+
+    persons_ids: list[str] = []
+    persons_roles: list[str] = []
+
+    @root_validator(skip_on_failure=True)
+    def fill_persons_ids(cls, values):
+        roles = {
+            "actor": values.get("actors", []),
+            "writer": values.get("writers", []),
+            "director": values.get("directors", []),
+        }
+        values["persons_ids"] = sorted({str(person.id) for persons in roles.values() for person in persons})
+        values["persons_roles"] = sorted(
+            {f"{role}:{person.id}" for role, persons in roles.items() for person in persons}
+        )
+        return values
+
+
+class TitleSuggestMixin(CoreModel):
+    """подсказки при наборе названия (search_as_you_type), ETL копирует title"""
+
+    title_suggest: str = ""
+
+    @root_validator(skip_on_failure=True)
+    def fill_title_suggest(cls, values):
+        values["title_suggest"] = values["title"]
+        return values
+
+
+class ExtendedFilm(PersonsIdsMixin, TitleSuggestMixin, Film):
     description: str
     imdb_rating: float
     fw_type: str
@@ -47,7 +85,7 @@ class ExtendedFilm(Film):
     mark: list[str]
 
 
-class ElasticFilm(Film):
+class ElasticFilm(PersonsIdsMixin, TitleSuggestMixin, Film):
     imdb_rating: float
     rars_rating: int
     fw_type: str